@@ -0,0 +1,139 @@
+"""
+Пулы конкурентности эндпоинтов.
+
+Синхронные обработчики выполняются в общем пуле потоков anyio
+(THREADPOOL_SIZE). Без ограничений всплеск тяжёлых запросов — отчёты
+персонала, "Мои поездки" — занимает все потоки, и оформление бронирования
+ждёт в той же очереди. Каждый класс маршрутов получает свой пул: не больше
+N одновременно выполняемых запросов и ограниченная очередь ожидания.
+Переполненная очередь или слишком долгое ожидание — 503 с Retry-After.
+
+Сумма лимитов пулов меньше THREADPOOL_SIZE: оставшиеся потоки достаются
+маршрутам без пула (аутентификация, системные), и checkout всегда находит
+свободный поток.
+"""
+import time
+from typing import Dict, Optional
+
+import anyio
+import anyio.to_thread
+from fastapi import Depends
+
+from app.core.config import settings
+from app.core.exceptions import ServiceBusy
+
+
+class ConcurrencyPool:
+    """Семафор с ограниченной очередью и метриками ожидания."""
+
+    def __init__(self, name: str, limit: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore: Optional[anyio.Semaphore] = None
+        self.in_use = 0
+        self.waiting = 0
+        self.acquired = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.queue_seconds = 0.0
+        self.max_queue_seconds = 0.0
+
+    @property
+    def semaphore(self) -> anyio.Semaphore:
+        # Создаётся в цикле событий при первом запросе
+        if self._semaphore is None:
+            self._semaphore = anyio.Semaphore(self.limit)
+        return self._semaphore
+
+    async def acquire(self) -> None:
+        if self.waiting >= self.max_queue and self.semaphore.value == 0:
+            self.rejected += 1
+            raise ServiceBusy()
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            with anyio.fail_after(self.queue_timeout):
+                await self.semaphore.acquire()
+        except TimeoutError:
+            self.timed_out += 1
+            raise ServiceBusy()
+        finally:
+            self.waiting -= 1
+        waited = time.perf_counter() - started
+        self.in_use += 1
+        self.acquired += 1
+        self.queue_seconds += waited
+        self.max_queue_seconds = max(self.max_queue_seconds, waited)
+
+    def release(self) -> None:
+        self.in_use -= 1
+        self.semaphore.release()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "limit": self.limit,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "max_queue": self.max_queue,
+            "acquired": self.acquired,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_queue_ms": round(self.queue_seconds / self.acquired * 1000, 2) if self.acquired else 0.0,
+            "max_queue_ms": round(self.max_queue_seconds * 1000, 2),
+        }
+
+
+pools: Dict[str, ConcurrencyPool] = {
+    "browse": ConcurrencyPool(
+        "browse", settings.BROWSE_CONCURRENCY, settings.BROWSE_QUEUE_SIZE, settings.CONCURRENCY_QUEUE_TIMEOUT_SECONDS
+    ),
+    "checkout": ConcurrencyPool(
+        "checkout", settings.CHECKOUT_CONCURRENCY, settings.CHECKOUT_QUEUE_SIZE, settings.CONCURRENCY_QUEUE_TIMEOUT_SECONDS
+    ),
+    "staff_reports": ConcurrencyPool(
+        "staff_reports", settings.STAFF_REPORTS_CONCURRENCY, settings.STAFF_REPORTS_QUEUE_SIZE,
+        settings.CONCURRENCY_QUEUE_TIMEOUT_SECONDS
+    ),
+}
+
+
+def limit_concurrency(name: str):
+    """
+    Dependency: запрос выполняется в слоте пула name.
+    Подключается в dependencies= маршрута — такие зависимости разрешаются
+    раньше сессии БД и текущего пользователя, которые тоже занимают поток.
+    """
+    pool = pools[name]
+
+    async def concurrency_slot():
+        if not settings.CONCURRENCY_POOLS_ENABLED:
+            yield
+            return
+        await pool.acquire()
+        try:
+            yield
+        finally:
+            pool.release()
+
+    # scope="function": слот освобождается по окончании обработчика, до отправки ответа
+    return Depends(concurrency_slot, scope="function")
+
+
+def configure_threadpool() -> None:
+    """Размер пула потоков anyio для синхронных обработчиков и зависимостей."""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+
+
+def concurrency_stats() -> Dict[str, object]:
+    """Загрузка пула потоков и пулов конкурентности (для /health/concurrency)."""
+    limiter = anyio.to_thread.current_default_thread_limiter().statistics()
+    return {
+        "threadpool": {
+            "size": limiter.total_tokens,
+            "in_use": limiter.borrowed_tokens,
+            "waiting": limiter.tasks_waiting,
+        },
+        "pools": {name: pool.stats() for name, pool in pools.items()} if settings.CONCURRENCY_POOLS_ENABLED else None,
+    }
@@ -4,7 +4,7 @@
 """
 from pydantic_settings import BaseSettings
 from pydantic import field_validator
-from typing import List
+from typing import List, Literal
 import os
 
 
@@ -26,6 +26,22 @@ class Settings(BaseSettings):
     # БАЗА ДАННЫХ
     # ─────────────────────────────────────────
     DATABASE_URL: str = "sqlite:///./airline.db"
+    DB_POOL_SIZE: int = 5  # Постоянных соединений в пуле
+    DB_MAX_OVERFLOW: int = 10  # Дополнительных соединений сверх пула при пиках
+    DB_POOL_TIMEOUT_SECONDS: int = 30  # Ожидание свободного соединения, затем ошибка
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # Соединения старше пересоздаются
+    DB_POOL_PRE_PING: bool = True  # Проверка соединения перед выдачей из пула
+    DB_ECHO: bool = False  # Логировать SQL (только для отладки)
+    READ_POOL_ENABLED: bool = True  # Эндпоинты чтения — через отдельный пул только для чтения
+    READ_DATABASE_URL: str = ""  # Реплика для чтения; пусто — тот же файл SQLite (query_only)
+    DB_READ_POOL_SIZE: int = 10  # Постоянных соединений в пуле чтения
+    DB_READ_MAX_OVERFLOW: int = 20  # Дополнительных соединений пула чтения при пиках
+    ASYNC_DB_ENABLED: bool = False  # Async-эндпоинты горячих чтений (нужны greenlet и aiosqlite/asyncpg)
+    ASYNC_DATABASE_URL: str = ""  # Пусто — URL чтения с асинхронным драйвером (sqlite+aiosqlite, postgresql+asyncpg)
+    SQLITE_PROFILE_ENABLED: bool = True  # WAL, synchronous=NORMAL, mmap, кэш, foreign_keys на каждом соединении
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # Ожидание блокировки записи вместо "database is locked"
+    SQLITE_MMAP_SIZE_MB: int = 256  # Отображение файла базы в память
+    SQLITE_CACHE_SIZE_MB: int = 64  # Кэш страниц на соединение
     
     # ─────────────────────────────────────────
     # CORS
@@ -38,6 +54,68 @@ class Settings(BaseSettings):
     DEBUG: bool = True
     LOG_LEVEL: str = "INFO"
     
+    # ─────────────────────────────────────────
+    # КОНКУРЕНТНОСТЬ
+    # ─────────────────────────────────────────
+    THREADPOOL_SIZE: int = 40  # Потоков anyio для синхронных обработчиков (по умолчанию anyio — 40)
+    CONCURRENCY_POOLS_ENABLED: bool = True  # Лимиты одновременных запросов по классам маршрутов
+    BROWSE_CONCURRENCY: int = 20  # Поиск, рейсы, карты мест, "Мои поездки"
+    BROWSE_QUEUE_SIZE: int = 200  # Сверх этого в очереди — сразу 503
+    CHECKOUT_CONCURRENCY: int = 12  # Блокировка мест, бронирование, регистрация, отмена
+    CHECKOUT_QUEUE_SIZE: int = 100
+    STAFF_REPORTS_CONCURRENCY: int = 4  # Тяжёлые списки персонала: платежи, бронирования, пользователи
+    STAFF_REPORTS_QUEUE_SIZE: int = 10
+    CONCURRENCY_QUEUE_TIMEOUT_SECONDS: float = 10  # Максимальное ожидание слота, затем 503
+    
+    # ─────────────────────────────────────────
+    # БРОНИРОВАНИЕ
+    # ─────────────────────────────────────────
+    SEAT_RESERVATION_MODE: Literal["optimistic", "locking"] = "optimistic"  # Уникальные ограничения | блокировка рейса
+    SEAT_RESERVATION_MAX_ATTEMPTS: int = 3  # Попытки блокировки мест при конкурентных конфликтах
+    SEAT_RESERVATION_BACKOFF_MS: int = 20  # Базовая пауза между попытками (растёт вдвое)
+    PNR_BLOCK_SIZE: int = 256  # Сколько номеров PNR процесс резервирует за одно обращение к БД
+    PNR_PERMUTATION_KEY: str = "zhan-airline-pnr"  # Ключ перестановки номеров в коды PNR
+
+    # ─────────────────────────────────────────
+    # УВЕДОМЛЕНИЯ
+    # ─────────────────────────────────────────
+    INBOX_PAGE_SIZE: int = 20  # Сообщений на странице ленты пассажира по умолчанию
+    INBOX_MAX_PAGE_SIZE: int = 100  # Максимальный размер страницы ленты
+    TRIP_PROJECTION_ENABLED: bool = True  # "Мои поездки" из готовой проекции (False — сборка на каждый запрос)
+    
+    # ─────────────────────────────────────────
+    # ФОНОВЫЕ ЗАДАЧИ
+    # ─────────────────────────────────────────
+    FLIGHT_STATUS_SCHEDULER_ENABLED: bool = True
+    FLIGHT_STATUS_RESYNC_SECONDS: int = 300  # Полная сверка очереди переходов с БД
+    HOLD_EXPIRY_WORKER_ENABLED: bool = True
+    HOLD_EXPIRY_INTERVAL_SECONDS: int = 15  # Период освобождения просроченных блокировок мест
+    SEAT_INVENTORY_RECONCILE_ENABLED: bool = True
+    SEAT_INVENTORY_RECONCILE_SECONDS: int = 600  # Период сверки счётчиков занятых мест с бронированиями
+    ANNOUNCEMENT_FANOUT_ENABLED: bool = True
+    ANNOUNCEMENT_FANOUT_INTERVAL_SECONDS: int = 5  # Опрос очереди рассылок (сервисы будят воркер сразу)
+    ANNOUNCEMENT_FANOUT_BATCH_SIZE: int = 500  # Объявлений за одну транзакцию
+    ANNOUNCEMENT_FANOUT_MAX_ATTEMPTS: int = 5  # После стольких ошибок рассылка помечается FAILED
+    BOOKING_ALERTS_ENABLED: bool = True
+    BOOKING_ALERTS_INTERVAL_SECONDS: int = 60  # Максимальная пауза между проверками оповещений о вылете
+    DEPARTURE_ALERT_LEAD_MINUTES: int = 65  # За сколько минут до вылета приходит "Вылет скоро"
+    SQLITE_MAINTENANCE_ENABLED: bool = True  # Только для SQLite в файле с включённым профилем
+    SQLITE_CHECKPOINT_INTERVAL_SECONDS: int = 300  # Как часто переносить WAL в файл базы
+    SQLITE_CHECKPOINT_MODE: Literal["PASSIVE", "FULL", "RESTART", "TRUNCATE"] = "PASSIVE"  # PASSIVE не ждёт читателей
+    SQLITE_OPTIMIZE_INTERVAL_SECONDS: int = 3600  # Как часто запускать PRAGMA optimize
+    
+    # ─────────────────────────────────────────
+    # КЭШИ
+    # ─────────────────────────────────────────
+    SEAT_OCCUPANCY_TTL_SECONDS: int = 60  # Через сколько карта занятости мест перечитывается из БД
+    SEAT_MAP_FAST_RESPONSE: bool = False  # Карты мест отдаются готовым JSON из кэшированных фрагментов
+    FLIGHT_SEARCH_INDEX_TTL_SECONDS: int = 300  # Период сверки индекса поиска рейсов с БД
+    CONNECTION_GRAPH_TTL_SECONDS: int = 600  # Период полной перестройки графа рейсов для поиска стыковок
+    CONNECTION_MIN_MINUTES: int = 45  # Минимальное время стыковки по умолчанию
+    CONNECTION_MAX_MINUTES: int = 720  # Максимальное время стыковки по умолчанию
+    CONNECTION_MAX_LEGS: int = 3  # Максимум плеч в маршруте со стыковками
+    FARE_CALENDAR_MAX_DAYS: int = 62  # Максимальный диапазон календаря цен (дни)
+    
     @field_validator("SECRET_KEY")
     @classmethod
     def validate_secret_key(cls, v: str) -> str:
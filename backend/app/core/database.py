@@ -1,25 +1,158 @@
 # Импортируем необходимые модули SQLAlchemy
-from sqlalchemy import create_engine  # Для подключения к базе данных
+import threading
+import time
+
+from sqlalchemy import create_engine, inspect, text  # Для подключения к базе данных
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base  # Для создания базового класса моделей
 from sqlalchemy.orm import sessionmaker  # Для создания сессий (работы с базой данных)
+from sqlalchemy.pool import QueuePool
 from app.core.config import settings  # Импортируем объект настроек с параметрами из Settings
+from app.core.sqlite import install_query_only, install_sqlite_profile, is_file_sqlite
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool, который считает ожидание свободного соединения (checkout wait)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self._timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._stats_lock:
+                self._checkouts += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            checkouts, timeouts, wait_total, wait_max = self._checkouts, self._timeouts, self._wait_total, self._wait_max
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "in_use": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "wait_avg_ms": round(wait_total / checkouts * 1000, 3) if checkouts else 0.0,
+            "wait_max_ms": round(wait_max * 1000, 3),
+        }
+
+
+def create_db_engine(
+    url: str = settings.DATABASE_URL,
+    pool_size: int = settings.DB_POOL_SIZE,
+    max_overflow: int = settings.DB_MAX_OVERFLOW,
+    read_only: bool = False
+):
+    """
+    Единственная фабрика движков приложения: пул и его параметры — из Settings.
+    SQLite в памяти живёт в одном соединении, поэтому пул для неё не настраивается;
+    к SQLite в файле применяется профиль PRAGMA (app.core.sqlite).
+    read_only=True для SQLite включает query_only на каждом соединении.
+    """
+    connect_args = {}
+    pool_args = {}
+    if make_url(url).get_backend_name() == "sqlite":
+        # check_same_thread=False нужен для SQLite, чтобы разрешить работу из разных потоков
+        connect_args["check_same_thread"] = False
+    if make_url(url).get_backend_name() != "sqlite" or is_file_sqlite(url):
+        pool_args = dict(
+            poolclass=InstrumentedQueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+    db_engine = create_engine(url, connect_args=connect_args, echo=settings.DB_ECHO, **pool_args)
+    if settings.SQLITE_PROFILE_ENABLED and is_file_sqlite(url):
+        install_sqlite_profile(db_engine)
+    if read_only and make_url(url).get_backend_name() == "sqlite":
+        install_query_only(db_engine)
+    return db_engine
+
+
+def create_read_engine(primary):
+    """
+    Движок для чтения: реплика (READ_DATABASE_URL) или отдельный пул только
+    для чтения к тому же файлу SQLite. Иначе (БД в памяти, сервер без
+    реплики, READ_POOL_ENABLED=False) чтение идёт через основной движок.
+    """
+    if not settings.READ_POOL_ENABLED:
+        return primary
+    if settings.READ_DATABASE_URL:
+        url = settings.READ_DATABASE_URL
+    elif is_file_sqlite(settings.DATABASE_URL):
+        url = settings.DATABASE_URL
+    else:
+        return primary
+    return create_db_engine(
+        url, pool_size=settings.DB_READ_POOL_SIZE, max_overflow=settings.DB_READ_MAX_OVERFLOW, read_only=True
+    )
 
-# Создаём движок SQLAlchemy, который управляет подключением к базе данных
-# connect_args={"check_same_thread": False} нужен для SQLite, чтобы разрешить работу из разных потоков
-engine = create_engine(
-    settings.DATABASE_URL, connect_args={"check_same_thread": False}
-)
+
+# Создаём движок SQLAlchemy, который управляет подключением к базе данных.
+# Он один на процесс: его используют и legacy-роуты, и модули v1 (app.db.session), и воркеры
+engine = create_db_engine()
+# Отдельный пул для эндпоинтов, которые только читают (get_read_db): читатели не ждут соединений писателей
+read_engine = create_read_engine(engine)
 
 # Создаём класс для работы с сессиями базы данных
 # autocommit=False → изменения не сохраняются автоматически, нужно вызывать commit()
 # autoflush=False → изменения не отправляются автоматически при каждом действии
 # bind=engine → сессии будут работать через наш движок
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 # Создаём базовый класс для всех моделей базы данных
 # Все таблицы будут наследоваться от Base
 Base = declarative_base()
 
+# create_all не меняет уже существующие таблицы, поэтому новые колонки и индексы
+# моделей досоздаются при старте (NOT NULL у колонки — только при наличии server_default)
+def create_missing_columns():
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}'
+                if column.server_default is not None:
+                    ddl += f" NOT NULL DEFAULT {column.server_default.arg}" if not column.nullable else f" DEFAULT {column.server_default.arg}"
+                conn.execute(text(ddl))
+
+def create_missing_indexes():
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+def pool_stats(db_engine=engine) -> dict:
+    """Состояние пула соединений: размер, занятые, overflow, ожидание checkout."""
+    pool = db_engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        return pool.stats()
+    return {"status": pool.status()}
+
 # Функция для получения сессии базы данных
 # Часто используется как зависимость в FastAPI
 def get_db():
@@ -29,6 +162,10 @@ def get_db():
     finally:
         db.close()  # обязательно закрываем сессию после использования
 
-
-
-
+# То же для эндпоинтов только на чтение: сессия из пула read_engine, запись в ней — ошибка
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
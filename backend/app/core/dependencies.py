@@ -13,42 +13,64 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
 
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    """
-    Get current authenticated user from JWT token.
-    Raises 401 if token is invalid or user not found.
-    """
-    credentials_exception = HTTPException(
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+
+def get_token_user_id(token: str) -> int:
+    """
+    User ID from a JWT access token.
+    Raises 401 if the token is invalid.
+    """
     # Decode token
     payload = decode_access_token(token)
     if payload is None:
-        raise credentials_exception
+        raise credentials_exception()
     
     # Get user ID from token
     user_id_raw = payload.get("sub")
     if user_id_raw is None:
-        raise credentials_exception
+        raise credentials_exception()
     
     try:
-        user_id = int(user_id_raw)
+        return int(user_id_raw)
     except (ValueError, TypeError):
-        raise credentials_exception
+        raise credentials_exception()
+
+
+def _load_user(token: str, db: Session) -> User:
+    user_id = get_token_user_id(token)
         
     # Get user from database
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
-        raise credentials_exception
+        raise credentials_exception()
     
     return user
 
 
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+    """
+    Get current authenticated user from JWT token.
+    Raises 401 if token is invalid or user not found.
+    """
+    return _load_user(token, db)
+
+
+def get_current_user_read(token: str = Depends(oauth2_scheme), db: Session = Depends(get_read_db)) -> User:
+    """
+    get_current_user for read-only routes: the user is loaded through the read pool
+    (the same session as the route's get_read_db), so no write-pool connection is taken.
+    """
+    return _load_user(token, db)
+
+
 def get_current_passenger(current_user: User = Depends(get_current_user)) -> User:
     """
     Get current user and verify they can act as a passenger.
@@ -62,6 +84,11 @@ def get_current_passenger(current_user: User = Depends(get_current_user)) -> Use
     return current_user
 
 
+def get_current_passenger_read(current_user: User = Depends(get_current_user_read)) -> User:
+    """get_current_passenger for read-only routes (user loaded through the read pool)."""
+    return get_current_passenger(current_user)
+
+
 def get_current_staff(current_user: User = Depends(get_current_user)) -> User:
     """
     Get current user and verify they are staff.
@@ -74,3 +101,8 @@ def get_current_staff(current_user: User = Depends(get_current_user)) -> User:
             detail="Not enough permissions. Staff access required."
         )
     return current_user
+
+
+def get_current_staff_read(current_user: User = Depends(get_current_user_read)) -> User:
+    """get_current_staff for read-only routes (user loaded through the read pool)."""
+    return get_current_staff(current_user)
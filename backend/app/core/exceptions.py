@@ -184,3 +184,17 @@ class PaymentDeclined(PaymentError):
     """Платёж отклонён."""
     def __init__(self):
         super().__init__("Платёж отклонён банком. Проверьте данные карты.")
+
+
+# ─────────────────────────────────────────
+# Перегрузка (503)
+# ─────────────────────────────────────────
+
+class ServiceBusy(AppException):
+    """Очередь пула конкурентности переполнена или ожидание слота истекло."""
+    def __init__(self, detail: str = "Сервис перегружен, повторите запрос позже", retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail
+        )
+        self.headers = {"Retry-After": str(retry_after)}
@@ -0,0 +1,42 @@
+"""
+HTTP Cache.
+ETag и условные GET-запросы (If-None-Match -> 304 Not Modified).
+"""
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts) -> str:
+    """Слабый ETag из частей версии: W/"12-3"."""
+    return 'W/"%s"' % "-".join(str(p) for p in parts)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Проверяет If-None-Match (список тегов или "*"; сравнение слабое)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def conditional_response(request: Request, response: Response, etag: Optional[str]) -> Optional[Response]:
+    """
+    Ответ 304, если у клиента актуальная версия; иначе проставляет ETag
+    в response и возвращает None — обработчик строит ответ как обычно.
+    """
+    if etag is None:
+        return None
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
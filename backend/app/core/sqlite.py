@@ -0,0 +1,87 @@
+"""
+SQLite production profile.
+
+По умолчанию SQLite работает в режиме rollback journal: запись блокирует всю
+базу, и читатели ждут каждого UPDATE воркеров статусов и блокировок мест.
+Профиль включает WAL (читатели не ждут писателя), synchronous=NORMAL
+(в WAL безопасно при сбое процесса), busy timeout вместо мгновенного
+"database is locked", mmap и кэш страниц, временные таблицы в памяти и
+проверку внешних ключей. PRAGMA применяются к каждому новому соединению
+пула (событие connect); journal_mode=WAL хранится в самом файле базы.
+
+Периодические задачи (SqliteMaintenanceWorker): wal_checkpoint — чтобы WAL
+не рос при постоянных читателях, и PRAGMA optimize — обновление статистики
+планировщика.
+"""
+from typing import Dict, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine, make_url
+
+from app.core.config import settings
+
+MEGABYTE = 1024 * 1024
+
+
+def is_file_sqlite(url) -> bool:
+    """SQLite в файле (WAL и mmap не применимы к базе в памяти)."""
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def connection_pragmas() -> Dict[str, object]:
+    """PRAGMA, выполняемые на каждом новом соединении (порядок важен: journal_mode первым)."""
+    return {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        "mmap_size": settings.SQLITE_MMAP_SIZE_MB * MEGABYTE,
+        "cache_size": -settings.SQLITE_CACHE_SIZE_MB * 1024,  # отрицательное значение — в КиБ
+        "temp_store": "MEMORY",
+        "foreign_keys": "ON",
+    }
+
+
+def install_sqlite_profile(engine: Engine) -> None:
+    """Регистрирует применение PRAGMA на новых соединениях движка."""
+    pragmas = connection_pragmas()
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def install_query_only(engine: Engine) -> None:
+    """Соединения движка только читают: любая запись — ошибка "attempt to write a readonly database"."""
+
+    @event.listens_for(engine, "connect")
+    def _query_only(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA query_only=ON")
+        finally:
+            cursor.close()
+
+
+def wal_checkpoint(engine: Engine, mode: str = "PASSIVE") -> Optional[Dict[str, int]]:
+    """
+    Переносит WAL в основной файл. PASSIVE не ждёт читателей и писателей;
+    TRUNCATE дополнительно обнуляет файл WAL, но ждёт их (busy timeout).
+    """
+    with engine.connect() as connection:
+        row = connection.exec_driver_sql(f"PRAGMA wal_checkpoint({mode})").first()
+    if row is None:
+        return None
+    busy, log_frames, checkpointed = row
+    return {"busy": busy, "log_frames": log_frames, "checkpointed": checkpointed}
+
+
+def optimize(engine: Engine) -> None:
+    """PRAGMA optimize: ANALYZE только тех таблиц, где статистика устарела."""
+    with engine.connect() as connection:
+        connection.execute(text("PRAGMA optimize"))
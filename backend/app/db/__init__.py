@@ -2,6 +2,8 @@
 Database module.
 """
 from app.db.base import Base, TimestampMixin
-from app.db.session import get_db, engine, SessionLocal
+from app.db.session import get_db, get_read_db, engine, read_engine, SessionLocal, ReadSessionLocal
 
-__all__ = ["Base", "TimestampMixin", "get_db", "engine", "SessionLocal"]
+__all__ = [
+    "Base", "TimestampMixin", "get_db", "get_read_db", "engine", "read_engine", "SessionLocal", "ReadSessionLocal"
+]
@@ -0,0 +1,71 @@
+"""
+Async database sessions.
+Асинхронный путь чтения для горячих эндпоинтов (ASYNC_DB_ENABLED).
+
+Синхронный обработчик держит поток пула anyio всё время ввода-вывода БД,
+поэтому при всплесках опроса запросы ждут свободный поток при простаивающем
+CPU. Асинхронный движок ждёт БД в цикле событий. Драйвер выводится из URL
+чтения (sqlite -> aiosqlite, postgresql -> asyncpg) или задаётся
+ASYNC_DATABASE_URL; к SQLite применяются тот же профиль PRAGMA и query_only.
+
+Модуль импортируется только при включённой опции: sqlalchemy.ext.asyncio
+требует greenlet, а драйвер — aiosqlite/asyncpg.
+"""
+from typing import AsyncGenerator
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.core.sqlite import install_query_only, install_sqlite_profile, is_file_sqlite
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def async_database_url() -> str:
+    """ASYNC_DATABASE_URL или URL чтения (реплика / основная БД) с асинхронным драйвером."""
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    url = make_url(settings.READ_DATABASE_URL or settings.DATABASE_URL)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver for '{backend}': set ASYNC_DATABASE_URL")
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def create_async_db_engine(url: str):
+    """Движок только для чтения: пул — DB_READ_*, для SQLite в файле — профиль PRAGMA и query_only."""
+    if make_url(url).get_backend_name() == "sqlite" and not is_file_sqlite(url):
+        # У каждого соединения своя база в памяти — асинхронный пул её не увидит
+        raise RuntimeError("Async database path needs a file or server database")
+    db_engine = create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        pool_size=settings.DB_READ_POOL_SIZE,
+        max_overflow=settings.DB_READ_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    if make_url(url).get_backend_name() == "sqlite":
+        # PRAGMA выполняются на синхронном фасаде соединения (событие connect)
+        if settings.SQLITE_PROFILE_ENABLED:
+            install_sqlite_profile(db_engine.sync_engine)
+        install_query_only(db_engine.sync_engine)
+    return db_engine
+
+
+async_engine = create_async_db_engine(async_database_url())
+
+# expire_on_commit=False: объекты не перечитываются лениво (в async это ошибка MissingGreenlet)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency для асинхронной сессии чтения."""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -9,6 +9,15 @@ from app.domain.entities import UserEntity, BookingEntity, FlightEntity, UserRol
 from app.models.user import User, UserRole as UserModelRole
 from app.models.booking import Booking, BookingStatus as UserModelStatus
 from app.models.flight import Flight
+from app.services.seat_occupancy import seat_occupancy
+
+# Черновик бронирования (CREATED) в домене — ожидающее оплаты (PENDING)
+ENTITY_STATUSES = {
+    UserModelStatus.CREATED: BookingStatus.PENDING,
+    UserModelStatus.CONFIRMED: BookingStatus.CONFIRMED,
+    UserModelStatus.CANCELLED: BookingStatus.CANCELLED,
+}
+MODEL_STATUSES = {entity: model for model, entity in ENTITY_STATUSES.items()}
 
 class SqlAlchemyUserRepository(IUserRepository):
     def __init__(self, session: Session):
@@ -43,11 +52,17 @@ class SqlAlchemyUserRepository(IUserRepository):
 class SqlAlchemyBookingRepository(IBookingRepository):
     def __init__(self, session: Session):
         self.session = session
+        # Места, освобождённые в текущей транзакции (для карты занятости после commit)
+        self.released_seats: List[tuple] = []
 
     def get_by_id(self, booking_id: int) -> Optional[BookingEntity]:
         booking = self.session.query(Booking).filter(Booking.id == booking_id).first()
         return self._to_entity(booking) if booking else None
 
+    def get_by_pnr(self, pnr: str) -> List[BookingEntity]:
+        bookings = self.session.query(Booking).filter(Booking.pnr == pnr).all()
+        return [self._to_entity(b) for b in bookings]
+
     def get_by_flight(self, flight_id: int) -> List[BookingEntity]:
         bookings = self.session.query(Booking).filter(Booking.flight_id == flight_id).all()
         return [self._to_entity(b) for b in bookings]
@@ -59,16 +74,24 @@ class SqlAlchemyBookingRepository(IBookingRepository):
     def save(self, entity: BookingEntity) -> BookingEntity:
         booking = self.session.query(Booking).filter(Booking.id == entity.id).first()
         if booking:
-            booking.status = UserModelStatus[entity.status.name]
+            new_status = MODEL_STATUSES[entity.status]
+            if booking.status != new_status:
+                if booking.status == UserModelStatus.CONFIRMED:
+                    self.released_seats.append((booking.flight_id, booking.seat_number))
+                booking.status = new_status
+                self.session.query(Flight).filter(Flight.id == booking.flight_id).update(
+                    {Flight.version: Flight.version + 1}, synchronize_session=False
+                )
         return entity
 
     def _to_entity(self, model: Booking) -> BookingEntity:
         return BookingEntity(
             id=model.id,
+            pnr=model.pnr,
             passenger_id=model.passenger_id,
             flight_id=model.flight_id,
             seat_number=model.seat_number,
-            status=BookingStatus[model.status.name if hasattr(model.status, "name") else str(model.status)],
+            status=ENTITY_STATUSES[UserModelStatus(model.status)],
             total_price=float(model.price or 0)
         )
 
@@ -87,17 +110,36 @@ class SqlAlchemyUnitOfWork(IUnitOfWork):
     def __init__(self, session_factory):
         self.session_factory = session_factory
         self._session = None
+        self._users = None
+        self._bookings = None
+        self._flights = None
+
+    @property
+    def users(self) -> SqlAlchemyUserRepository: return self._users
+
+    @property
+    def bookings(self) -> SqlAlchemyBookingRepository: return self._bookings
+
+    @property
+    def flights(self) -> SqlAlchemyFlightRepository: return self._flights
 
     def __enter__(self):
         self._session = self.session_factory()
-        self.users = SqlAlchemyUserRepository(self._session)
-        self.bookings = SqlAlchemyBookingRepository(self._session)
-        self.flights = SqlAlchemyFlightRepository(self._session)
+        self._users = SqlAlchemyUserRepository(self._session)
+        self._bookings = SqlAlchemyBookingRepository(self._session)
+        self._flights = SqlAlchemyFlightRepository(self._session)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if exc_type: self.rollback()
         self._session.close()
 
-    def commit(self): self._session.commit()
-    def rollback(self): self._session.rollback()
+    def commit(self):
+        self._session.commit()
+        for flight_id, seat_number in self._bookings.released_seats:
+            seat_occupancy.release(flight_id, [seat_number])
+        self._bookings.released_seats.clear()
+
+    def rollback(self):
+        self._session.rollback()
+        self._bookings.released_seats.clear()
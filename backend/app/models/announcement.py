@@ -1,21 +1,89 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Enum as SQLEnum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
+from typing import Optional
+import enum
 from app.core.database import Base
 
 
 class Announcement(Base):
+    """
+    Broadcast (recipient_id is NULL): for passengers of flight_id, or for everyone without a flight.
+    Personal message (recipient_id set): only for that user.
+    """
     __tablename__ = "announcements"
 
     id = Column(Integer, primary_key=True, index=True)
     flight_id = Column(Integer, ForeignKey("flights.id"), index=True, nullable=True)
+    recipient_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     title = Column(String, nullable=False)
     message = Column(Text, nullable=False)
     created_by = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Ключ однократных оповещений ("departure-soon:<booking_id>"), у остальных NULL
+    dedup_key = Column(String, nullable=True)
+
+    __table_args__ = (
+        # Keyset-страницы ленты: (адресат | рейс, id DESC)
+        Index('ix_announcements_recipient_id_id', 'recipient_id', 'id'),
+        Index('ix_announcements_flight_recipient_id', 'flight_id', 'recipient_id', 'id'),
+        Index('ix_announcements_dedup_key', 'dedup_key', unique=True),
+    )
 
     # Relationships
     flight = relationship("Flight", back_populates="announcements")
 
 
+class AnnouncementCursor(Base):
+    """Read cursor of a user's inbox: everything up to last_read_id is read."""
+    __tablename__ = "announcement_cursors"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    last_read_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class FanoutStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    IN_PROGRESS = "IN_PROGRESS"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+
+class AnnouncementFanout(Base):
+    """
+    Outbox event: one personal announcement to be delivered to many passengers.
+    Written in the same transaction as the flight change, expanded by the fan-out worker.
+    """
+    __tablename__ = "announcement_fanouts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Без FK: событие переживает удаление рейса (закрытие аэропорта)
+    flight_id = Column(Integer, index=True, nullable=True)
+    # flight_id персональных объявлений (None — объявление переживёт удаление рейса)
+    announcement_flight_id = Column(Integer, nullable=True)
+    title = Column(String, nullable=False)
+    # Шаблон: {seat_number} подставляется по получателю
+    message = Column(Text, nullable=False)
+    # Снимок получателей на момент изменения: [[passenger_id, seat_number], ...]
+    recipients = Column(JSON, nullable=False, default=list)
+    total = Column(Integer, nullable=False, default=0)
+    delivered = Column(Integer, nullable=False, default=0)
+    status = Column(SQLEnum(FanoutStatus), default=FanoutStatus.PENDING, nullable=False, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+
+    @property
+    def progress(self) -> float:
+        """Доля доставленных объявлений (0..1)."""
+        return self.delivered / self.total if self.total else 1.0
 
+    @property
+    def duration_ms(self) -> Optional[float]:
+        """От записи события до доставки последней пачки."""
+        if self.completed_at is None or self.created_at is None:
+            return None
+        return round((self.completed_at - self.created_at).total_seconds() * 1000, 2)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Enum as SQLEnum, Boolean, UniqueConstraint, CheckConstraint, Date
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Enum as SQLEnum, Boolean, UniqueConstraint, CheckConstraint, Date, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -49,6 +49,8 @@ class Booking(Base):
     __table_args__ = (
         UniqueConstraint('flight_id', 'seat_number', name='_flight_seat_uc'),
         CheckConstraint('price >= 0', name='check_booking_price_positive'),
+        # Set-based reclaim of expired holds: (flight_id, seat_number) IN (...) AND status = CREATED
+        Index('ix_bookings_flight_seat_status', 'flight_id', 'seat_number', 'status'),
     )
 
 
@@ -70,6 +72,14 @@ class SeatHold(Base):
     )
 
 
+class PnrSequence(Base):
+    """Счётчик для выдачи PNR блоками (одна строка на последовательность)."""
+    __tablename__ = "pnr_sequence"
+
+    id = Column(Integer, primary_key=True)
+    next_value = Column(Integer, nullable=False, default=0)
+
+
 class Ticket(Base):
     __tablename__ = "tickets"
 
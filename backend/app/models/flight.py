@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Enum as SQLEnum, CheckConstraint
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Enum as SQLEnum, CheckConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -30,11 +30,17 @@ class Flight(Base):
     base_price = Column(Float, nullable=False)
     gate = Column(String, nullable=True)
     terminal = Column(String, default="A", nullable=False)
+    # Растёт при каждом изменении рейса или его мест (основа ETag)
+    version = Column(Integer, default=1, server_default="1", nullable=False)
+    # Занятые места: бронирования CONFIRMED + CREATED (см. services/seat_inventory)
+    seats_taken = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     __table_args__ = (
         CheckConstraint('base_price >= 0', name='check_base_price_positive'),
+        # Поиск по маршруту и дню вылета
+        Index('ix_flights_route_departure', 'origin_airport_id', 'destination_airport_id', 'scheduled_departure'),
     )
 
     # Relationships
@@ -79,17 +85,7 @@ class Flight(Base):
         total = self.total_seats
         if total <= 0:
             return 0
-        
-        try:
-            from app.models.booking import BookingStatus
-            # Считаем подтверждённые и ожидающие оплаты бронирования
-            # Используем генератор для эффективности и проверяем наличие атрибутов
-            occupied = sum(1 for b in self.bookings if b.status in [BookingStatus.CONFIRMED, BookingStatus.CREATED])
-            return max(0, total - occupied)
-        except Exception:
-            # Если возникла любая ошибка (например, DetachedInstanceError при ленивой загрузке),
-            # возвращаем общее число мест как запасной вариант.
-            return total
+        return max(0, total - (self.seats_taken or 0))
 
     @property
     def aircraft_type(self):
@@ -11,11 +11,39 @@ class TransactionStatus(str, enum.Enum):
     REFUNDED = "REFUNDED"
     PENDING = "PENDING"
 
+class Checkout(Base):
+    """One payment transaction of a checkout: a single authorization for all its seats."""
+    __tablename__ = "checkouts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    transaction_id = Column(String, unique=True, index=True, nullable=False)
+    passenger_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    flight_id = Column(Integer, ForeignKey("flights.id"), index=True, nullable=True)
+    pnr = Column(String, index=True, nullable=True)
+    amount = Column(Float, nullable=False)
+    currency = Column(String, default="RUB", nullable=False)
+    method = Column(SQLEnum(PaymentMethod), nullable=False)
+    status = Column(SQLEnum(TransactionStatus), default=TransactionStatus.SUCCESS, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        CheckConstraint('amount > 0', name='check_checkout_amount_positive'),
+    )
+
+    # Relationships
+    items = relationship("Payment", back_populates="checkout", order_by="Payment.id")
+    passenger = relationship("User", back_populates="checkouts")
+    flight = relationship("Flight")
+
+
 class Payment(Base):
+    """Line item of a checkout: the charge for one booking (seat)."""
     __tablename__ = "payments"
 
     id = Column(Integer, primary_key=True, index=True)
+    # Совпадает с Checkout.transaction_id (у старых строк — свой на каждое место)
     transaction_id = Column(String, index=True, nullable=False)
+    checkout_id = Column(Integer, ForeignKey("checkouts.id"), index=True, nullable=True)
     booking_id = Column(Integer, ForeignKey("bookings.id"), index=True, nullable=False)
     passenger_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
     amount = Column(Float, nullable=False)
@@ -31,6 +59,7 @@ class Payment(Base):
     # Relationships
     booking = relationship("Booking", back_populates="payment")
     passenger = relationship("User", back_populates="payments")
+    checkout = relationship("Checkout", back_populates="items")
 
     # Convenience properties for history display
     @property
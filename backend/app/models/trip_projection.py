@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, DateTime, Text
+from app.core.database import Base
+
+
+# Производные данные: без FK, перестраиваются из bookings (app/services/trip_projection.py)
+
+class TripProjection(Base):
+    """Pre-serialized "My Trips" entry of one booking as seen by one user."""
+    __tablename__ = "trip_projections"
+
+    user_id = Column(Integer, primary_key=True)
+    booking_id = Column(Integer, primary_key=True)
+    flight_id = Column(Integer, index=True, nullable=False)
+    # Черновик виден до конца блокировки места; у остальных NULL
+    visible_until = Column(DateTime, nullable=True)
+    # JSON поездки без flight/gate/terminal/history
+    payload = Column(Text, nullable=False)
+
+
+class TripProjectionState(Base):
+    """Projection freshness per user: rebuilt when built_generation != generation."""
+    __tablename__ = "trip_projection_states"
+
+    user_id = Column(Integer, primary_key=True)
+    generation = Column(Integer, nullable=False, default=0, server_default="0")
+    built_generation = Column(Integer, nullable=True)
+    built_at = Column(DateTime, nullable=True)
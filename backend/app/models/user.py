@@ -43,6 +43,7 @@ class User(Base):
     bookings = relationship("Booking", back_populates="passenger", cascade="all, delete-orphan")
     tickets = relationship("Ticket", back_populates="passenger", cascade="all, delete-orphan")
     payments = relationship("Payment", back_populates="passenger", cascade="all, delete-orphan")
+    checkouts = relationship("Checkout", back_populates="passenger", cascade="all, delete-orphan")
 
     # Note: SQLAlchemy handles __init__ automatically for columns
     # If we need dynamic full_name calculation, we can add a property, 
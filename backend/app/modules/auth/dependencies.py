@@ -6,7 +6,7 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.core.security import decode_access_token
 from app.models.user import User, UserRole
 
@@ -14,16 +14,7 @@ from app.models.user import User, UserRole
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/token")
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """
-    Получить текущего аутентифицированного пользователя.
-    
-    Raises:
-        HTTPException 401: Если токен невалиден
-    """
+def _load_user(token: str, db: Session) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Не удалось проверить учётные данные",
@@ -50,6 +41,27 @@ def get_current_user(
     return user
 
 
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    Получить текущего аутентифицированного пользователя.
+    
+    Raises:
+        HTTPException 401: Если токен невалиден
+    """
+    return _load_user(token, db)
+
+
+def get_current_user_read(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_read_db)
+) -> User:
+    """get_current_user для эндпоинтов чтения: пользователь читается через пул чтения."""
+    return _load_user(token, db)
+
+
 def get_current_active_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
@@ -67,6 +79,13 @@ def get_current_active_user(
     return current_user
 
 
+def get_current_active_user_read(
+    current_user: User = Depends(get_current_user_read)
+) -> User:
+    """get_current_active_user для эндпоинтов чтения (без соединения из пула записи)."""
+    return get_current_active_user(current_user)
+
+
 def get_current_staff(
     current_user: User = Depends(get_current_active_user)
 ) -> User:
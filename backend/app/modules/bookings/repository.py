@@ -99,10 +99,7 @@ class SeatHoldRepository:
         self.db.refresh(hold)
         return hold
     
-    def cleanup_expired(self) -> int:
-        """Удалить просроченные резервы."""
-        count = self.db.query(SeatHold).filter(
-            SeatHold.expires_at <= datetime.utcnow()
-        ).delete()
-        self.db.commit()
-        return count
+    def cleanup_expired(self, flight_id: Optional[int] = None) -> int:
+        """Удалить просроченные резервы вместе с их черновиками бронирований."""
+        from app.services.booking_service import cleanup_expired_holds
+        return cleanup_expired_holds(self.db, flight_id).holds_reclaimed
@@ -2,11 +2,17 @@
 Bookings Routes (Perfection Level 10/10).
 HTTP слой, делегирующий работу Use Cases из Application Layer.
 """
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from dataclasses import asdict
+
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.db.session import get_db, SessionLocal
+from app.core.config import settings
+from app.core.concurrency import limit_concurrency
+
+from app.db.session import get_db, SessionLocal, ReadSessionLocal
 from app.domain.interfaces import IUnitOfWork
 from app.infrastructure.unit_of_work import SqlAlchemyUnitOfWork
 from app.application.booking_use_cases import (
@@ -15,7 +21,7 @@ from app.application.booking_use_cases import (
     HoldSeatsUseCase, HoldSeatsRequest,
     GetSeatAvailabilityUseCase, GetSeatAvailabilityRequest
 )
-from app.modules.auth.dependencies import get_current_active_user
+from app.modules.auth.dependencies import get_current_active_user, get_current_active_user_read
 from app.models.user import User
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
@@ -24,23 +30,27 @@ router = APIRouter(prefix="/bookings", tags=["Bookings"])
 def get_uow() -> IUnitOfWork:
     return SqlAlchemyUnitOfWork(SessionLocal)
 
+def get_read_uow() -> IUnitOfWork:
+    """Unit of Work для сценариев только на чтение (пул read_engine)."""
+    return SqlAlchemyUnitOfWork(ReadSessionLocal)
+
 # 2. Use Case Factories (DI)
 def get_cancel_booking_use_case(uow: IUnitOfWork = Depends(get_uow)) -> CancelBookingUseCase:
     return CancelBookingUseCase(uow)
 
-def get_user_trips_use_case(uow: IUnitOfWork = Depends(get_uow)) -> GetUserTripsUseCase:
+def get_user_trips_use_case(uow: IUnitOfWork = Depends(get_read_uow)) -> GetUserTripsUseCase:
     return GetUserTripsUseCase(uow)
 
 def get_hold_seats_use_case(uow: IUnitOfWork = Depends(get_uow)) -> HoldSeatsUseCase:
     return HoldSeatsUseCase(uow)
 
-def get_seat_availability_use_case(uow: IUnitOfWork = Depends(get_uow)) -> GetSeatAvailabilityUseCase:
+def get_seat_availability_use_case(uow: IUnitOfWork = Depends(get_read_uow)) -> GetSeatAvailabilityUseCase:
     return GetSeatAvailabilityUseCase(uow)
 
 
-@router.get("/my-trips")
+@router.get("/my-trips", dependencies=[limit_concurrency("browse")])
 def get_my_trips(
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_active_user_read),
     use_case: GetUserTripsUseCase = Depends(get_user_trips_use_case)
 ):
     """[Clean Architecture] Получить мои поездки через Use Case."""
@@ -48,17 +58,22 @@ def get_my_trips(
     return use_case.execute(request)
 
 
-@router.get("/{flight_id}/seats")
+@router.get("/{flight_id}/seats", dependencies=[limit_concurrency("browse")])
 def get_seat_availability(
     flight_id: int,
     use_case: GetSeatAvailabilityUseCase = Depends(get_seat_availability_use_case)
 ):
     """[Clean Architecture] Получить доступность мест через Use Case."""
     request = GetSeatAvailabilityRequest(flight_id=flight_id)
-    return use_case.execute(request)
+    result = use_case.execute(request)
+    if settings.SEAT_MAP_FAST_RESPONSE:
+        # Тот же JSON, что и у JSONResponse, без прохода через jsonable_encoder
+        content = json.dumps(asdict(result), ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+        return Response(content=content.encode(), media_type="application/json")
+    return result
 
 
-@router.post("/{flight_id}/hold-seats")
+@router.post("/{flight_id}/hold-seats", dependencies=[limit_concurrency("checkout")])
 def hold_seats(
     flight_id: int,
     seat_numbers: List[str],
@@ -77,7 +92,7 @@ def hold_seats(
     return result
 
 
-@router.post("/{booking_id}/cancel")
+@router.post("/{booking_id}/cancel", dependencies=[limit_concurrency("checkout")])
 def cancel_booking(
     booking_id: int,
     current_user: User = Depends(get_current_active_user),
@@ -8,6 +8,7 @@ from datetime import datetime, timedelta
 from app.modules.bookings.repository import BookingRepository, SeatHoldRepository
 from app.models.booking import Booking, BookingStatus
 from app.core.exceptions import BookingNotFound, SeatNotAvailable, BookingNotAllowed
+from app.services.seat_occupancy import seat_occupancy
 
 
 class BookingService:
@@ -30,8 +31,6 @@ class BookingService:
     
     def get_seat_availability(self, flight_id: int) -> dict:
         """Получить информацию о занятости мест."""
-        self.hold_repo.cleanup_expired()
-        
         occupied = self.booking_repo.get_occupied_seats(flight_id)
         held = self.hold_repo.get_held_seats(flight_id)
         
@@ -42,7 +41,7 @@ class BookingService:
     
     def hold_seats(self, flight_id: int, seat_numbers: List[str], user_id: int) -> dict:
         """Временно зарезервировать места."""
-        self.hold_repo.cleanup_expired()
+        self.hold_repo.cleanup_expired(flight_id)
         
         occupied = self.booking_repo.get_occupied_seats(flight_id)
         held = self.hold_repo.get_held_seats(flight_id)
@@ -61,6 +60,7 @@ class BookingService:
                 "user_id": user_id,
                 "expires_at": expires_at,
             })
+        seat_occupancy.mark_held(flight_id, seat_numbers, expires_at)
         
         return {
             "seats": seat_numbers,
@@ -77,6 +77,9 @@ class BookingService:
         if booking.status == BookingStatus.CANCELLED:
             raise BookingNotAllowed("Бронирование уже отменено")
         
+        was_confirmed = booking.status == BookingStatus.CONFIRMED
         self.booking_repo.update_status(booking, BookingStatus.CANCELLED)
+        if was_confirmed:
+            seat_occupancy.release(booking.flight_id, [booking.seat_number])
         
         return {"success": True, "message": "Бронирование отменено"}
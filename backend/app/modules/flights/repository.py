@@ -2,14 +2,17 @@
 Flights Repository.
 Единственная точка доступа к БД для рейсов.
 """
-from typing import Optional, List
-from datetime import datetime, timedelta
+from typing import Optional, List, Tuple
+from datetime import date, datetime, timedelta
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_
+from sqlalchemy import or_
 
 from app.models.flight import Flight, FlightStatus
 from app.models.airport import Airport
 from app.models.aircraft import Aircraft
+from app.services.connection_search import Itinerary, connection_search
+from app.services.fare_calendar import build_fare_calendar
+from app.services.flight_search_index import flight_search_index
 
 
 class FlightRepository:
@@ -46,28 +49,51 @@ class FlightRepository:
         departure_date: datetime,
         cutoff_hours: int = 2
     ) -> List[Flight]:
-        """Поиск доступных рейсов."""
-        now = datetime.utcnow()
-        cutoff = now + timedelta(hours=cutoff_hours)
-        
-        start_of_day = departure_date.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_of_day = start_of_day + timedelta(days=1)
-        
-        actual_start = max(start_of_day, cutoff)
-        
-        return self.db.query(Flight).options(
-            joinedload(Flight.aircraft),
-            joinedload(Flight.origin_airport),
-            joinedload(Flight.destination_airport)
-        ).filter(
-            and_(
-                Flight.origin_airport_id == origin_id,
-                Flight.destination_airport_id == destination_id,
-                Flight.scheduled_departure >= actual_start,
-                Flight.scheduled_departure < end_of_day,
-                Flight.status != FlightStatus.CANCELLED
-            )
-        ).all()
+        """Поиск доступных рейсов (через индекс маршрут + день)."""
+        cutoff = datetime.utcnow() + timedelta(hours=cutoff_hours)
+        flight_ids = flight_search_index.find_ids(
+            self.db, departure_date.date(), frozenset([origin_id]), frozenset([destination_id]), not_before=cutoff
+        )
+        return flight_search_index.load_flights(self.db, flight_ids)
+    
+    def search_connections(
+        self,
+        origin_id: int,
+        destination_id: int,
+        departure_date: datetime,
+        max_legs: int,
+        min_connection: timedelta,
+        max_connection: timedelta,
+        sort_by: str,
+        limit: int,
+        cutoff_hours: int = 2
+    ) -> List[Tuple[Itinerary, List[Flight]]]:
+        """Маршруты со стыковками (через граф рейсов) вместе с рейсами плеч."""
+        cutoff = datetime.utcnow() + timedelta(hours=cutoff_hours)
+        itineraries = connection_search.search(
+            self.db, origin_id, destination_id, departure_date.date(), not_before=cutoff,
+            max_legs=max_legs, min_connection=min_connection, max_connection=max_connection,
+            sort_by=sort_by, limit=limit
+        )
+        flight_ids = list({leg.flight_id for itinerary in itineraries for leg in itinerary.legs})
+        flights = {f.id: f for f in flight_search_index.load_flights(self.db, flight_ids)}
+        return [
+            (itinerary, [flights[leg.flight_id] for leg in itinerary.legs])
+            for itinerary in itineraries
+            if all(leg.flight_id in flights for leg in itinerary.legs)
+        ]
+    
+    def fare_calendar(
+        self,
+        origin_id: int,
+        destination_id: int,
+        start_date: date,
+        end_date: date,
+        cutoff_hours: int = 2
+    ) -> List[dict]:
+        """Минимальные цены и свободные места маршрута по дням."""
+        cutoff = datetime.utcnow() + timedelta(hours=cutoff_hours)
+        return build_fare_calendar(self.db, origin_id, destination_id, start_date, end_date, not_before=cutoff)
     
     def create(self, data: dict) -> Flight:
         """Создать новый рейс."""
@@ -75,21 +101,29 @@ class FlightRepository:
         self.db.add(flight)
         self.db.commit()
         self.db.refresh(flight)
+        flight_search_index.invalidate_days(flight.scheduled_departure)
+        connection_search.upsert(flight)
         return flight
     
     def update(self, flight: Flight, data: dict) -> Flight:
         """Обновить рейс."""
+        old_departure = flight.scheduled_departure
         for key, value in data.items():
             if hasattr(flight, key) and value is not None:
                 setattr(flight, key, value)
         self.db.commit()
         self.db.refresh(flight)
+        flight_search_index.invalidate_days(old_departure, flight.scheduled_departure)
+        connection_search.upsert(flight)
         return flight
     
     def delete(self, flight: Flight) -> bool:
         """Удалить рейс."""
+        departure, flight_id = flight.scheduled_departure, flight.id
         self.db.delete(flight)
         self.db.commit()
+        flight_search_index.invalidate_days(departure)
+        connection_search.remove(flight_id)
         return True
 
 
@@ -117,4 +151,5 @@ class AirportRepository:
         self.db.add(airport)
         self.db.commit()
         self.db.refresh(airport)
+        flight_search_index.invalidate_airports()
         return airport
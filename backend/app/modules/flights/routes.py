@@ -5,19 +5,20 @@ HTTP слой для рейсов — только маршрутизация.
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from typing import List
-from datetime import datetime
+from datetime import date, datetime
 
-from app.db.session import get_db
+from app.core.concurrency import limit_concurrency
+from app.db.session import get_read_db
 from app.modules.flights.repository import FlightRepository, AirportRepository
 from app.modules.flights.service import FlightService
-from app.schemas.flight import Flight as FlightSchema, FlightDetail, FlightSearch
+from app.schemas.flight import Flight as FlightSchema, FlightDetail, FlightSearch, ConnectionSearch, Itinerary, FareCalendarDay
 from app.schemas.airport import Airport as AirportSchema
 
 
-router = APIRouter(prefix="/flights", tags=["Flights"])
+router = APIRouter(prefix="/flights", tags=["Flights"], dependencies=[limit_concurrency("browse")])
 
 
-def get_flight_service(db: Session = Depends(get_db)) -> FlightService:
+def get_flight_service(db: Session = Depends(get_read_db)) -> FlightService:
     """Dependency для получения FlightService."""
     return FlightService(FlightRepository(db), AirportRepository(db))
 
@@ -59,6 +60,27 @@ def search_flights(
     return [FlightSchema.model_validate(f) for f in flights]
 
 
+@router.post("/connections", response_model=List[Itinerary])
+def search_connections(
+    search_data: ConnectionSearch,
+    service: FlightService = Depends(get_flight_service)
+):
+    """Поиск маршрутов со стыковками."""
+    return service.search_connections(search_data)
+
+
+@router.get("/calendar", response_model=List[FareCalendarDay])
+def get_fare_calendar(
+    origin_code: str,
+    destination_code: str,
+    start_date: date,
+    end_date: date,
+    service: FlightService = Depends(get_flight_service)
+):
+    """Календарь минимальных цен по дням."""
+    return service.get_fare_calendar(origin_code, destination_code, start_date, end_date)
+
+
 @router.get("/{flight_id}", response_model=FlightDetail)
 def get_flight_details(
     flight_id: int,
@@ -3,12 +3,14 @@ Flights Service.
 Бизнес-логика управления рейсами.
 """
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 from app.modules.flights.repository import FlightRepository, AirportRepository
 from app.models.flight import Flight, FlightStatus
 from app.models.airport import Airport
-from app.core.exceptions import FlightNotFound, AirportNotFound, FlightConflict
+from app.core.config import settings
+from app.core.exceptions import FlightNotFound, AirportNotFound, FlightConflict, ValidationError
+from app.schemas.flight import ConnectionSearch, FareCalendarDay, Flight as FlightSchema, Itinerary as ItinerarySchema
 
 
 class FlightService:
@@ -20,12 +22,10 @@ class FlightService:
     
     def get_all_flights(self) -> List[Flight]:
         """Получить все рейсы."""
-        self._update_statuses()
         return self.flight_repo.get_all()
     
     def get_flight(self, flight_id: int) -> Flight:
         """Получить рейс по ID."""
-        self._update_statuses()
         flight = self.flight_repo.get_by_id(flight_id)
         if not flight:
             raise FlightNotFound()
@@ -46,44 +46,71 @@ class FlightService:
         if not destination:
             raise AirportNotFound()
         
-        self._update_statuses()
         return self.flight_repo.search(origin.id, destination.id, departure_date)
     
+    def search_connections(self, search: ConnectionSearch) -> List[ItinerarySchema]:
+        """Поиск маршрутов со стыковками (до search.max_legs плеч)."""
+        if search.max_legs > settings.CONNECTION_MAX_LEGS:
+            raise ValidationError(f"Не более {settings.CONNECTION_MAX_LEGS} плеч в маршруте")
+        min_minutes = settings.CONNECTION_MIN_MINUTES if search.min_connection_minutes is None else search.min_connection_minutes
+        max_minutes = settings.CONNECTION_MAX_MINUTES if search.max_connection_minutes is None else search.max_connection_minutes
+        if min_minutes > max_minutes:
+            raise ValidationError("Минимальное время стыковки больше максимального")
+        
+        origin = self.airport_repo.get_by_code(search.origin_code)
+        if not origin:
+            raise AirportNotFound()
+        
+        destination = self.airport_repo.get_by_code(search.destination_code)
+        if not destination:
+            raise AirportNotFound()
+        
+        found = self.flight_repo.search_connections(
+            origin.id, destination.id, search.departure_date, search.max_legs,
+            timedelta(minutes=min_minutes), timedelta(minutes=max_minutes),
+            search.sort_by, search.limit
+        )
+        return [
+            ItinerarySchema(
+                legs=[FlightSchema.model_validate(f) for f in flights],
+                departure_time=flights[0].scheduled_departure,
+                arrival_time=flights[-1].scheduled_arrival,
+                duration_minutes=int(itinerary.duration // 60),
+                connections=len(flights) - 1,
+                layover_minutes=[int(seconds // 60) for seconds in itinerary.layovers],
+                total_price=itinerary.price
+            )
+            for itinerary, flights in found
+        ]
+    
+    def get_fare_calendar(
+        self,
+        origin_code: str,
+        destination_code: str,
+        start_date: date,
+        end_date: date
+    ) -> List[FareCalendarDay]:
+        """Календарь минимальных цен маршрута по дням."""
+        if end_date < start_date:
+            raise ValidationError("Дата окончания раньше даты начала")
+        if (end_date - start_date).days + 1 > settings.FARE_CALENDAR_MAX_DAYS:
+            raise ValidationError(f"Диапазон календаря — не более {settings.FARE_CALENDAR_MAX_DAYS} дней")
+        
+        origin = self.airport_repo.get_by_code(origin_code)
+        if not origin:
+            raise AirportNotFound()
+        
+        destination = self.airport_repo.get_by_code(destination_code)
+        if not destination:
+            raise AirportNotFound()
+        
+        days = self.flight_repo.fare_calendar(origin.id, destination.id, start_date, end_date)
+        return [FareCalendarDay(**day) for day in days]
+    
     def get_flights_by_status(self, statuses: List[FlightStatus]) -> List[Flight]:
         """Получить рейсы по статусам."""
-        self._update_statuses()
         return self.flight_repo.get_by_status(statuses)
     
     def get_all_airports(self) -> List[Airport]:
         """Получить все аэропорты."""
         return self.airport_repo.get_all()
-    
-    def _update_statuses(self) -> None:
-        """
-        Обновление статусов рейсов на основе текущего времени.
-        SCHEDULED -> BOARDING (за 2ч) -> DEPARTED (в время вылета) -> ARRIVED (в время прибытия)
-        """
-        now = datetime.utcnow()
-        
-        flights = self.flight_repo.db.query(Flight).filter(
-            Flight.status.in_([
-                FlightStatus.SCHEDULED,
-                FlightStatus.BOARDING,
-                FlightStatus.DEPARTED
-            ])
-        ).all()
-        
-        for flight in flights:
-            new_status = None
-            
-            if flight.scheduled_arrival and now >= flight.scheduled_arrival:
-                new_status = FlightStatus.ARRIVED
-            elif now >= flight.scheduled_departure:
-                new_status = FlightStatus.DEPARTED
-            elif now >= flight.scheduled_departure - timedelta(hours=2):
-                new_status = FlightStatus.BOARDING
-            
-            if new_status and flight.status != new_status:
-                flight.status = new_status
-        
-        self.flight_repo.db.commit()
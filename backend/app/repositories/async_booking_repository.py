@@ -0,0 +1,42 @@
+"""
+Асинхронный репозиторий бронирований.
+Горячие чтения пассажира для async-эндпоинтов (ASYNC_DB_ENABLED): поездки и объявления.
+"""
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import User
+from app.schemas.announcement import Announcement as AnnouncementSchema
+from app.schemas.flight import Trip
+from app.services import announcement_service, booking_service, trip_projection
+
+
+class AsyncBookingRepository:
+    """Репозиторий бронирований поверх AsyncSession (синхронные сервисы — через run_sync)."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_trips_json(self, user_id: int, include_history: bool = True) -> Optional[str]:
+        """
+        Поездки из проекции готовым JSON; None, если проекция устарела
+        (перестройка пишет — её делает вызывающий через сессию записи).
+        """
+        def read(db) -> Optional[str]:
+            if not trip_projection.is_fresh(db, user_id):
+                return None
+            return trip_projection.read_trips_json(db, user_id, include_history)
+
+        return await self.db.run_sync(read)
+
+    async def get_user_trips(self, user: User, include_history: bool = True) -> List[Trip]:
+        """Поездки сборкой на запрос (без проекции)."""
+        return await self.db.run_sync(booking_service.get_user_trips, user, include_history)
+
+    async def get_announcements(self, user: User) -> List[AnnouncementSchema]:
+        """Лента объявлений пользователя."""
+        def read(db) -> List[AnnouncementSchema]:
+            return [AnnouncementSchema.model_validate(a) for a in announcement_service.get_user_announcements(db, user)]
+
+        return await self.db.run_sync(read)
@@ -0,0 +1,55 @@
+"""
+Асинхронный репозиторий рейсов.
+Горячие чтения рейсов для async-эндпоинтов (ASYNC_DB_ENABLED).
+"""
+from datetime import datetime
+from typing import List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.airport import Airport
+from app.schemas.airport import Airport as AirportSchema
+from app.schemas.flight import Flight as FlightSchema
+from app.schemas.seat import SeatMap
+from app.services import flight_service
+
+
+class AsyncFlightRepository:
+    """
+    Репозиторий рейсов поверх AsyncSession.
+
+    Простые выборки — нативные асинхронные запросы. Чтения через процессные
+    кэши (индекс поиска, занятость мест) переиспользуют синхронные сервисы
+    через run_sync: их запросы идут тем же асинхронным соединением, поток
+    пула не занимается. Результат возвращается схемами — ленивые загрузки
+    после выхода из run_sync в async недоступны.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_airports(self) -> List[AirportSchema]:
+        """Все аэропорты."""
+        airports = (await self.db.execute(select(Airport))).scalars().all()
+        return [AirportSchema.model_validate(a) for a in airports]
+
+    async def search(self, origin_code: str, destination_code: str, departure_date: datetime) -> List[FlightSchema]:
+        """Поиск рейсов по маршруту и дате (индекс поиска)."""
+        def search(db) -> List[FlightSchema]:
+            flights = flight_service.search_flights(db, origin_code, destination_code, departure_date)
+            return [FlightSchema.model_validate(f) for f in flights]
+
+        return await self.db.run_sync(search)
+
+    async def get_version(self, flight_id: int) -> int:
+        """Версия рейса для ETag (404, если рейса нет)."""
+        return await self.db.run_sync(flight_service.get_flight_version, flight_id)
+
+    async def get_seat_map(self, flight_id: int) -> SeatMap:
+        """Карта мест пассажира."""
+        return await self.db.run_sync(flight_service.get_flight_seat_map, flight_id)
+
+    async def encode_seat_map(self, flight_id: int) -> Tuple[bytes, dict]:
+        """Карта мест пассажира готовым JSON + счётчики мест."""
+        return await self.db.run_sync(flight_service.encode_flight_seat_map, flight_id)
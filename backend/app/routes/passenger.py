@@ -1,93 +1,132 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.dependencies import get_current_passenger
+from app.core.config import settings
+from app.core.concurrency import limit_concurrency
+from app.core.database import get_db, get_read_db
+from app.core.http_cache import conditional_response
+from app.core.dependencies import get_current_passenger, get_current_passenger_read
 from app.models.user import User
 from app.schemas.seat import SeatMap, BookWithPassengersRequest, BookSeatsResponse, SeatHoldRequest, SeatHoldResponse
 from app.schemas.user import UserProfile, UserUpdate
 from app.schemas.flight import Flight, FlightDetail, FlightSearch, Trip, CheckInRequest, CheckInResponse
 from app.schemas.airport import Airport
-from app.schemas.announcement import Announcement
+from app.schemas.announcement import Announcement, AnnouncementPage, InboxCursor, InboxPage, InboxRead
 from app.schemas.payment import PaymentTransaction
-from app.services import flight_service, booking_service, announcement_service, user_service
+from app.services import flight_service, booking_service, announcement_service, user_service, trip_projection
 
 router = APIRouter(prefix="/passenger", tags=["Passenger"])
 
 # ===================== PUBLIC ENDPOINTS =====================
 
-@router.get("/flights/public", response_model=List[Flight], tags=["Passenger - Search & Flights"])
-def get_flights_public(from_city: str = None, to_city: str = None, date: str = None, db: Session = Depends(get_db)):
+@router.get("/flights/public", response_model=List[Flight], tags=["Passenger - Search & Flights"], dependencies=[limit_concurrency("browse")])
+def get_flights_public(request: Request, response: Response, from_city: str = None, to_city: str = None, date: str = None, db: Session = Depends(get_read_db)):
     """Публичный список рейсов (доступен без логина)"""
+    not_modified = conditional_response(request, response, flight_service.get_flights_list_etag(db, date))
+    if not_modified: return not_modified
     return [Flight.model_validate(f) for f in flight_service.filter_flights(db, from_city, to_city, date)]
 
-@router.get("/public/flight/{flight_id}", response_model=Flight, tags=["Passenger - Search & Flights"])
-def get_flight_details_public(flight_id: int, db: Session = Depends(get_db)):
+@router.get("/public/flight/{flight_id}", response_model=Flight, tags=["Passenger - Search & Flights"], dependencies=[limit_concurrency("browse")])
+def get_flight_details_public(flight_id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
     """Публичные детали рейса"""
+    not_modified = conditional_response(request, response, flight_service.get_flight_etag(db, flight_id))
+    if not_modified: return not_modified
     return Flight.model_validate(flight_service.get_flight_by_id(db, flight_id))
 
-@router.get("/airports", response_model=List[Airport], tags=["Passenger - Search & Flights"])
-def get_airports(db: Session = Depends(get_db)):
+@router.get("/airports", response_model=List[Airport], tags=["Passenger - Search & Flights"], dependencies=[limit_concurrency("browse")])
+def get_airports(db: Session = Depends(get_read_db)):
     """Публичный список аэропортов"""
     return [Airport.model_validate(a) for a in flight_service.get_airports(db)]
 
 # ===================== PROTECTED ENDPOINTS =====================
 
-@router.get("/flights", response_model=List[Flight], tags=["Passenger - Search & Flights"])
-def get_flights(from_city: str = None, to_city: str = None, date: str = None, current_user: User = Depends(get_current_passenger), db: Session = Depends(get_db)):
+@router.get("/flights", response_model=List[Flight], tags=["Passenger - Search & Flights"], dependencies=[limit_concurrency("browse")])
+def get_flights(request: Request, response: Response, from_city: str = None, to_city: str = None, date: str = None, current_user: User = Depends(get_current_passenger_read), db: Session = Depends(get_read_db)):
     """Список рейсов для авторизованных пользователей"""
+    not_modified = conditional_response(request, response, flight_service.get_flights_list_etag(db, date))
+    if not_modified: return not_modified
     return [Flight.model_validate(f) for f in flight_service.filter_flights(db, from_city, to_city, date)]
 
-@router.get("/flights/{flight_id}", response_model=FlightDetail, tags=["Passenger - Search & Flights"])
-def get_flight_details(flight_id: int, current_user: User = Depends(get_current_passenger), db: Session = Depends(get_db)):
+@router.get("/flights/{flight_id}", response_model=FlightDetail, tags=["Passenger - Search & Flights"], dependencies=[limit_concurrency("browse")])
+def get_flight_details(flight_id: int, request: Request, response: Response, current_user: User = Depends(get_current_passenger_read), db: Session = Depends(get_read_db)):
     """Детали рейса (защищенный)"""
+    not_modified = conditional_response(request, response, flight_service.get_flight_etag(db, flight_id))
+    if not_modified: return not_modified
     return FlightDetail.model_validate(flight_service.get_flight_by_id(db, flight_id))
 
-@router.get("/flights/{flight_id}/seats", response_model=SeatMap, tags=["Passenger - Booking Flow"])
-def get_flight_seats(flight_id: int, current_user: User = Depends(get_current_passenger), db: Session = Depends(get_db)):
+@router.get("/flights/{flight_id}/seats", response_model=SeatMap, tags=["Passenger - Booking Flow"], dependencies=[limit_concurrency("browse")])
+def get_flight_seats(flight_id: int, request: Request, response: Response, current_user: User = Depends(get_current_passenger_read), db: Session = Depends(get_read_db)):
     """Карта мест (выбор мест)"""
-    return flight_service.get_flight_seat_map(db, flight_id)
-
-@router.post("/flights/{flight_id}/hold-seats", response_model=SeatHoldResponse, tags=["Passenger - Booking Flow"])
+    version = flight_service.get_flight_version(db, flight_id)
+    not_modified = conditional_response(request, response, flight_service.get_seat_map_etag(flight_id, version))
+    if not_modified: return not_modified
+    if settings.SEAT_MAP_FAST_RESPONSE:
+        content, counts = flight_service.encode_flight_seat_map(db, flight_id)
+        etag = flight_service.get_seat_map_etag(flight_id, version, counts["reserved"])
+        return Response(content=content, media_type="application/json", headers={"ETag": etag})
+    seat_map = flight_service.get_flight_seat_map(db, flight_id)
+    reserved = seat_map.total_seats - seat_map.available_seats - seat_map.occupied_seats
+    response.headers["ETag"] = flight_service.get_seat_map_etag(flight_id, version, reserved)
+    return seat_map
+
+@router.post("/flights/{flight_id}/hold-seats", response_model=SeatHoldResponse, tags=["Passenger - Booking Flow"], dependencies=[limit_concurrency("checkout")])
 def hold_seats(flight_id: int, request: SeatHoldRequest, current_user: User = Depends(get_current_passenger), db: Session = Depends(get_db)):
     """Зарезервировать места (на 10 минут)"""
     return booking_service.hold_seats(db, flight_id, request, current_user.id)
 
-@router.post("/flights/{flight_id}/book-with-passengers", response_model=BookSeatsResponse, tags=["Passenger - Booking Flow"])
+@router.post("/flights/{flight_id}/book-with-passengers", response_model=BookSeatsResponse, tags=["Passenger - Booking Flow"], dependencies=[limit_concurrency("checkout")])
 def book_seats_with_passengers(flight_id: int, request: BookWithPassengersRequest, current_user: User = Depends(get_current_passenger), db: Session = Depends(get_db)):
     """Подтвердить бронирование с данными пассажиров"""
     return booking_service.create_bookings_with_passengers(db, flight_id, request, current_user.id)
 
-@router.get("/profile/trips", response_model=List[Trip], tags=["Passenger - My Trips & Tickets"])
-def get_my_trips(current_user: User = Depends(get_current_passenger), db: Session = Depends(get_db)):
-    """Список моих поездок (включая попутчиков)"""
-    return booking_service.get_user_trips(db, current_user)
-
-@router.get("/payments", response_model=List[PaymentTransaction], tags=["Passenger - Account & Profile"])
-def get_payment_history(current_user: User = Depends(get_current_passenger), db: Session = Depends(get_db)):
+@router.get("/profile/trips", response_model=List[Trip], tags=["Passenger - My Trips & Tickets"], dependencies=[limit_concurrency("browse")])
+def get_my_trips(include_history: bool = True, current_user: User = Depends(get_current_passenger_read), db: Session = Depends(get_db), read_db: Session = Depends(get_read_db)):
+    """Список моих поездок (включая попутчиков); include_history=false — история отдельно, постранично"""
+    if settings.TRIP_PROJECTION_ENABLED:
+        # Запись (db) — только при перестройке устаревшей проекции
+        return Response(content=trip_projection.get_trips_json(db, current_user, include_history, read_db), media_type="application/json")
+    return booking_service.get_user_trips(read_db, current_user, include_history)
+
+@router.get("/profile/trips/{booking_id}/history", response_model=AnnouncementPage, tags=["Passenger - My Trips & Tickets"], dependencies=[limit_concurrency("browse")])
+def get_trip_history(booking_id: int, before_id: Optional[int] = None, limit: int = settings.INBOX_PAGE_SIZE, current_user: User = Depends(get_current_passenger_read), db: Session = Depends(get_read_db)):
+    """История поездки постранично (новые первыми)"""
+    return booking_service.get_trip_history(db, current_user, booking_id, before_id, limit)
+
+@router.get("/payments", response_model=List[PaymentTransaction], tags=["Passenger - Account & Profile"], dependencies=[limit_concurrency("browse")])
+def get_payment_history(current_user: User = Depends(get_current_passenger_read), db: Session = Depends(get_read_db)):
     """История транзакций пассажира"""
     payments = booking_service.get_user_payments(db, current_user.id)
     return [PaymentTransaction(**g) for g in payments]
 
-@router.post("/flights/search", response_model=List[Flight], tags=["Passenger - Search & Flights"])
-def search_flights(search_data: FlightSearch, db: Session = Depends(get_db)):
+@router.post("/flights/search", response_model=List[Flight], tags=["Passenger - Search & Flights"], dependencies=[limit_concurrency("browse")])
+def search_flights(search_data: FlightSearch, db: Session = Depends(get_read_db)):
     """Поиск рейсов"""
     flights = flight_service.search_flights(db, search_data.origin_code, search_data.destination_code, search_data.departure_date)
     return [Flight.model_validate(f) for f in flights]
 
-@router.get("/announcements", response_model=List[Announcement], tags=["Passenger - Notifications"])
-def get_announcements(current_user: User = Depends(get_current_passenger), db: Session = Depends(get_db)):
+@router.get("/announcements", response_model=List[Announcement], tags=["Passenger - Notifications"], dependencies=[limit_concurrency("browse")])
+def get_announcements(current_user: User = Depends(get_current_passenger_read), db: Session = Depends(get_read_db)):
     """Список объявлений и уведомлений"""
     announcements = announcement_service.get_user_announcements(db, current_user)
     return [Announcement.model_validate(a) for a in announcements]
 
-@router.post("/check-in", response_model=CheckInResponse, tags=["Passenger - My Trips & Tickets"])
+@router.get("/inbox", response_model=InboxPage, tags=["Passenger - Notifications"], dependencies=[limit_concurrency("browse")])
+def get_inbox(before_id: Optional[int] = None, limit: int = settings.INBOX_PAGE_SIZE, current_user: User = Depends(get_current_passenger_read), db: Session = Depends(get_read_db)):
+    """Лента уведомлений постранично (новые первыми) со счётчиком непрочитанных"""
+    return announcement_service.get_inbox_page(db, current_user.id, before_id, limit)
+
+@router.post("/inbox/read", response_model=InboxCursor, tags=["Passenger - Notifications"])
+def mark_inbox_read(data: InboxRead, current_user: User = Depends(get_current_passenger), db: Session = Depends(get_db)):
+    """Отметить прочитанным всё до last_read_id включительно"""
+    return announcement_service.mark_inbox_read(db, current_user.id, data.last_read_id)
+
+@router.post("/check-in", response_model=CheckInResponse, tags=["Passenger - My Trips & Tickets"], dependencies=[limit_concurrency("checkout")])
 def check_in(request: CheckInRequest, current_user: User = Depends(get_current_passenger), db: Session = Depends(get_db)):
     """Пройти онлайн-регистрацию"""
     res = booking_service.check_in(db, request.ticket_id, current_user.id)
     return CheckInResponse(success=True, message="Регистрация прошла успешно", boarding_pass=res["boarding_pass"])
 
-@router.post("/bookings/{booking_id}/cancel", response_model=dict, tags=["Passenger - My Trips & Tickets"])
+@router.post("/bookings/{booking_id}/cancel", response_model=dict, tags=["Passenger - My Trips & Tickets"], dependencies=[limit_concurrency("checkout")])
 def cancel_booking(booking_id: int, current_user: User = Depends(get_current_passenger), db: Session = Depends(get_db)):
     """Отмена бронирования (возврат места)"""
     return booking_service.cancel_booking_full(db, booking_id, current_user.id)
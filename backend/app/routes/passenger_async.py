@@ -0,0 +1,85 @@
+"""
+Async-варианты горячих эндпоинтов пассажира (ASYNC_DB_ENABLED).
+
+Те же пути и ответы, что в passenger.py; роутер подключается раньше него и
+перекрывает синхронные версии. Ввод-вывод БД ожидается в цикле событий
+(app.db.async_session), поток пула anyio занимает только перестройка
+устаревшей проекции поездок — она пишет через синхронную сессию.
+"""
+from typing import List
+
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.dependencies import credentials_exception, get_current_passenger, get_token_user_id, oauth2_scheme
+from app.core.http_cache import conditional_response
+from app.db.async_session import get_async_db
+from app.models.user import User
+from app.repositories.async_booking_repository import AsyncBookingRepository
+from app.repositories.async_flight_repository import AsyncFlightRepository
+from app.schemas.airport import Airport
+from app.schemas.announcement import Announcement
+from app.schemas.flight import Flight, FlightSearch, Trip
+from app.schemas.seat import SeatMap
+from app.services import flight_service, trip_projection
+
+router = APIRouter(prefix="/passenger", tags=["Passenger"])
+
+
+async def get_current_passenger_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> User:
+    """get_current_passenger через асинхронную сессию."""
+    user = await db.get(User, get_token_user_id(token))
+    if user is None:
+        raise credentials_exception()
+    return get_current_passenger(user)
+
+
+def _rebuild_trips_json(user_id: int, include_history: bool) -> str:
+    with SessionLocal() as db:
+        return trip_projection.get_trips_json(db, db.get(User, user_id), include_history)
+
+
+@router.get("/airports", response_model=List[Airport], tags=["Passenger - Search & Flights"])
+async def get_airports(db: AsyncSession = Depends(get_async_db)):
+    """Публичный список аэропортов"""
+    return await AsyncFlightRepository(db).get_airports()
+
+@router.post("/flights/search", response_model=List[Flight], tags=["Passenger - Search & Flights"])
+async def search_flights(search_data: FlightSearch, db: AsyncSession = Depends(get_async_db)):
+    """Поиск рейсов"""
+    return await AsyncFlightRepository(db).search(search_data.origin_code, search_data.destination_code, search_data.departure_date)
+
+@router.get("/flights/{flight_id}/seats", response_model=SeatMap, tags=["Passenger - Booking Flow"])
+async def get_flight_seats(flight_id: int, request: Request, response: Response, current_user: User = Depends(get_current_passenger_async), db: AsyncSession = Depends(get_async_db)):
+    """Карта мест (выбор мест)"""
+    flights = AsyncFlightRepository(db)
+    version = await flights.get_version(flight_id)
+    not_modified = conditional_response(request, response, flight_service.get_seat_map_etag(flight_id, version))
+    if not_modified: return not_modified
+    if settings.SEAT_MAP_FAST_RESPONSE:
+        content, counts = await flights.encode_seat_map(flight_id)
+        etag = flight_service.get_seat_map_etag(flight_id, version, counts["reserved"])
+        return Response(content=content, media_type="application/json", headers={"ETag": etag})
+    seat_map = await flights.get_seat_map(flight_id)
+    reserved = seat_map.total_seats - seat_map.available_seats - seat_map.occupied_seats
+    response.headers["ETag"] = flight_service.get_seat_map_etag(flight_id, version, reserved)
+    return seat_map
+
+@router.get("/profile/trips", response_model=List[Trip], tags=["Passenger - My Trips & Tickets"])
+async def get_my_trips(include_history: bool = True, current_user: User = Depends(get_current_passenger_async), db: AsyncSession = Depends(get_async_db)):
+    """Список моих поездок (включая попутчиков); include_history=false — история отдельно, постранично"""
+    bookings = AsyncBookingRepository(db)
+    if settings.TRIP_PROJECTION_ENABLED:
+        content = await bookings.get_trips_json(current_user.id, include_history)
+        if content is None:
+            content = await run_in_threadpool(_rebuild_trips_json, current_user.id, include_history)
+        return Response(content=content, media_type="application/json")
+    return await bookings.get_user_trips(current_user, include_history)
+
+@router.get("/announcements", response_model=List[Announcement], tags=["Passenger - Notifications"])
+async def get_announcements(current_user: User = Depends(get_current_passenger_async), db: AsyncSession = Depends(get_async_db)):
+    """Список объявлений и уведомлений"""
+    return await AsyncBookingRepository(db).get_announcements(current_user)
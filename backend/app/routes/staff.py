@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from pydantic import BaseModel
 from sqlalchemy.orm import Session, selectinload, joinedload
 from typing import List, Optional
 
-from app.core.database import get_db
-from app.core.dependencies import get_current_staff
+from app.core.config import settings
+from app.core.concurrency import limit_concurrency
+from app.core.database import get_db, get_read_db
+from app.core.http_cache import conditional_response
+from app.core.dependencies import get_current_staff, get_current_staff_read
 from app.models.user import User
 from app.models.aircraft import Aircraft as AircraftModel
 from app.models.flight import Flight as FlightModel, FlightStatus
@@ -15,15 +18,17 @@ from app.schemas.airport import Airport, AirportCreate, AirportDetail
 from app.schemas.aircraft import Aircraft, AircraftCreate, SeatTemplate, SeatTemplateCreate, AircraftDetail
 from app.schemas.flight import Flight, FlightCreate, FlightUpdate
 from app.schemas.booking import Booking, SeatConflict
-from app.schemas.announcement import Announcement, AnnouncementCreate
-from app.schemas.seat import StaffSeatMap
+from app.schemas.announcement import Announcement, AnnouncementCreate, AnnouncementFanout
+from app.schemas.seat import StaffSeatMap, HoldReclaimReport, SeatInventoryReport
 from app.schemas.payment import StaffPayment
 from app.schemas.user import UserProfile
 from app.services import (
     aircraft_service,
     flight_service,
+    announcement_fanout,
     announcement_service,
     booking_service,
+    seat_inventory,
     user_service
 )
 
@@ -32,7 +37,7 @@ router = APIRouter(prefix="/staff", tags=["Staff"])
 # ===================== АЭРОПОРТЫ =====================
 
 @router.get("/airports", response_model=List[Airport], tags=["Staff - Airports"])
-def list_airports(db: Session = Depends(get_db)):
+def list_airports(db: Session = Depends(get_read_db)):
     """Список аэропортов"""
     return flight_service.get_airports(db)
 
@@ -42,7 +47,7 @@ def create_airport(airport_data: AirportCreate, current_user: User = Depends(get
     return flight_service.create_airport(db, airport_data)
 
 @router.get("/airports/{airport_id}", response_model=AirportDetail, tags=["Staff - Airports"])
-def get_airport_detail(airport_id: int, current_user: User = Depends(get_current_staff), db: Session = Depends(get_db)):
+def get_airport_detail(airport_id: int, current_user: User = Depends(get_current_staff_read), db: Session = Depends(get_read_db)):
     """Детали аэропорта"""
     return flight_service.get_airport_detail(db, airport_id)
 
@@ -53,7 +58,7 @@ def create_seat_template_endpoint(template_data: SeatTemplateCreate, current_use
     return aircraft_service.create_seat_template(db, template_data)
 
 @router.get("/seat-templates", response_model=List[SeatTemplate])
-def list_seat_templates(current_user: User = Depends(get_current_staff), db: Session = Depends(get_db)):
+def list_seat_templates(current_user: User = Depends(get_current_staff_read), db: Session = Depends(get_read_db)):
     return aircraft_service.get_seat_templates(db)
 
 @router.delete("/seat-templates/{template_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -66,7 +71,7 @@ def create_aircraft_endpoint(aircraft_data: AircraftCreate, current_user: User =
     return aircraft_service.create_aircraft(db, aircraft_data)
 
 @router.get("/aircrafts", response_model=List[Aircraft], tags=["Staff - Aircrafts"])
-def list_aircrafts(current_user: User = Depends(get_current_staff), db: Session = Depends(get_db)):
+def list_aircrafts(current_user: User = Depends(get_current_staff_read), db: Session = Depends(get_read_db)):
     return aircraft_service.get_aircrafts(db)
 
 @router.delete("/aircrafts/{aircraft_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Staff - Aircrafts"])
@@ -75,7 +80,7 @@ def delete_aircraft_endpoint(aircraft_id: int, current_user: User = Depends(get_
     return None
 
 @router.get("/aircrafts/{aircraft_id}", response_model=AircraftDetail, tags=["Staff - Aircrafts"])
-def get_aircraft_detail(aircraft_id: int, current_user: User = Depends(get_current_staff), db: Session = Depends(get_db)):
+def get_aircraft_detail(aircraft_id: int, current_user: User = Depends(get_current_staff_read), db: Session = Depends(get_read_db)):
     aircraft = db.query(AircraftModel).options(
         selectinload(AircraftModel.flights).selectinload(FlightModel.origin_airport),
         selectinload(AircraftModel.flights).selectinload(FlightModel.destination_airport)
@@ -86,17 +91,17 @@ def get_aircraft_detail(aircraft_id: int, current_user: User = Depends(get_curre
 # ===================== РЕЙСЫ =====================
 
 @router.get("/flights/upcoming", response_model=List[Flight], tags=["Staff - Flights: Upcoming & Active"])
-def list_upcoming_flights(current_user: User = Depends(get_current_staff), db: Session = Depends(get_db)):
+def list_upcoming_flights(current_user: User = Depends(get_current_staff_read), db: Session = Depends(get_read_db)):
     """Рейсы: По расписанию, Задержан, Посадка"""
     return flight_service.get_flights_by_status(db, [FlightStatus.SCHEDULED, FlightStatus.DELAYED, FlightStatus.BOARDING])
 
 @router.get("/flights/active", response_model=List[Flight], tags=["Staff - Flights: In Air"])
-def list_active_flights(current_user: User = Depends(get_current_staff), db: Session = Depends(get_db)):
+def list_active_flights(current_user: User = Depends(get_current_staff_read), db: Session = Depends(get_read_db)):
     """Рейсы: В полете (Вылетел)"""
     return flight_service.get_flights_by_status(db, [FlightStatus.DEPARTED])
 
-@router.get("/flights/past", response_model=List[Flight], tags=["Staff - Flights: Archive"])
-def list_past_flights(current_user: User = Depends(get_current_staff), db: Session = Depends(get_db)):
+@router.get("/flights/past", response_model=List[Flight], tags=["Staff - Flights: Archive"], dependencies=[limit_concurrency("staff_reports")])
+def list_past_flights(current_user: User = Depends(get_current_staff_read), db: Session = Depends(get_read_db)):
     """Рейсы: Прибыл, Отменен"""
     return flight_service.get_flights_by_status(db, [FlightStatus.ARRIVED, FlightStatus.CANCELLED])
 
@@ -105,14 +110,13 @@ def create_flight_endpoint(flight_data: FlightCreate, current_user: User = Depen
     """Создать рейс"""
     return flight_service.create_flight(db, flight_data)
 
-@router.get("/flights", response_model=List[Flight], tags=["Staff - Flights: Management"])
-def list_flights_all(current_user: User = Depends(get_current_staff), db: Session = Depends(get_db)):
+@router.get("/flights", response_model=List[Flight], tags=["Staff - Flights: Management"], dependencies=[limit_concurrency("staff_reports")])
+def list_flights_all(current_user: User = Depends(get_current_staff_read), db: Session = Depends(get_read_db)):
     """Полный список всех рейсов для управления"""
-    flight_service.update_flight_statuses(db)
     return db.query(FlightModel).all()
 
 @router.get("/flights/{flight_id}", response_model=Flight, tags=["Staff - Flights: Management"])
-def get_flight(flight_id: int, current_user: User = Depends(get_current_staff), db: Session = Depends(get_db)):
+def get_flight(flight_id: int, current_user: User = Depends(get_current_staff_read), db: Session = Depends(get_read_db)):
     """Детали конкретного рейса"""
     return flight_service.get_flight_by_id(db, flight_id)
 
@@ -128,18 +132,28 @@ def delete_flight_endpoint(flight_id: int, current_user: User = Depends(get_curr
     return None
 
 @router.get("/flights/{flight_id}/seats", response_model=StaffSeatMap, tags=["Staff - Flights: Management"])
-def get_flight_seats_staff(flight_id: int, current_user: User = Depends(get_current_staff), db: Session = Depends(get_db)):
+def get_flight_seats_staff(flight_id: int, request: Request, response: Response, current_user: User = Depends(get_current_staff_read), db: Session = Depends(get_read_db)):
     """Карта мест рейса с именами пассажиров (админ)"""
-    return flight_service.get_staff_flight_seat_map(db, flight_id)
+    version = flight_service.get_flight_version(db, flight_id)
+    not_modified = conditional_response(request, response, flight_service.get_seat_map_etag(flight_id, version))
+    if not_modified: return not_modified
+    if settings.SEAT_MAP_FAST_RESPONSE:
+        content, counts = flight_service.encode_staff_flight_seat_map(db, flight_id)
+        etag = flight_service.get_seat_map_etag(flight_id, version, counts["reserved"])
+        return Response(content=content, media_type="application/json", headers={"ETag": etag})
+    seat_map = flight_service.get_staff_flight_seat_map(db, flight_id)
+    reserved = seat_map.total_seats - seat_map.available_seats - seat_map.occupied_seats
+    response.headers["ETag"] = flight_service.get_seat_map_etag(flight_id, version, reserved)
+    return seat_map
 
 # ===================== БРОНИРОВАНИЯ =====================
 
-@router.get("/bookings", response_model=List[Booking], tags=["Staff - Bookings: Generic"])
+@router.get("/bookings", response_model=List[Booking], tags=["Staff - Bookings: Generic"], dependencies=[limit_concurrency("staff_reports")])
 def list_bookings(
     flight_id: Optional[int] = None, 
     pnr: Optional[str] = None,
-    current_user: User = Depends(get_current_staff), 
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_staff_read), 
+    db: Session = Depends(get_read_db)
 ):
     """Общий список всех бронирований (для совместимости с фронтендом)"""
     query = db.query(BookingModel).options(
@@ -152,23 +166,23 @@ def list_bookings(
     bookings = query.order_by(BookingModel.created_at.desc()).all()
     return [Booking.model_validate(b) for b in bookings]
 
-@router.get("/bookings/confirmed", response_model=List[Booking], tags=["Staff - Bookings: Confirmed"])
-def list_confirmed_bookings(flight_id: Optional[int] = None, pnr: Optional[str] = None, current_user: User = Depends(get_current_staff), db: Session = Depends(get_db)):
+@router.get("/bookings/confirmed", response_model=List[Booking], tags=["Staff - Bookings: Confirmed"], dependencies=[limit_concurrency("staff_reports")])
+def list_confirmed_bookings(flight_id: Optional[int] = None, pnr: Optional[str] = None, current_user: User = Depends(get_current_staff_read), db: Session = Depends(get_read_db)):
     """Список всех оплаченных и подтвержденных бронирований"""
     return booking_service.list_bookings_by_status(db, BookingStatus.CONFIRMED, flight_id, pnr)
 
-@router.get("/bookings/pending", response_model=List[Booking], tags=["Staff - Bookings: Pending/Created"])
-def list_pending_bookings(flight_id: Optional[int] = None, pnr: Optional[str] = None, current_user: User = Depends(get_current_staff), db: Session = Depends(get_db)):
+@router.get("/bookings/pending", response_model=List[Booking], tags=["Staff - Bookings: Pending/Created"], dependencies=[limit_concurrency("staff_reports")])
+def list_pending_bookings(flight_id: Optional[int] = None, pnr: Optional[str] = None, current_user: User = Depends(get_current_staff_read), db: Session = Depends(get_read_db)):
     """Список временных бронирований (ожидают оплаты 10 мин)"""
     return booking_service.list_bookings_by_status(db, BookingStatus.CREATED, flight_id, pnr)
 
-@router.get("/bookings/cancelled", response_model=List[Booking], tags=["Staff - Bookings: Cancelled"])
-def list_cancelled_bookings(flight_id: Optional[int] = None, pnr: Optional[str] = None, current_user: User = Depends(get_current_staff), db: Session = Depends(get_db)):
+@router.get("/bookings/cancelled", response_model=List[Booking], tags=["Staff - Bookings: Cancelled"], dependencies=[limit_concurrency("staff_reports")])
+def list_cancelled_bookings(flight_id: Optional[int] = None, pnr: Optional[str] = None, current_user: User = Depends(get_current_staff_read), db: Session = Depends(get_read_db)):
     """Список отмененных бронирований"""
     return booking_service.list_bookings_by_status(db, BookingStatus.CANCELLED, flight_id, pnr)
 
 @router.get("/bookings/{booking_id}", response_model=Booking, tags=["Staff - Bookings: Generic"])
-def get_booking(booking_id: int, current_user: User = Depends(get_current_staff), db: Session = Depends(get_db)):
+def get_booking(booking_id: int, current_user: User = Depends(get_current_staff_read), db: Session = Depends(get_read_db)):
     """Детальная информация о конкретном бронировании"""
     booking = db.query(BookingModel).options(
         joinedload(BookingModel.flight).joinedload(FlightModel.origin_airport),
@@ -199,8 +213,18 @@ def block_seat_endpoint(flight_id: int, request: SeatBlockRequest, current_user:
     """Заблокировать место (системная блокировка)"""
     return booking_service.staff_block_seat(db, flight_id, request.seat_number, current_user.id)
 
+@router.post("/flights/{flight_id}/holds/reclaim", response_model=HoldReclaimReport, tags=["Staff - Bookings: Operations"])
+def reclaim_expired_holds_endpoint(flight_id: int, current_user: User = Depends(get_current_staff), db: Session = Depends(get_db)):
+    """Освободить просроченные блокировки мест рейса (с отчётом)"""
+    return booking_service.cleanup_expired_holds(db, flight_id)
+
+@router.post("/seat-inventory/reconcile", response_model=SeatInventoryReport, tags=["Staff - Bookings: Operations"])
+def reconcile_seat_inventory_endpoint(current_user: User = Depends(get_current_staff), db: Session = Depends(get_db)):
+    """Сверить счётчики занятых мест рейсов с бронированиями (с отчётом)"""
+    return seat_inventory.reconcile_seats_taken(db)
+
 @router.get("/flights/{flight_id}/conflicts", response_model=List[SeatConflict], tags=["Staff - Bookings: Operations"])
-def get_seat_conflicts(flight_id: int, current_user: User = Depends(get_current_staff), db: Session = Depends(get_db)):
+def get_seat_conflicts(flight_id: int, current_user: User = Depends(get_current_staff_read), db: Session = Depends(get_read_db)):
     """Найти конфликты мест на рейсе"""
     return booking_service.get_seat_conflicts(db, flight_id)
 
@@ -211,7 +235,7 @@ def create_announcement_endpoint(announcement_data: AnnouncementCreate, current_
     return Announcement.model_validate(announcement_service.create_announcement(db, announcement_data, current_user.id))
 
 @router.get("/flights/{flight_id}/announcements", response_model=List[Announcement], tags=["Staff - Announcements"])
-def get_flight_announcements_endpoint(flight_id: int, current_user: User = Depends(get_current_staff), db: Session = Depends(get_db)):
+def get_flight_announcements_endpoint(flight_id: int, current_user: User = Depends(get_current_staff_read), db: Session = Depends(get_read_db)):
     return announcement_service.get_flight_announcements(db, flight_id)
 
 @router.delete("/announcements/{announcement_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Staff - Announcements"])
@@ -219,14 +243,23 @@ def delete_announcement_endpoint(announcement_id: int, current_user: User = Depe
     announcement_service.delete_announcement(db, announcement_id)
     return None
 
-@router.get("/announcements", response_model=List[Announcement], tags=["Staff - Announcements"])
-def list_all_announcements(current_user: User = Depends(get_current_staff), db: Session = Depends(get_db)):
+@router.get("/announcements", response_model=List[Announcement], tags=["Staff - Announcements"], dependencies=[limit_concurrency("staff_reports")])
+def list_all_announcements(current_user: User = Depends(get_current_staff_read), db: Session = Depends(get_read_db)):
     return announcement_service.list_all_announcements(db)
 
+@router.get("/announcements/fanouts", response_model=List[AnnouncementFanout], tags=["Staff - Announcements"])
+def list_announcement_fanouts(limit: int = 50, current_user: User = Depends(get_current_staff_read), db: Session = Depends(get_read_db)):
+    """Рассылки персональных объявлений: прогресс и время доставки"""
+    return announcement_fanout.list_fanouts(db, limit)
+
+@router.get("/announcements/fanouts/{fanout_id}", response_model=AnnouncementFanout, tags=["Staff - Announcements"])
+def get_announcement_fanout(fanout_id: int, current_user: User = Depends(get_current_staff_read), db: Session = Depends(get_read_db)):
+    return announcement_fanout.get_fanout(db, fanout_id)
+
 # ===================== ПОЛЬЗОВАТЕЛИ =====================
 
-@router.get("/users", response_model=List[UserProfile], tags=["Staff - Users"])
-def list_all_users(current_user: User = Depends(get_current_staff), db: Session = Depends(get_db)):
+@router.get("/users", response_model=List[UserProfile], tags=["Staff - Users"], dependencies=[limit_concurrency("staff_reports")])
+def list_all_users(current_user: User = Depends(get_current_staff_read), db: Session = Depends(get_read_db)):
     """Список всех зарегистрированных пользователей"""
     return user_service.list_all_users(db)
 
@@ -243,7 +276,7 @@ def toggle_block_user(user_id: int, current_user: User = Depends(get_current_sta
 
 # ===================== ПЛАТЕЖИ =====================
 
-@router.get("/payments", response_model=List[StaffPayment], tags=["Staff - Payments"])
-def list_payments(status: Optional[TransactionStatus] = None, current_user: User = Depends(get_current_staff), db: Session = Depends(get_db)):
+@router.get("/payments", response_model=List[StaffPayment], tags=["Staff - Payments"], dependencies=[limit_concurrency("staff_reports")])
+def list_payments(status: Optional[TransactionStatus] = None, current_user: User = Depends(get_current_staff_read), db: Session = Depends(get_read_db)):
     """Список всех платежей"""
     return booking_service.get_all_payments_staff(db, status)
@@ -1,6 +1,8 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+
+from app.models.announcement import FanoutStatus
 
 class Announcement(BaseModel):
     """Announcement schema for API responses"""
@@ -19,3 +21,47 @@ class AnnouncementCreate(BaseModel):
     flight_id: Optional[int] = None
     title: str
     message: str
+
+
+class AnnouncementPage(BaseModel):
+    """Keyset page of announcements (newest first)"""
+    items: List[Announcement]
+    next_before_id: Optional[int] = None  # pass as before_id for the next page; None on the last page
+
+
+class InboxPage(BaseModel):
+    """Keyset page of a passenger inbox (newest first)"""
+    items: List[Announcement]
+    next_before_id: Optional[int] = None  # pass as before_id for the next page; None on the last page
+    last_read_id: int
+    unread: int
+
+
+class InboxRead(BaseModel):
+    """Marks everything up to last_read_id as read"""
+    last_read_id: int
+
+
+class InboxCursor(BaseModel):
+    last_read_id: int
+    unread: int
+
+
+class AnnouncementFanout(BaseModel):
+    """Progress of one announcement fan-out (outbox event)"""
+    id: int
+    flight_id: Optional[int] = None
+    title: str
+    status: FanoutStatus
+    total: int
+    delivered: int
+    progress: float
+    attempts: int
+    last_error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    duration_ms: Optional[float] = None  # from the flight change commit to the last batch
+
+    class Config:
+        from_attributes = True
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, validator, field_validator
+from pydantic import BaseModel, Field, validator, field_validator
 from datetime import datetime, date
-from typing import Optional, List
+from typing import Literal, Optional, List
 from .airport_base import Airport
 from .announcement import Announcement
 from app.models.flight import FlightStatus
@@ -72,6 +72,38 @@ class FlightSearch(BaseModel):
     departure_date: datetime  # departure date
 
 
+class ConnectionSearch(BaseModel):
+    """Schema for connection (multi-leg) search request"""
+    origin_code: str
+    destination_code: str
+    departure_date: datetime  # day of the first departure
+    max_legs: int = Field(2, ge=1)  # upper bound: CONNECTION_MAX_LEGS
+    min_connection_minutes: Optional[int] = Field(None, ge=0)
+    max_connection_minutes: Optional[int] = Field(None, ge=0)
+    sort_by: Literal["duration", "price"] = "duration"
+    limit: int = Field(20, ge=1, le=100)
+
+
+class Itinerary(BaseModel):
+    """One itinerary of a connection search"""
+    legs: List[Flight]
+    departure_time: datetime
+    arrival_time: datetime
+    duration_minutes: int
+    connections: int
+    layover_minutes: List[int]
+    total_price: float
+
+
+class FareCalendarDay(BaseModel):
+    """Cheapest fare and availability for one day of a route"""
+    date: date
+    min_price: Optional[float] = None  # None: no flights with free seats
+    cheapest_flight_id: Optional[int] = None
+    flights: int
+    available_seats: int
+
+
 class FlightSearchResponse(BaseModel):
     """Response with list of flights"""
     flights: list[Flight]
@@ -41,6 +41,7 @@ class PaymentTransaction(BaseModel):
 class StaffPayment(BaseModel):
     id: int
     transaction_id: str
+    checkout_id: Optional[int] = None
     booking_id: int
     passenger_id: int
     passenger_name: Optional[str]
@@ -113,3 +113,19 @@ class SeatHoldResponse(BaseModel):
     message: str
     expires_at: datetime
     seat_numbers: List[str]
+
+
+class HoldReclaimReport(BaseModel):
+    """Result of one expired-hold reclaim pass"""
+    flight_id: Optional[int] = None  # None = all flights
+    holds_reclaimed: int
+    drafts_reclaimed: int
+    duration_ms: float
+
+
+class SeatInventoryReport(BaseModel):
+    """Result of one seat counter reconciliation pass"""
+    flights_checked: int
+    flights_repaired: int
+    drift: int  # sum of |counter - actual| over repaired flights
+    duration_ms: float
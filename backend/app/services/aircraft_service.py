@@ -3,23 +3,12 @@ from fastapi import HTTPException, status
 from typing import List, Any, Dict, Optional
 from app.models.aircraft import Aircraft, SeatTemplate
 from app.schemas.aircraft import AircraftCreate, SeatTemplateCreate
+from app.services.seat_layout import parse_rows, seat_layouts
 
 
 def _generate_seat_map(row_count: int, seat_letters: str, business_rows: str = None, economy_rows: str = None) -> dict:
     """Генератор структуры мест на основе параметров"""
     # Парсим диапазоны рядов
-    def parse_rows(row_str):
-        if not row_str: return set()
-        rows = set()
-        for part in row_str.split(','):
-            part = part.strip()
-            if '-' in part:
-                start, end = map(int, part.split('-'))
-                rows.update(range(start, end + 1))
-            else:
-                rows.add(int(part))
-        return rows
-
     biz_set = parse_rows(business_rows)
     
     seats = []
@@ -67,6 +56,8 @@ def create_seat_template(db: Session, template_data: SeatTemplateCreate) -> Seat
         db.add(template)
         db.commit()
         db.refresh(template)
+        # id удалённого шаблона может быть выдан повторно
+        seat_layouts.invalidate(template.id)
         return template
     except Exception as e:
         db.rollback()
@@ -155,7 +146,12 @@ def delete_aircraft(db: Session, aircraft_id: int) -> bool:
     """
     from app.models.flight import Flight as FlightModel, FlightStatus
     from app.models.booking import Booking as BookingModel, BookingStatus
-    from app.models.announcement import Announcement as AnnouncementModel
+    from app.services.announcement_fanout import enqueue_fanout
+    from app.services.connection_search import connection_search
+    from app.services.flight_search_index import flight_search_index
+    from app.services.flight_service import bump_flight_version
+    from app.services.seat_occupancy import seat_occupancy
+    from app.workers.announcement_fanout import announcement_fanout_worker
 
     aircraft = get_aircraft_by_id(db, aircraft_id)
     
@@ -163,6 +159,7 @@ def delete_aircraft(db: Session, aircraft_id: int) -> bool:
         # 1. Find all flights associated with this aircraft
         flights = db.query(FlightModel).filter(FlightModel.aircraft_id == aircraft_id).all()
         
+        fanouts = []
         for flight in flights:
             # 2. Cancel the flight
             flight.status = FlightStatus.CANCELLED
@@ -177,19 +174,27 @@ def delete_aircraft(db: Session, aircraft_id: int) -> bool:
             for booking in bookings:
                 # 4. Cancel the booking
                 booking.status = BookingStatus.CANCELLED
-                
-                # 5. Notify the passenger via Announcement
-                notification = AnnouncementModel(
-                    title="Рейс отменен",
-                    message=f"Уважаемый пассажир, ваш рейс {flight.flight_number} был отменен в связи с заменой воздушного судна. Ваше бронирование {booking.seat_number} аннулировано.",
-                    flight_id=flight.id,
-                    created_by=booking.passenger_id
-                )
-                db.add(notification)
+
+            # 5. Notify the passengers (one outbox event, delivered by the fan-out worker)
+            fanouts.append(enqueue_fanout(
+                db,
+                title="Рейс отменен",
+                message=f"Уважаемый пассажир, ваш рейс {flight.flight_number} был отменен в связи с заменой воздушного судна. Ваше бронирование {{seat_number}} аннулировано.",
+                recipients=[(booking.passenger_id, booking.seat_number) for booking in bookings],
+                flight_id=flight.id,
+                announcement_flight_id=flight.id
+            ))
 
         # 6. Delete the aircraft itself
+        bump_flight_version(db, *(f.id for f in flights))
+        departures = [f.scheduled_departure for f in flights]
         db.delete(aircraft)
         db.commit()
+        seat_occupancy.invalidate(*(f.id for f in flights))
+        flight_search_index.invalidate_days(*departures)
+        connection_search.remove(*(f.id for f in flights))
+        if any(fanouts):
+            announcement_fanout_worker.wake()
         return True
     except Exception as e:
         db.rollback()
@@ -213,6 +218,7 @@ def delete_seat_template(db: Session, template_id: int) -> bool:
     try:
         db.delete(template)
         db.commit()
+        seat_layouts.invalidate(template_id)
         return True
     except Exception as e:
         db.rollback()
@@ -0,0 +1,139 @@
+"""
+Announcement Fan-out.
+Персональные объявления об изменениях рейса через outbox.
+
+Нужна там, где подписка на рассылку рейса пропадает вместе с изменением
+(рейс отменён или удалён — бронирования отменены или удалены), поэтому
+пассажиры получают личные сообщения. Сервис, меняющий рейс, в той же
+транзакции записывает одно событие AnnouncementFanout со снимком получателей
+(один запрос по бронированиям) вместо строки announcements на каждого. Воркер разворачивает
+событие пачками по ANNOUNCEMENT_FANOUT_BATCH_SIZE: вставка пачки и сдвиг
+delivered коммитятся вместе, поэтому после сбоя доставка продолжается с
+места остановки без дублей.
+"""
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.models.announcement import Announcement, AnnouncementFanout, FanoutStatus
+from app.models.booking import Booking, BookingStatus
+from app.models.flight import Flight
+
+SEAT_PLACEHOLDER = "{seat_number}"
+OPEN_STATUSES = (FanoutStatus.PENDING, FanoutStatus.IN_PROGRESS)
+
+
+def flight_recipients(
+    db: Session,
+    flight_id: int,
+    statuses: Optional[Sequence[BookingStatus]] = None
+) -> List[Tuple[int, str]]:
+    """(passenger_id, seat_number) бронирований рейса; по умолчанию — всех, кроме отменённых."""
+    query = db.query(Booking.passenger_id, Booking.seat_number).filter(Booking.flight_id == flight_id)
+    if statuses is None:
+        query = query.filter(Booking.status != BookingStatus.CANCELLED)
+    else:
+        query = query.filter(Booking.status.in_(statuses))
+    return [(passenger_id, seat_number) for passenger_id, seat_number in query.order_by(Booking.id)]
+
+
+def enqueue_fanout(
+    db: Session,
+    title: str,
+    message: str,
+    recipients: Iterable[Tuple[int, str]],
+    flight_id: Optional[int] = None,
+    announcement_flight_id: Optional[int] = None
+) -> Optional[AnnouncementFanout]:
+    """
+    Добавляет событие в сессию вызывающего (commit — вместе с изменением рейса).
+    message может содержать {seat_number}. Без получателей событие не создаётся.
+    """
+    recipients = [[passenger_id, seat_number] for passenger_id, seat_number in recipients]
+    if not recipients:
+        return None
+    event = AnnouncementFanout(
+        flight_id=flight_id,
+        announcement_flight_id=announcement_flight_id,
+        title=title,
+        message=message,
+        recipients=recipients,
+        total=len(recipients),
+        delivered=0,
+        status=FanoutStatus.PENDING,
+        created_at=datetime.utcnow()
+    )
+    db.add(event)
+    return event
+
+
+def deliver_next_batch(db: Session, batch_size: int = settings.ANNOUNCEMENT_FANOUT_BATCH_SIZE) -> Optional[AnnouncementFanout]:
+    """
+    Доставляет следующую пачку самого старого незавершённого события.
+    Возвращает обработанное событие или None, если очередь пуста. Ошибка
+    записывается в событие (после ANNOUNCEMENT_FANOUT_MAX_ATTEMPTS — FAILED)
+    и пробрасывается дальше.
+    """
+    event = db.query(AnnouncementFanout).filter(
+        AnnouncementFanout.status.in_(OPEN_STATUSES)
+    ).order_by(AnnouncementFanout.id).first()
+    if event is None:
+        return None
+
+    event_id = event.id
+    try:
+        chunk = event.recipients[event.delivered:event.delivered + batch_size]
+        flight_id = event.announcement_flight_id
+        # Рейс могли удалить до доставки — объявление остаётся без привязки
+        if flight_id is not None and db.get(Flight, flight_id) is None:
+            flight_id = None
+        if chunk:
+            db.execute(insert(Announcement), [
+                {
+                    "title": event.title,
+                    "message": event.message.replace(SEAT_PLACEHOLDER, str(seat_number)),
+                    "flight_id": flight_id,
+                    "created_by": passenger_id,
+                    "recipient_id": passenger_id,
+                    "created_at": event.created_at,
+                }
+                for passenger_id, seat_number in chunk
+            ])
+        now = datetime.utcnow()
+        event.delivered += len(chunk)
+        event.started_at = event.started_at or now
+        if event.delivered >= event.total:
+            event.status = FanoutStatus.COMPLETED
+            event.completed_at = now
+        else:
+            event.status = FanoutStatus.IN_PROGRESS
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        event = db.get(AnnouncementFanout, event_id)
+        event.attempts += 1
+        event.last_error = str(e)[:500]
+        if event.attempts >= settings.ANNOUNCEMENT_FANOUT_MAX_ATTEMPTS:
+            event.status = FanoutStatus.FAILED
+        db.commit()
+        raise
+    return event
+
+
+def list_fanouts(db: Session, limit: int = 50) -> List[AnnouncementFanout]:
+    """Последние события рассылки (новые первыми)."""
+    return db.query(AnnouncementFanout).order_by(AnnouncementFanout.id.desc()).limit(limit).all()
+
+
+def get_fanout(db: Session, fanout_id: int) -> AnnouncementFanout:
+    event = db.get(AnnouncementFanout, fanout_id)
+    if not event:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Рассылка не найдена"
+        )
+    return event
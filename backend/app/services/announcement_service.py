@@ -1,20 +1,30 @@
 """
 Announcement Service.
 Управление объявлениями и уведомлениями системы.
+
+Лента пассажира (inbox) — не копии объявлений на каждого: рассылка по рейсу
+хранится одной строкой (recipient_id IS NULL) и видна пассажирам с активным
+бронированием на рейс, личные сообщения адресуются recipient_id. Прочитанное
+отмечается одним курсором на пользователя (AnnouncementCursor.last_read_id).
+Страница ленты — keyset по id: три выборки по индексам (личные, рассылки
+моих рейсов, общие), каждая не длиннее страницы.
 """
-from datetime import datetime, timedelta
-from typing import List
+from typing import List, Optional
 
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, func, select, union_all
 from sqlalchemy.orm import Session, joinedload
 from fastapi import HTTPException, status
 
-from app.models.announcement import Announcement
-from app.models.booking import Booking, BookingStatus, SeatHold
+from app.core.config import settings
+from app.models.announcement import Announcement, AnnouncementCursor
+from app.models.booking import Booking
 from app.models.flight import Flight
 from app.models.user import User, UserRole
-from app.schemas.announcement import AnnouncementCreate
+from app.schemas.announcement import AnnouncementCreate, InboxCursor, InboxPage
+from app.services.seat_inventory import TAKEN_STATUSES
 
+# Автор системных рассылок (create_flight, блокировка мест, переназначения)
+SYSTEM_AUTHOR_ID = 1
 
 
 def create_announcement(
@@ -77,69 +87,127 @@ def delete_announcement(db: Session, announcement_id: int) -> None:
 
 
 def get_user_announcements(db: Session, current_user: User) -> List[Announcement]:
+    """
+    Fetches announcements relevant to the current user (read-only).
+    Expired hold and departure alerts are emitted by the booking alert jobs.
+    """
+    return _inbox_query(db, current_user.id)
+
+
+def _inbox_branches(user_id: int) -> list:
+    """Условия ленты пользователя; каждое — диапазон своего индекса по (…, id)."""
+    my_flights = select(Booking.flight_id).where(
+        Booking.passenger_id == user_id,
+        Booking.status.in_(TAKEN_STATUSES)
+    )
+    return [
+        # Личные сообщения
+        Announcement.recipient_id == user_id,
+        # Рассылки по моим рейсам
+        and_(Announcement.flight_id.in_(my_flights), Announcement.recipient_id.is_(None)),
+        # Общие новости
+        and_(Announcement.flight_id.is_(None), Announcement.recipient_id.is_(None)),
+    ]
+
+
+def _inbox_query(
+    db: Session,
+    user_id: int,
+    before_id: Optional[int] = None,
+    limit: Optional[int] = None
+) -> List[Announcement]:
+    """Сообщения ленты новыми первыми; before_id/limit — keyset-страница."""
+    branches = []
+    for condition in _inbox_branches(user_id):
+        branch = select(Announcement.id).where(condition)
+        if before_id is not None:
+            branch = branch.where(Announcement.id < before_id)
+        if limit is not None:
+            branch = branch.order_by(Announcement.id.desc()).limit(limit)
+        branches.append(select(branch.subquery().c.id))
+    ids = union_all(*branches).subquery()
+    page_ids = select(ids.c.id).order_by(ids.c.id.desc())
+    if limit is not None:
+        page_ids = page_ids.limit(limit)
+    return db.query(Announcement).options(joinedload(Announcement.flight)).filter(
+        Announcement.id.in_(page_ids)
+    ).order_by(Announcement.id.desc()).all()
+
+
+def _unread_count(db: Session, user_id: int, last_read_id: int) -> int:
+    branches = [
+        select(Announcement.id).where(condition, Announcement.id > last_read_id)
+        for condition in _inbox_branches(user_id)
+    ]
+    return db.execute(select(func.count()).select_from(union_all(*branches).subquery())).scalar()
+
+
+def _last_read_id(db: Session, user_id: int) -> int:
+    cursor = db.get(AnnouncementCursor, user_id)
+    return cursor.last_read_id if cursor else 0
+
+
+def get_inbox_page(
+    db: Session,
+    user_id: int,
+    before_id: Optional[int] = None,
+    limit: int = settings.INBOX_PAGE_SIZE
+) -> InboxPage:
+    """Страница ленты: сообщения с id < before_id (новые первыми) и счётчик непрочитанных."""
+    limit = max(1, min(limit, settings.INBOX_MAX_PAGE_SIZE))
+    items = _inbox_query(db, user_id, before_id, limit)
+    last_read_id = _last_read_id(db, user_id)
+    return InboxPage(
+        items=items,
+        next_before_id=items[-1].id if len(items) == limit else None,
+        last_read_id=last_read_id,
+        unread=_unread_count(db, user_id, last_read_id)
+    )
+
+
+def mark_inbox_read(db: Session, user_id: int, last_read_id: int) -> InboxCursor:
+    """Сдвигает курсор прочитанного вперёд (назад не двигается)."""
+    try:
+        cursor = db.get(AnnouncementCursor, user_id)
+        if cursor is None:
+            cursor = AnnouncementCursor(user_id=user_id, last_read_id=0)
+            db.add(cursor)
+        cursor.last_read_id = max(cursor.last_read_id or 0, last_read_id)
+        db.commit()
+        return InboxCursor(
+            last_read_id=cursor.last_read_id,
+            unread=_unread_count(db, user_id, cursor.last_read_id)
+        )
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to update inbox cursor: {str(e)}")
+
 
+def attach_legacy_recipients(db: Session) -> int:
     """
-    Fetches announcements relevant to the current user.
-    Also performs proactive checks for expired holds and upcoming flights.
+    Личные сообщения, записанные до появления recipient_id, получают адресата:
+    автор такого сообщения — сам пассажир (бронирование, оплата, закрытие
+    аэропорта без рейса). Системные рассылки (created_by=SYSTEM_AUTHOR_ID) не
+    трогаются, даже если id 1 — пассажир. Новые личные сообщения пишутся с
+    recipient_id, поэтому после первого запуска проверка наличия ничего не
+    находит. Вызывается при старте; один UPDATE, идемпотентно.
     """
+    passengers = select(User.id).where(User.role.not_in([UserRole.STAFF, UserRole.ADMIN]))
+    legacy = db.query(Announcement).filter(
+        Announcement.recipient_id.is_(None),
+        Announcement.created_by != SYSTEM_AUTHOR_ID,
+        Announcement.created_by.in_(passengers)
+    )
+    if legacy.first() is None:
+        return 0
+    
     try:
-        bookings = db.query(Booking).filter(Booking.passenger_id == current_user.id).all()
-        relevant_flight_ids = [b.flight_id for b in bookings if b.status in [BookingStatus.CONFIRMED, BookingStatus.CREATED]]
-        
-        now = datetime.utcnow()
-        holds = db.query(SeatHold).filter(SeatHold.passenger_id == current_user.id, SeatHold.expires_at > now).all()
-        holds_map = { (h.flight_id, h.seat_number) for h in holds }
-        
-        for b in bookings:
-            # 1. Cleanup expired CREATED bookings that lost their hold
-            if b.status == BookingStatus.CREATED and (b.flight_id, b.seat_number) not in holds_map:
-                b.status = BookingStatus.CANCELLED
-                db.add(Announcement(
-                    title="Время истекло", 
-                    message=f"Бронь места {b.seat_number} на рейс {b.flight.flight_number} истекла.", 
-                    flight_id=b.flight_id, 
-                    created_by=current_user.id
-                ))
-            
-            # 2. Alert for upcoming flights (within 1 hour)
-            if b.status == BookingStatus.CONFIRMED:
-                time_to_dep = b.flight.scheduled_departure - now
-                if timedelta(minutes=0) < time_to_dep <= timedelta(minutes=65):
-                    alert_title = "ВНИМАНИЕ: Вылет скоро"
-                    existing_alert = db.query(Announcement).filter(
-                        Announcement.flight_id == b.flight_id,
-                        Announcement.created_by == current_user.id,
-                        Announcement.title == alert_title
-                    ).first()
-                    
-                    if not existing_alert:
-                        db.add(Announcement(
-                            title=alert_title,
-                            message=f"Ваш рейс {b.flight.flight_number} ({b.flight.departure_city} -> {b.flight.arrival_city}) вылетает через 1 час! Пожалуйста, пройдите к гейту {b.flight.gate or 'не указан'}.",
-                            flight_id=b.flight_id,
-                            created_by=current_user.id,
-                            created_at=now
-                        ))
+        attached = legacy.update({Announcement.recipient_id: Announcement.created_by}, synchronize_session=False)
         db.commit()
+        return attached
     except Exception:
         db.rollback()
-        # Non-critical failure in background checks shouldn't block message viewing
-        pass
-    
-    # 3. Final query for all relevant messages
-    staff_ids_subquery = db.query(User.id).filter(User.role.in_([UserRole.STAFF, UserRole.ADMIN])).scalar_subquery()
-    
-    announcements = db.query(Announcement).options(joinedload(Announcement.flight)).filter(
-        or_(
-            # Global announcements for my flights (made by staff)
-            and_(Announcement.flight_id.in_(relevant_flight_ids), Announcement.created_by.in_(staff_ids_subquery)),
-            # My individual history entries for my flights
-            and_(Announcement.flight_id.in_(relevant_flight_ids), Announcement.created_by == current_user.id),
-            # System-wide news or my personal notes
-            and_(Announcement.flight_id.is_(None), or_(Announcement.created_by == current_user.id, Announcement.created_by.in_(staff_ids_subquery)))
-        )).order_by(Announcement.created_at.desc()).all()
-    
-    return announcements
+        raise
 
 
 def list_all_announcements(db: Session) -> List[Announcement]:
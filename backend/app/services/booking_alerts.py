@@ -0,0 +1,109 @@
+"""
+Booking Alerts.
+Личные оповещения по бронированиям: "вылет скоро" и "время брони истекло".
+
+Раньше их создавало чтение ленты пассажира (с commit на каждый запрос).
+Теперь каждое оповещение — один INSERT ... SELECT по всем подходящим
+бронированиям сразу: "время истекло" пишет cleanup_expired_holds перед
+удалением черновиков, "вылет скоро" — BookingAlertWorker, когда рейс входит
+в окно DEPARTURE_ALERT_LEAD_MINUTES. Ключ Announcement.dedup_key
+("<вид>:<booking_id>:<created_at>") уникален, поэтому оповещение создаётся
+один раз на бронирование, сколько бы раз ни запускалась задача. Время
+создания в ключе нужно потому, что SQLite переиспользует id удалённых
+черновиков: новое бронирование с тем же id получает свои оповещения.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import String, and_, cast, exists, func, insert, literal, select
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import settings
+from app.models.airport import Airport
+from app.models.announcement import Announcement
+from app.models.booking import Booking, BookingStatus
+from app.models.flight import Flight
+
+DEPARTURE_SOON = "departure-soon"
+HOLD_EXPIRED = "hold-expired"
+
+DEPARTURE_ALERT_TITLE = "ВНИМАНИЕ: Вылет скоро"
+HOLD_EXPIRED_TITLE = "Время истекло"
+
+ALERT_COLUMNS = ["title", "message", "flight_id", "created_by", "recipient_id", "created_at", "dedup_key"]
+
+
+def lead_time_text(minutes: int) -> str:
+    """Время до вылета для текста оповещения: "1 ч 5 мин", "2 ч", "45 мин"."""
+    hours, minutes = divmod(minutes, 60)
+    parts = ([f"{hours} ч"] if hours else []) + ([f"{minutes} мин"] if minutes or not hours else [])
+    return " ".join(parts)
+
+
+def _dedup_key(kind: str):
+    return (
+        literal(f"{kind}:") + cast(Booking.id, String)
+        + literal(":") + func.coalesce(cast(Booking.created_at, String), "")
+    )
+
+
+def _not_emitted(kind: str):
+    return ~exists().where(Announcement.dedup_key == _dedup_key(kind))
+
+
+def emit_hold_expired_alerts(db: Session, drafts) -> int:
+    """
+    "Время истекло" для черновиков, отобранных условием drafts (до их удаления).
+    Не коммитит — вызывается в транзакции освобождения блокировок.
+    """
+    now = datetime.utcnow()
+    return db.execute(insert(Announcement).from_select(ALERT_COLUMNS, select(
+        literal(HOLD_EXPIRED_TITLE),
+        literal("Бронь места ") + Booking.seat_number + literal(" на рейс ") + Flight.flight_number + literal(" истекла."),
+        Booking.flight_id, Booking.passenger_id, Booking.passenger_id,
+        literal(now), _dedup_key(HOLD_EXPIRED)
+    ).join(Flight, Flight.id == Booking.flight_id).where(drafts, _not_emitted(HOLD_EXPIRED)))).rowcount
+
+
+def emit_departure_alerts(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    "Вылет скоро" для подтверждённых бронирований рейсов, вылетающих в
+    (now, now + lead]. Одна вставка на все рейсы; коммитит.
+    """
+    now = now or datetime.utcnow()
+    lead = timedelta(minutes=settings.DEPARTURE_ALERT_LEAD_MINUTES)
+    origin, destination = aliased(Airport), aliased(Airport)
+    try:
+        emitted = db.execute(insert(Announcement).from_select(ALERT_COLUMNS, select(
+            literal(DEPARTURE_ALERT_TITLE),
+            literal("Ваш рейс ") + Flight.flight_number
+            + literal(" (") + func.coalesce(origin.city, "Unknown") + literal(" -> ") + func.coalesce(destination.city, "Unknown")
+            + literal(f") вылетает через {lead_time_text(settings.DEPARTURE_ALERT_LEAD_MINUTES)}! Пожалуйста, пройдите к гейту ") + func.coalesce(Flight.gate, "не указан") + literal("."),
+            Booking.flight_id, Booking.passenger_id, Booking.passenger_id,
+            literal(now), _dedup_key(DEPARTURE_SOON)
+        ).join(Flight, Flight.id == Booking.flight_id).outerjoin(
+            origin, origin.id == Flight.origin_airport_id
+        ).outerjoin(
+            destination, destination.id == Flight.destination_airport_id
+        ).where(
+            Booking.status == BookingStatus.CONFIRMED,
+            Flight.scheduled_departure > now,
+            Flight.scheduled_departure <= now + lead,
+            _not_emitted(DEPARTURE_SOON)
+        ))).rowcount
+        db.commit()
+        return emitted
+    except Exception:
+        db.rollback()
+        raise
+
+
+def next_departure_alert_at(db: Session, now: Optional[datetime] = None) -> Optional[datetime]:
+    """Когда ближайший рейс с подтверждёнными бронированиями войдёт в окно оповещения."""
+    now = now or datetime.utcnow()
+    lead = timedelta(minutes=settings.DEPARTURE_ALERT_LEAD_MINUTES)
+    departure = db.query(func.min(Flight.scheduled_departure)).filter(
+        Flight.scheduled_departure > now + lead,
+        exists().where(and_(Booking.flight_id == Flight.id, Booking.status == BookingStatus.CONFIRMED))
+    ).scalar()
+    return departure - lead if departure is not None else None
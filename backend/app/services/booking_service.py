@@ -6,56 +6,59 @@ import io
 import re
 import uuid
 import base64
-import secrets
-import string
+import random
+import time
+import logging
 import qrcode
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional
 
-from sqlalchemy import and_, or_
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, or_, delete, exists, insert, literal, select, union_all
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session, joinedload, selectinload
 from fastapi import HTTPException, status
 
+from app.core.config import settings
 from app.models.announcement import Announcement
 from app.models.booking import Booking, BookingStatus, SeatHold, Ticket, PaymentMethod
 from app.models.flight import Flight
-from app.models.payment import Payment, TransactionStatus
-from app.models.user import User, UserRole
-from app.schemas.announcement import Announcement as AnnouncementSchema
+from app.models.payment import Checkout, Payment, TransactionStatus
+from app.models.user import User
+from app.schemas.announcement import Announcement as AnnouncementSchema, AnnouncementPage
 from app.schemas.booking import BookingCreate
 from app.schemas.flight import Flight as FlightSchema, Trip as TripSchema
 from app.schemas.seat import (
     SeatHoldRequest, 
     BookWithPassengersRequest, 
     BookSeatsResponse, 
-    SeatHoldResponse
+    SeatHoldResponse,
+    HoldReclaimReport
 )
-from app.services.payment_service import process_payment, refund_payment
-from app.services.flight_service import get_flight_by_id, get_flight_seat_map
+from app.services.booking_alerts import emit_hold_expired_alerts
+from app.services.payment_service import process_checkout, refund_payment
+from app.services.flight_service import bump_flight_version, get_flight_by_id
+from app.services.pnr_allocator import pnr_allocator
+from app.services.seat_inventory import adjust_seats_taken, taken_count
+from app.services.seat_occupancy import seat_occupancy
+from app.services.trip_projection import mark_users_stale
 
+logger = logging.getLogger("airline.bookings")
 
 
 def generate_pnr(db: Session) -> str:
     """
     Generates a unique 6-character PNR (Passenger Name Record) code.
     Excludes confusing characters (0, O, 1, I) and filtered offensive patterns.
+    Codes come from the block-based pnr_allocator (no uniqueness probe per code).
     """
-    CHARSET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
-    PROHIBITED_PATTERNS = ["FUCK", "SHIT", "HELL", "COCK", "BULL"]
-    
-    for _ in range(50):
-        pnr = "".join(secrets.choice(CHARSET) for _ in range(6))
-        if any(pattern in pnr for pattern in PROHIBITED_PATTERNS):
-            continue
-            
-        exists = db.query(Booking.id).filter(Booking.pnr == pnr).first() is not None
-        if not exists:
-            return pnr
-            
-    raise HTTPException(
-        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
-        detail="Не удалось создать уникальный PNR после множества попыток."
-    )
+    try:
+        return pnr_allocator.allocate(db)
+    except Exception:
+        logger.exception("PNR allocation failed")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
+            detail="Не удалось создать уникальный PNR."
+        )
 
 
 def check_passenger_profile(user: User) -> None:
@@ -78,112 +81,192 @@ def calculate_seat_price(base_price: float, seat_number: str) -> float:
     return base_price
 
 
-def cleanup_expired_holds(db: Session) -> None:
+def cleanup_expired_holds(db: Session, flight_id: Optional[int] = None) -> HoldReclaimReport:
     """
-    Removes expired seat holds and clears associated pending 'CREATED' bookings.
-    Should be called before querying availability or starting a new hold session.
+    Reclaims expired seat holds and the pending 'CREATED' drafts left without a live hold
+    (the hold expired, or it was released while the draft stayed behind).
+    Two set-based DELETEs (drafts via the (flight_id, seat_number, status) index, then holds),
+    optionally scoped to one flight; draft owners get a one-time "hold expired" alert. Runs on the HoldExpiryWorker timer and per flight before a new hold.
     """
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    holds_reclaimed = drafts_reclaimed = 0
+    
     try:
-        now = datetime.utcnow()
-        expired_holds = db.query(SeatHold).filter(SeatHold.expires_at <= now).all()
-        
-        if expired_holds:
-            for hold in expired_holds:
-                db.query(Booking).filter(
-                    Booking.flight_id == hold.flight_id,
-                    Booking.seat_number == hold.seat_number,
-                    Booking.status == BookingStatus.CREATED
-                ).delete()
-                db.delete(hold)
-            db.commit()
+        holds_query = db.query(SeatHold).filter(SeatHold.expires_at <= now)
+        drafts = and_(
+            Booking.status == BookingStatus.CREATED,
+            ~exists().where(
+                SeatHold.flight_id == Booking.flight_id,
+                SeatHold.seat_number == Booking.seat_number,
+                SeatHold.passenger_id == Booking.passenger_id,
+                SeatHold.expires_at > now
+            )
+        )
+        if flight_id is not None:
+            holds_query = holds_query.filter(SeatHold.flight_id == flight_id)
+            drafts = and_(drafts, Booking.flight_id == flight_id)
+        
+        affected_flights = db.execute(select(Booking.flight_id).where(drafts).distinct()).scalars().all()
+        # "Время истекло" владельцам черновиков — до их удаления, в той же транзакции
+        emit_hold_expired_alerts(db, drafts)
+        drafts_reclaimed = db.query(Booking).filter(drafts).delete(synchronize_session=False)
+        # Массовый DELETE идёт мимо flush — счётчик мест затронутых рейсов пересчитывается
+        if affected_flights:
+            db.query(Flight).filter(Flight.id.in_(affected_flights)).update(
+                {Flight.version: Flight.version + 1, Flight.seats_taken: taken_count()}, synchronize_session=False
+            )
+        holds_reclaimed = holds_query.delete(synchronize_session=False)
+        db.commit()
     except Exception:
         db.rollback()
+        holds_reclaimed = drafts_reclaimed = 0
+        logger.exception("Expired hold reclaim failed")
+    
+    return HoldReclaimReport(
+        flight_id=flight_id,
+        holds_reclaimed=holds_reclaimed,
+        drafts_reclaimed=drafts_reclaimed,
+        duration_ms=round((time.perf_counter() - started) * 1000, 2)
+    )
+
+
+def _seat_conflict(db: Session, flight_id: int, seat_numbers: List[str], user_id: int) -> Optional[str]:
+    """
+    One query over bookings and holds of the seat list; returns the error for the first
+    seat (in request order) taken by someone else, or None. Own holds and drafts are not conflicts.
+    """
+    now = datetime.utcnow()
+    conflicts = {}
+    for kind, seat_number, passenger_id, booking_status in db.execute(union_all(
+        select(literal("booking"), Booking.seat_number, Booking.passenger_id, Booking.status).where(
+            Booking.flight_id == flight_id,
+            Booking.seat_number.in_(seat_numbers)
+        ),
+        select(literal("hold"), SeatHold.seat_number, SeatHold.passenger_id, literal(None)).where(
+            SeatHold.flight_id == flight_id,
+            SeatHold.seat_number.in_(seat_numbers),
+            SeatHold.expires_at > now
+        )
+    )):
+        if kind == "booking" and booking_status == BookingStatus.CONFIRMED:
+            conflicts[seat_number] = f"Место {seat_number} уже занято"
+        elif kind == "booking" and booking_status == BookingStatus.CANCELLED:
+            # (flight_id, seat_number) is unique across all statuses
+            conflicts.setdefault(seat_number, f"Место {seat_number} недоступно для бронирования")
+        elif passenger_id != user_id:
+            conflicts.setdefault(seat_number, f"Место {seat_number} уже заблокировано другим пользователем")
+    
+    for seat_number in seat_numbers:
+        if seat_number in conflicts:
+            return conflicts[seat_number]
+    return None
 
 
 def hold_seats(db: Session, flight_id: int, request: SeatHoldRequest, user_id: int) -> SeatHoldResponse:
     """
     Reserves specific seats for 10 minutes to allow the user to complete payment.
-    Creates 'CREATED' booking drafts.
+    Creates 'CREATED' booking drafts with bulk inserts.
+    
+    SEAT_RESERVATION_MODE:
+    - "optimistic": no flight lock; the inserts rely on the (flight_id, seat_number) unique
+      constraints, a violation is mapped to the precise seat error, transient failures
+      (a hold expiring or released concurrently, a busy database) are retried with backoff;
+    - "locking": the flight row is locked and the seat list checked before the inserts.
     """
-    # 1. Proactive cleanup
-    cleanup_expired_holds(db)
+    seat_numbers = list(dict.fromkeys(request.seat_numbers))
+    if not seat_numbers:
+        raise HTTPException(status_code=400, detail="Не выбраны места")
+    
+    # 1. Proactive cleanup (this flight only)
+    cleanup_expired_holds(db, flight_id)
     
-    # 2. Lock flight for modification
-    flight = db.query(Flight).filter(Flight.id == flight_id).with_for_update().first()
+    # 2. Everything that does not need the seats: flight, PNR, prices
+    flight = db.query(Flight).filter(Flight.id == flight_id).first()
     if not flight:
         raise HTTPException(status_code=404, detail="Рейс не найден")
-        
-    expires_at = datetime.utcnow() + timedelta(minutes=10)
+    
+    now = datetime.utcnow()
+    expires_at = now + timedelta(minutes=10)
     batch_pnr = generate_pnr(db)
+    hold_rows = [
+        {"flight_id": flight_id, "seat_number": seat, "passenger_id": user_id, "expires_at": expires_at, "created_at": now}
+        for seat in seat_numbers
+    ]
+    draft_rows = [
+        {
+            "pnr": batch_pnr, "passenger_id": user_id, "flight_id": flight_id, "seat_number": seat,
+            "price": calculate_seat_price(flight.base_price, seat), "status": BookingStatus.CREATED, "created_at": now
+        }
+        for seat in seat_numbers
+    ]
+    locking = settings.SEAT_RESERVATION_MODE == "locking"
+    attempts = max(1, settings.SEAT_RESERVATION_MAX_ATTEMPTS)
     
-    try:
-        for seat_number in request.seat_numbers:
-            # Check confirmed bookings
-            existing = db.query(Booking).filter(
-                Booking.flight_id == flight_id,
-                Booking.seat_number == seat_number,
-                Booking.status == BookingStatus.CONFIRMED
-            ).first()
-            if existing:
-                raise HTTPException(status_code=400, detail=f"Место {seat_number} уже занято")
-                
-            # Check active holds
-            existing_hold = db.query(SeatHold).filter(
-                SeatHold.flight_id == flight_id, 
-                SeatHold.seat_number == seat_number
-            ).first()
+    for attempt in range(attempts):
+        try:
+            if locking:
+                db.query(Flight.id).filter(Flight.id == flight_id).with_for_update().first()
+                conflict = _seat_conflict(db, flight_id, seat_numbers, user_id)
+                if conflict:
+                    raise HTTPException(status_code=400, detail=conflict)
             
-            if existing_hold:
-                if existing_hold.passenger_id != user_id:
-                    raise HTTPException(status_code=400, detail=f"Место {seat_number} уже заблокировано другим пользователем")
-                else:
-                    # User is holding it again? Refresh it.
-                    db.delete(existing_hold)
-                    db.query(Booking).filter(
-                        Booking.flight_id == flight_id,
-                        Booking.seat_number == seat_number,
-                        Booking.passenger_id == user_id,
-                        Booking.status == BookingStatus.CREATED
-                    ).delete()
-
-            # Create hold and draft
-            db.add(SeatHold(
-                flight_id=flight_id,
-                seat_number=seat_number,
-                passenger_id=user_id,
-                expires_at=expires_at
+            # 3. User is holding some of the seats again? Refresh them (explicit deletes before the inserts)
+            db.execute(delete(SeatHold).where(
+                SeatHold.flight_id == flight_id,
+                SeatHold.seat_number.in_(seat_numbers),
+                SeatHold.passenger_id == user_id
             ))
+            drafts_removed = db.execute(delete(Booking).where(
+                Booking.flight_id == flight_id,
+                Booking.seat_number.in_(seat_numbers),
+                Booking.passenger_id == user_id,
+                Booking.status == BookingStatus.CREATED
+            )).rowcount
             
-            seat_price = calculate_seat_price(flight.base_price, seat_number)
+            # 4. Bulk inserts; the unique constraints decide who gets a contested seat
+            db.execute(insert(SeatHold), hold_rows)
+            db.execute(insert(Booking), draft_rows)
+            # Bulk insert/delete go around flush — the seat counter and trip projection are updated explicitly
+            adjust_seats_taken(db, flight_id, len(draft_rows) - drafts_removed)
+            mark_users_stale(db, [user_id])
             
-            db.add(Booking(
-                pnr=batch_pnr,
-                passenger_id=user_id,
+            db.add(Announcement(
+                title="Ожидание оплаты",
+                message=f"Места {', '.join(seat_numbers)} временно заблокированы за вами. Пожалуйста, завершите бронирование в течение 10 минут.",
                 flight_id=flight_id,
-                seat_number=seat_number,
-                price=seat_price,
-                status=BookingStatus.CREATED,
-                created_at=datetime.utcnow()
+                created_by=user_id,
+                recipient_id=user_id
             ))
-        
-        db.add(Announcement(
-            title="Ожидание оплаты",
-            message=f"Места {', '.join(request.seat_numbers)} временно заблокированы за вами. Пожалуйста, завершите бронирование в течение 10 минут.",
-            flight_id=flight_id,
-            created_by=user_id
-        ))
-        
-        db.commit()
-    except Exception as e:
-        db.rollback()
-        if isinstance(e, HTTPException): raise e
-        raise HTTPException(status_code=500, detail=f"Ошибка при выполнении блокировки мест: {str(e)}")
+            
+            bump_flight_version(db, flight_id)
+            db.commit()
+            break
+        except (IntegrityError, OperationalError) as e:
+            db.rollback()
+            if isinstance(e, IntegrityError):
+                conflict = _seat_conflict(db, flight_id, seat_numbers, user_id)
+                db.rollback()
+                if conflict:
+                    raise HTTPException(status_code=400, detail=conflict)
+            if attempt + 1 == attempts:
+                logger.warning(f"Seat hold on flight {flight_id} failed after {attempts} attempt(s): {e}")
+                raise HTTPException(status_code=409, detail="Не удалось заблокировать места, попробуйте ещё раз")
+            # Transient: the conflicting hold expired or was released meanwhile, or the database was busy
+            time.sleep(settings.SEAT_RESERVATION_BACKOFF_MS / 1000 * (2 ** attempt) * random.uniform(0.5, 1.5))
+            cleanup_expired_holds(db, flight_id)
+        except Exception as e:
+            db.rollback()
+            if isinstance(e, HTTPException): raise e
+            raise HTTPException(status_code=500, detail=f"Ошибка при выполнении блокировки мест: {str(e)}")
+    
+    seat_occupancy.mark_held(flight_id, seat_numbers, expires_at)
     
     return SeatHoldResponse(
         success=True,
         message="Места успешно заблокированы",
         expires_at=expires_at.replace(tzinfo=timezone.utc),
-        seat_numbers=request.seat_numbers
+        seat_numbers=seat_numbers
     )
 
 
@@ -200,29 +283,33 @@ def create_bookings_with_passengers(
     try:
         flight = get_flight_by_id(db, flight_id)
         now = datetime.utcnow()
-        booked_seats = []
-        first_id = None
-        
-        # 1. Verify all holds are still valid
-        for p in request.passengers:
-            hold = db.query(SeatHold).filter(
-                SeatHold.flight_id == flight_id,
-                SeatHold.seat_number == p.seat_number,
-                SeatHold.passenger_id == user_id,
-                SeatHold.expires_at > now
-            ).first()
-            if not hold:
-                raise HTTPException(status_code=400, detail=f"Блокировка места {p.seat_number} истекла или не существует")
+        seat_numbers = [p.seat_number for p in request.passengers]
+        if len(set(seat_numbers)) != len(seat_numbers):
+            raise HTTPException(status_code=400, detail="Одно место указано для нескольких пассажиров")
+        
+        # 1. Verify all holds are still valid (one query for the whole seat list)
+        held = set(db.execute(select(SeatHold.seat_number).where(
+            SeatHold.flight_id == flight_id,
+            SeatHold.seat_number.in_(seat_numbers),
+            SeatHold.passenger_id == user_id,
+            SeatHold.expires_at > now
+        )).scalars())
+        for seat_number in seat_numbers:
+            if seat_number not in held:
+                raise HTTPException(status_code=400, detail=f"Блокировка места {seat_number} истекла или не существует")
                 
-        # 2. Gather and update booking objects
-        bookings_to_confirm = []
-        for p in request.passengers:
-            booking = db.query(Booking).filter(
+        # 2. Load all drafts in one query and fill in traveler details
+        drafts = {
+            b.seat_number: b for b in db.query(Booking).filter(
                 Booking.flight_id == flight_id,
-                Booking.seat_number == p.seat_number,
+                Booking.seat_number.in_(seat_numbers),
                 Booking.status == BookingStatus.CREATED
-            ).first()
-            
+            )
+        }
+        payment_method = PaymentMethod(request.payment_method)
+        bookings_to_confirm = []
+        for p in request.passengers:
+            booking = drafts.get(p.seat_number)
             if not booking:
                 continue
                 
@@ -230,51 +317,58 @@ def create_bookings_with_passengers(
             booking.last_name = p.last_name
             booking.passport_number = p.passport_number
             booking.date_of_birth = p.date_of_birth
-            booking.payment_method = PaymentMethod(request.payment_method)
+            booking.payment_method = payment_method
             bookings_to_confirm.append(booking)
 
         if not bookings_to_confirm:
              raise HTTPException(status_code=404, detail="Активные черновики бронирования не найдены")
 
-        # 3. Synchronous Payment and Ticket Generation
-        payment_method = PaymentMethod(request.payment_method)
+        # 3. Synchronous Payment and Ticket Generation (one checkout, bulk inserts, all-or-nothing)
+        process_checkout(
+            db,
+            [(b.id, b.price) for b in bookings_to_confirm],
+            passenger_id=user_id,
+            method=payment_method,
+            card_info="4242 4242 4242 4242" if payment_method == PaymentMethod.CARD else None,
+            flight_id=flight_id,
+            pnr=bookings_to_confirm[0].pnr
+        )
         
         for b in bookings_to_confirm:
-            # Mock Processing
-            process_payment(
-                db=db,
-                booking_id=b.id,
-                passenger_id=user_id,
-                amount=b.price,
-                method=payment_method,
-                card_info="4242 4242 4242 4242" if payment_method == PaymentMethod.CARD else None
-            )
-            
             b.status = BookingStatus.CONFIRMED
-            b.confirmed_at = datetime.utcnow()
-            
-            # Generate permanent Ticket entry
-            ticket = Ticket(
-                booking_id=b.id,
-                passenger_id=user_id,
-                flight_id=flight_id,
-                seat_number=b.seat_number
+            b.confirmed_at = now
+        
+        # Generate permanent Ticket entries
+        db.execute(insert(Ticket), [
+            {"booking_id": b.id, "passenger_id": user_id, "flight_id": flight_id, "seat_number": b.seat_number, "created_at": now}
+            for b in bookings_to_confirm
+        ])
+        booked_seats = [b.seat_number for b in bookings_to_confirm]
+        first_id = bookings_to_confirm[0].id
+
+        # 4. Release the holds of the confirmed seats only; unpaid seats keep theirs until expiry
+        released_seats = db.execute(
+            delete(SeatHold)
+            .where(
+                SeatHold.flight_id == flight_id,
+                SeatHold.seat_number.in_(booked_seats),
+                SeatHold.passenger_id == user_id
             )
-            db.add(ticket)
-            booked_seats.append(b.seat_number)
-            if not first_id: first_id = b.id
-
-        # 4. Final Cleanup of the hold session
-        db.query(SeatHold).filter(SeatHold.flight_id == flight_id, SeatHold.passenger_id == user_id).delete()
+            .returning(SeatHold.seat_number)
+        ).scalars().all()
         
         db.add(Announcement(
             title="Билеты оформлены",
             message=f"Рейс {flight.flight_number}: Оплата прошла успешно. Ваши билеты (PNR: {bookings_to_confirm[0].pnr}) доступны в профиле.",
             flight_id=flight_id,
-            created_by=user_id
+            created_by=user_id,
+            recipient_id=user_id
         ))
         
+        bump_flight_version(db, flight_id)
         db.commit()
+        seat_occupancy.release_holds(flight_id, released_seats)
+        seat_occupancy.mark_confirmed(flight_id, booked_seats)
         
         return BookSeatsResponse(
             success=True,
@@ -311,7 +405,9 @@ def create_booking(db: Session, booking_data: BookingCreate, user_id: int) -> Bo
         )
         db.add(booking)
         db.add(Ticket(booking_id=booking.id, passenger_id=user_id, flight_id=booking_data.flight_id, seat_number=booking_data.seat_number))
+        bump_flight_version(db, booking_data.flight_id)
         db.commit()
+        seat_occupancy.mark_confirmed(booking_data.flight_id, [booking_data.seat_number])
         db.refresh(booking)
         return booking
     except Exception as e:
@@ -378,15 +474,20 @@ def staff_cancel_booking(db: Session, booking_id: int) -> Booking:
     
     try:
         flight = get_flight_by_id(db, booking.flight_id)
+        was_confirmed = booking.status == BookingStatus.CONFIRMED
         booking.status = BookingStatus.CANCELLED
         
         db.add(Announcement(
             title="Бронирование отменено",
             message=f"Ваше бронирование на рейс {flight.flight_number} было отменено администратором системы.",
             flight_id=booking.flight_id,
-            created_by=booking.passenger_id
+            created_by=booking.passenger_id,
+            recipient_id=booking.passenger_id
         ))
+        bump_flight_version(db, booking.flight_id)
         db.commit()
+        if was_confirmed:
+            seat_occupancy.release(booking.flight_id, [booking.seat_number])
         db.refresh(booking)
         return booking
     except Exception as e:
@@ -428,7 +529,9 @@ def staff_block_seat(db: Session, flight_id: int, seat_number: str, staff_id: in
             created_at=datetime.utcnow()
         ))
         
+        bump_flight_version(db, flight_id)
         db.commit()
+        seat_occupancy.mark_confirmed(flight_id, [seat_number])
         db.refresh(booking)
         return booking
     except Exception as e:
@@ -459,8 +562,8 @@ def staff_reassign_seat(db: Session, booking_id: int, new_seat_number: str) -> B
         raise HTTPException(status_code=400, detail=f"Место {new_seat_number} уже занято другим пассажиром")
         
     # Template validation
-    seat_map = get_flight_seat_map(db, booking.flight_id)
-    if not any(s.seat_number == new_seat_number for s in seat_map.seats):
+    occupancy = seat_occupancy.get(db, booking.flight)
+    if occupancy is None or new_seat_number not in occupancy.seat_index:
          raise HTTPException(status_code=400, detail=f"Места {new_seat_number} не существует в конфигурации самолета")
     
     try:
@@ -480,6 +583,7 @@ def staff_reassign_seat(db: Session, booking_id: int, new_seat_number: str) -> B
             message=msg + ". Пожалуйста, используйте обновленный посадочный талон.",
             flight_id=booking.flight_id,
             created_by=booking.passenger_id,
+            recipient_id=booking.passenger_id,
             created_at=datetime.utcnow()
         ))
         
@@ -492,7 +596,10 @@ def staff_reassign_seat(db: Session, booking_id: int, new_seat_number: str) -> B
             created_at=datetime.utcnow()
         ))
         
+        bump_flight_version(db, booking.flight_id)
         db.commit()
+        seat_occupancy.release(booking.flight_id, [old_seat])
+        seat_occupancy.mark_confirmed(booking.flight_id, [new_seat_number])
         db.refresh(booking)
         return booking
     except Exception as e:
@@ -501,36 +608,55 @@ def staff_reassign_seat(db: Session, booking_id: int, new_seat_number: str) -> B
 
 
 
-def get_user_trips(db: Session, current_user: User) -> List[TripSchema]:
+def _trip_bookings_filter(current_user: User):
+    """
+    Relevant bookings: self, linked via Passport, and everything sharing their PNR or checkout
+    (subqueries over the pnr / payments.booking_id / payments.checkout_id indexes).
+    """
+    own = or_(
+        Booking.passenger_id == current_user.id,
+        and_(Booking.passport_number == current_user.passport_number, Booking.passport_number != None)
+    )
+    own_ids = select(Booking.id).where(own)
+    my_pnrs = select(Booking.pnr).where(own, Booking.pnr != None)
+    my_checkouts = select(Payment.checkout_id).where(Payment.booking_id.in_(own_ids), Payment.checkout_id != None)
+    linked_by_checkout = select(Payment.booking_id).where(Payment.checkout_id.in_(my_checkouts))
+    return or_(
+        Booking.pnr.in_(my_pnrs),
+        Booking.id.in_(linked_by_checkout),
+        own
+    )
+
+
+def _flight_history_filter(user_id: int):
+    """Trip history: flight broadcasts + my personal messages."""
+    return or_(
+        Announcement.recipient_id.is_(None),
+        Announcement.recipient_id == user_id
+    )
+
+
+def flight_history(db: Session, user_id: int, flight_ids) -> dict:
+    """Trip history of several flights in one query, partitioned by flight (oldest first)."""
+    history_by_flight = {}
+    if flight_ids:
+        for h in db.query(Announcement).filter(
+            Announcement.flight_id.in_(flight_ids),
+            _flight_history_filter(user_id)
+        ).order_by(Announcement.created_at.asc(), Announcement.id.asc()):
+            history_by_flight.setdefault(h.flight_id, []).append(h)
+    return history_by_flight
+
+
+def get_user_trips(db: Session, current_user: User, include_history: bool = True) -> List[TripSchema]:
     """
     Complex retrieval of user trips. 
     Includes group bookings (where user is primary or companion).
+    History of all trip flights comes from one query; with include_history=False it is
+    left empty and loaded per trip via get_trip_history.
     """
-    # Pre-fetch staff IDs for announcement filtering (Optimization)
-    staff_ids_subquery = db.query(User.id).filter(User.role.in_([UserRole.STAFF, UserRole.ADMIN])).all()
-    staff_ids = [s[0] for s in staff_ids_subquery]
-
-    # 1. Find all relevant bookings (Self or linked via PNR/Passport)
-    user_bookings = db.query(Booking).filter(
-        or_(
-            Booking.passenger_id == current_user.id,
-            and_(Booking.passport_number == current_user.passport_number, Booking.passport_number != None)
-        )
-    ).all()
-    
-    my_pnrs = {b.pnr for b in user_bookings if b.pnr}
-    user_booking_ids = [b.id for b in user_bookings]
-    
-    transaction_ids = set()
-    if user_booking_ids:
-        tx_query = db.query(Payment.transaction_id).filter(Payment.booking_id.in_(user_booking_ids)).all()
-        transaction_ids = {tx[0] for tx in tx_query if tx[0]}
-    
-    linked_by_tx_ids = set()
-    if transaction_ids:
-        linked_tx_query = db.query(Payment.booking_id).filter(Payment.transaction_id.in_(list(transaction_ids))).all()
-        linked_by_tx_ids = {l[0] for l in linked_tx_query}
-        
+
+    # 1. Relevant bookings, one round-trip
     # Full fetch with joins
     final_bookings = db.query(Booking).options(
         joinedload(Booking.flight).joinedload(Flight.aircraft),
@@ -538,20 +664,22 @@ def get_user_trips(db: Session, current_user: User) -> List[TripSchema]:
         joinedload(Booking.flight).joinedload(Flight.destination_airport),
         joinedload(Booking.ticket),
         joinedload(Booking.payment)
-    ).filter(
-        or_(
-            Booking.pnr.in_(list(my_pnrs)) if my_pnrs else False,
-            Booking.id.in_(list(linked_by_tx_ids)) if linked_by_tx_ids else False,
-            Booking.passenger_id == current_user.id,
-            and_(Booking.passport_number == current_user.passport_number, Booking.passport_number != None)
-        )
-    ).all()
+    ).filter(_trip_bookings_filter(current_user)).all()
     
     # Pre-fetch holds for the session
     now = datetime.utcnow()
     holds = db.query(SeatHold).filter(SeatHold.passenger_id == current_user.id, SeatHold.expires_at > now).all()
     active_holds = { (h.flight_id, h.seat_number): h for h in holds }
     
+    # History of every trip flight in one query, partitioned by flight (shared by its bookings)
+    history_by_flight = {}
+    if include_history:
+        history_by_flight = {
+            flight_id: [AnnouncementSchema.model_validate(h) for h in items]
+            for flight_id, items in flight_history(db, current_user.id, {b.flight_id for b in final_bookings}).items()
+        }
+    flight_schemas = {}
+    
     trips = []
     for b in final_bookings:
         expires_at = None
@@ -560,19 +688,12 @@ def get_user_trips(db: Session, current_user: User) -> List[TripSchema]:
             if not hold: continue
             expires_at = hold.expires_at.replace(tzinfo=timezone.utc)
             
-        # Get history (using pre-fetched staff_ids)
-        history_announcements = db.query(Announcement).filter(
-            Announcement.flight_id == b.flight_id,
-            or_(
-                Announcement.created_by == current_user.id,
-                Announcement.created_by.in_(staff_ids)
-            )
-        ).order_by(Announcement.created_at.asc()).all()
-        
-        history = [AnnouncementSchema.model_validate(h) for h in history_announcements]
+        flight_schema = flight_schemas.get(b.flight_id)
+        if flight_schema is None:
+            flight_schema = flight_schemas[b.flight_id] = FlightSchema.model_validate(b.flight)
 
         trips.append(TripSchema(
-            id=b.id, passenger_id=b.passenger_id, flight_id=b.flight_id, flight=FlightSchema.model_validate(b.flight),
+            id=b.id, passenger_id=b.passenger_id, flight_id=b.flight_id, flight=flight_schema,
             seat_number=b.seat_number, price=b.price, status=b.status.value, created_at=b.created_at,
             pnr=b.pnr or "-", gate=b.flight.gate, terminal=b.flight.terminal,
             payment_method=b.payment_method.value if b.payment_method else "CARD",
@@ -582,39 +703,59 @@ def get_user_trips(db: Session, current_user: User) -> List[TripSchema]:
             date_of_birth=b.date_of_birth, confirmed_at=b.confirmed_at,
             checked_in_at=b.ticket.checked_in_at if b.ticket else None,
             transaction_id=b.payment.transaction_id if b.payment else None,
-            history=history
+            history=history_by_flight.get(b.flight_id, [])
         ))
     return trips
 
 
+def get_trip_history(
+    db: Session,
+    current_user: User,
+    booking_id: int,
+    before_id: Optional[int] = None,
+    limit: int = settings.INBOX_PAGE_SIZE
+) -> AnnouncementPage:
+    """History of one trip, newest first, keyset-paginated by announcement id."""
+    booking = db.query(Booking).filter(Booking.id == booking_id, _trip_bookings_filter(current_user)).first()
+    if not booking:
+        raise HTTPException(status_code=404, detail="Бронирование не найдено")
+    
+    limit = max(1, min(limit, settings.INBOX_MAX_PAGE_SIZE))
+    query = db.query(Announcement).filter(
+        Announcement.flight_id == booking.flight_id,
+        _flight_history_filter(current_user.id)
+    )
+    if before_id is not None:
+        query = query.filter(Announcement.id < before_id)
+    items = query.order_by(Announcement.id.desc()).limit(limit).all()
+    return AnnouncementPage(
+        items=items,
+        next_before_id=items[-1].id if len(items) == limit else None
+    )
+
+
 def get_user_payments(db: Session, user_id: int) -> list:
-    """Retrieves payment history for a user, grouped by transaction ID."""
-    payments = db.query(Payment).options(
-        joinedload(Payment.booking).joinedload(Booking.flight)
-    ).filter(Payment.passenger_id == user_id).order_by(Payment.created_at.desc()).all()
+    """Retrieves payment history for a user: one entry per checkout with its line items."""
+    checkouts = db.query(Checkout).options(
+        joinedload(Checkout.flight),
+        selectinload(Checkout.items).joinedload(Payment.booking)
+    ).filter(Checkout.passenger_id == user_id).order_by(Checkout.created_at.desc()).all()
     
-    grouped = {}
-    for p in payments:
-        if p.transaction_id not in grouped:
-            grouped[p.transaction_id] = {
-                "transaction_id": p.transaction_id,
-                "amount": 0,
-                "currency": p.currency,
-                "method": p.method,
-                "status": p.status,
-                "created_at": p.created_at,
-                "flight_info": f"{p.booking.flight.flight_number if p.booking else ''}",
-                "items": []
-            }
-        
-        grouped[p.transaction_id]["amount"] += p.amount
-        grouped[p.transaction_id]["items"].append({
+    return [{
+        "transaction_id": c.transaction_id,
+        "amount": c.amount,
+        "currency": c.currency,
+        "method": c.method,
+        "status": c.status,
+        "created_at": c.created_at,
+        "flight_info": c.flight.flight_number if c.flight else "",
+        "items": [{
             "pnr": p.booking.pnr if p.booking else "-",
             "booking_id": p.booking_id,
             "amount": p.amount,
             "seat_number": p.booking.seat_number if p.booking else "?"
-        })
-    return list(grouped.values())
+        } for p in c.items]
+    } for c in checkouts]
 
 
 def cancel_booking_full(db: Session, booking_id: int, user_id: int) -> dict:
@@ -643,10 +784,13 @@ def cancel_booking_full(db: Session, booking_id: int, user_id: int) -> dict:
             title="Бронирование отменено", 
             message=f"Ваша бронь места {seat_number} на рейс {booking.flight.flight_number} была успешно отменена.", 
             flight_id=flight_id, 
-            created_by=user_id
+            created_by=user_id,
+            recipient_id=user_id
         ))
         
+        bump_flight_version(db, flight_id)
         db.commit()
+        seat_occupancy.release(flight_id, [seat_number])
         return {"success": True, "message": f"Бронирование места {seat_number} отменено."}
     except Exception as e:
         db.rollback()
@@ -668,6 +812,7 @@ def get_all_payments_staff(db: Session, status: Optional[TransactionStatus] = No
     return [{
         "id": p.id,
         "transaction_id": p.transaction_id,
+        "checkout_id": p.checkout_id,
         "booking_id": p.booking_id,
         "passenger_id": p.passenger_id,
         "passenger_name": p.passenger.full_name if p.passenger else "Unknown",
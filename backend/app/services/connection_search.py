@@ -0,0 +1,288 @@
+"""
+Connection Search.
+Поиск стыковочных маршрутов по графу рейсов.
+
+Аэропорты — вершины, предстоящие неотменённые рейсы — рёбра с временем
+вылета и прилёта (time-expanded граф). Рёбра хранятся двумя способами:
+по аэропорту вылета и по паре аэропортов, каждый список отсортирован по
+времени вылета, поэтому окно стыковки [прилёт + min, прилёт + max]
+находится бинарным поиском. Последнее плечо ищется сразу по паре
+(аэропорт стыковки, пункт назначения), предпоследнее — только в аэропорты,
+из которых есть рейс в пункт назначения.
+
+Граф строится одним запросом и обновляется по рейсу после commit
+(upsert/remove); списки заменяются копиями, поэтому поиск читает их без
+блокировки. CONNECTION_GRAPH_TTL_SECONDS ограничивает расхождение с
+изменениями в обход сервисов и убирает вылетевшие рейсы.
+"""
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.flight import Flight, FlightStatus
+
+# Рейсы, которые ещё можно включить в маршрут
+BOOKABLE_STATUSES = (FlightStatus.SCHEDULED, FlightStatus.DELAYED)
+
+SORT_KEYS = ("duration", "price")
+
+
+class Edge(NamedTuple):
+    departure: float  # unix-время вылета (naive UTC)
+    arrival: float
+    origin_id: int
+    destination_id: int
+    flight_id: int
+    price: float
+
+
+# Отсортированный по вылету список рейсов: (ключи вылета, рёбра)
+EdgeList = Tuple[Tuple[float, ...], Tuple[Edge, ...]]
+EMPTY_EDGES: EdgeList = ((), ())
+
+
+class Itinerary(NamedTuple):
+    legs: Tuple[Edge, ...]
+
+    @property
+    def departure(self) -> float:
+        return self.legs[0].departure
+
+    @property
+    def arrival(self) -> float:
+        return self.legs[-1].arrival
+
+    @property
+    def duration(self) -> float:
+        return self.arrival - self.departure
+
+    @property
+    def price(self) -> float:
+        return sum(leg.price for leg in self.legs)
+
+    @property
+    def layovers(self) -> List[float]:
+        return [nxt.departure - prev.arrival for prev, nxt in zip(self.legs, self.legs[1:])]
+
+
+def _to_timestamp(value: datetime) -> float:
+    # В БД время хранится как naive UTC
+    return (value - datetime(1970, 1, 1)).total_seconds()
+
+
+def _with_edge(edges: EdgeList, edge: Edge) -> EdgeList:
+    keys, items = edges
+    position = bisect_right(keys, edge.departure)
+    return (
+        keys[:position] + (edge.departure,) + keys[position:],
+        items[:position] + (edge,) + items[position:],
+    )
+
+
+def _without_edge(edges: EdgeList, edge: Edge) -> EdgeList:
+    keys, items = edges
+    position = bisect_left(keys, edge.departure)
+    while position < len(items) and items[position].flight_id != edge.flight_id:
+        position += 1
+    if position == len(items):
+        return edges
+    return keys[:position] + keys[position + 1:], items[:position] + items[position + 1:]
+
+
+def _window(edges: EdgeList, start: float, end: float) -> Tuple[Edge, ...]:
+    """Рейсы с вылетом в [start, end]."""
+    keys, items = edges
+    return items[bisect_left(keys, start):bisect_right(keys, end)]
+
+
+class FlightGraph:
+    """Снимок графа рейсов: рёбра по аэропорту вылета и по маршруту."""
+
+    def __init__(self, edges: List[Edge]):
+        self.loaded_at = time.monotonic()
+        self.edges: Dict[int, Edge] = {}
+        self.by_origin: Dict[int, EdgeList] = {}
+        self.by_route: Dict[Tuple[int, int], EdgeList] = {}
+        # Пункт назначения -> аэропорты, откуда в него есть рейс
+        self.inbound: Dict[int, Set[int]] = {}
+
+        origins: Dict[int, List[Edge]] = {}
+        routes: Dict[Tuple[int, int], List[Edge]] = {}
+        for edge in edges:
+            self.edges[edge.flight_id] = edge
+            origins.setdefault(edge.origin_id, []).append(edge)
+            routes.setdefault((edge.origin_id, edge.destination_id), []).append(edge)
+        for target, grouped in ((self.by_origin, origins), (self.by_route, routes)):
+            for key, items in grouped.items():
+                items.sort()
+                target[key] = (tuple(e.departure for e in items), tuple(items))
+        for origin_id, destination_id in self.by_route:
+            self.inbound.setdefault(destination_id, set()).add(origin_id)
+
+    def add(self, edge: Edge) -> None:
+        route = (edge.origin_id, edge.destination_id)
+        self.edges[edge.flight_id] = edge
+        self.by_origin[edge.origin_id] = _with_edge(self.by_origin.get(edge.origin_id, EMPTY_EDGES), edge)
+        self.by_route[route] = _with_edge(self.by_route.get(route, EMPTY_EDGES), edge)
+        self.inbound.setdefault(edge.destination_id, set()).add(edge.origin_id)
+
+    def remove(self, flight_id: int) -> None:
+        edge = self.edges.pop(flight_id, None)
+        if edge is None:
+            return
+        route = (edge.origin_id, edge.destination_id)
+        self.by_origin[edge.origin_id] = _without_edge(self.by_origin[edge.origin_id], edge)
+        self.by_route[route] = _without_edge(self.by_route[route], edge)
+        if not self.by_route[route][0]:
+            del self.by_route[route]
+            self.inbound[edge.destination_id].discard(edge.origin_id)
+
+    def itineraries(
+        self,
+        origin_id: int,
+        destination_id: int,
+        first_departure: Tuple[float, float],
+        max_legs: int,
+        min_connection: float,
+        max_connection: float
+    ) -> List[Itinerary]:
+        """
+        Все маршруты origin -> destination не длиннее max_legs плеч с первым
+        вылетом в окне first_departure и стыковками в [min_connection, max_connection]
+        секунд; аэропорты внутри маршрута не повторяются.
+        """
+        found: List[Itinerary] = []
+        feeders = self.inbound.get(destination_id, set())
+
+        def extend(path: Tuple[Edge, ...], visited: Set[int]) -> None:
+            last = path[-1]
+            start, end = last.arrival + min_connection, last.arrival + max_connection
+            # Прямой рейс до пункта назначения из текущего аэропорта
+            for edge in _window(self.by_route.get((last.destination_id, destination_id), EMPTY_EDGES), start, end):
+                found.append(Itinerary(path + (edge,)))
+            if len(path) + 1 >= max_legs:
+                return
+            for edge in _window(self.by_origin.get(last.destination_id, EMPTY_EDGES), start, end):
+                hub = edge.destination_id
+                if hub in visited or hub == destination_id:
+                    continue
+                # Предпоследнее плечо — только туда, откуда летают в пункт назначения
+                if len(path) + 2 == max_legs and hub not in feeders:
+                    continue
+                visited.add(hub)
+                extend(path + (edge,), visited)
+                visited.discard(hub)
+
+        for edge in _window(self.by_origin.get(origin_id, EMPTY_EDGES), *first_departure):
+            if edge.destination_id == destination_id:
+                found.append(Itinerary((edge,)))
+            elif max_legs > 1 and edge.destination_id != origin_id:
+                if max_legs == 2 and edge.destination_id not in feeders:
+                    continue
+                extend((edge,), {origin_id, edge.destination_id})
+        return found
+
+
+class ConnectionSearchIndex:
+    """In-process граф рейсов для поиска стыковок."""
+
+    def __init__(self, ttl_seconds: int = settings.CONNECTION_GRAPH_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._graph: Optional[FlightGraph] = None
+        # Растёт при каждом изменении: граф, построенный раньше, не попадёт в кэш
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def graph(self, db: Session) -> FlightGraph:
+        with self._lock:
+            graph = self._graph
+            if graph is not None and time.monotonic() - graph.loaded_at < self.ttl_seconds:
+                return graph
+            generation = self._generation
+
+        rows = db.query(
+            Flight.id, Flight.origin_airport_id, Flight.destination_airport_id,
+            Flight.scheduled_departure, Flight.scheduled_arrival, Flight.base_price
+        ).filter(
+            Flight.scheduled_departure >= datetime.utcnow(),
+            Flight.status.in_(BOOKABLE_STATUSES)
+        ).all()
+        graph = FlightGraph([
+            Edge(_to_timestamp(departure), _to_timestamp(arrival), origin_id, destination_id, flight_id, price)
+            for flight_id, origin_id, destination_id, departure, arrival, price in rows
+        ])
+
+        with self._lock:
+            if generation == self._generation:
+                self._graph = graph
+        return graph
+
+    def search(
+        self,
+        db: Session,
+        origin_id: int,
+        destination_id: int,
+        day: date,
+        not_before: Optional[datetime] = None,
+        max_legs: int = 2,
+        min_connection: timedelta = timedelta(minutes=settings.CONNECTION_MIN_MINUTES),
+        max_connection: timedelta = timedelta(minutes=settings.CONNECTION_MAX_MINUTES),
+        sort_by: str = "duration",
+        limit: int = 20
+    ) -> List[Itinerary]:
+        """Лучшие маршруты с первым вылетом в день day (не раньше not_before)."""
+        start = datetime.combine(day, dtime.min)
+        if not_before is not None:
+            start = max(start, not_before)
+        end = datetime.combine(day, dtime.min) + timedelta(days=1)
+        if start >= end or origin_id == destination_id:
+            return []
+
+        found = self.graph(db).itineraries(
+            origin_id, destination_id,
+            (_to_timestamp(start), _to_timestamp(end) - 1e-6),
+            max_legs, min_connection.total_seconds(), max_connection.total_seconds()
+        )
+        if sort_by == "price":
+            found.sort(key=lambda i: (i.price, i.duration, i.departure))
+        else:
+            found.sort(key=lambda i: (i.duration, len(i.legs), i.price, i.departure))
+        return found[:limit]
+
+    # Обновления (вызываются после commit)
+
+    def _apply(self, method: str, *args) -> None:
+        with self._lock:
+            self._generation += 1
+            graph = self._graph
+            if graph is not None:
+                getattr(graph, method)(*args)
+
+    def upsert(self, *flights: Flight) -> None:
+        """Перечитывает рёбра изменённых рейсов из объектов ORM."""
+        now = _to_timestamp(datetime.utcnow())
+        for flight in flights:
+            self._apply("remove", flight.id)
+            edge = Edge(
+                _to_timestamp(flight.scheduled_departure), _to_timestamp(flight.scheduled_arrival),
+                flight.origin_airport_id, flight.destination_airport_id, flight.id, flight.base_price
+            )
+            if flight.status in BOOKABLE_STATUSES and edge.departure >= now:
+                self._apply("add", edge)
+
+    def remove(self, *flight_ids: int) -> None:
+        for flight_id in flight_ids:
+            self._apply("remove", flight_id)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._graph = None
+
+
+connection_search = ConnectionSearchIndex()
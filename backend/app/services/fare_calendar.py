@@ -0,0 +1,131 @@
+"""
+Fare Calendar.
+Календарь минимальных цен по дням для маршрута.
+
+Все рейсы маршрута в диапазоне дат читаются одним запросом, занятые места
+этих рейсов (подтверждённые бронирования и действующие блокировки, как на
+карте мест) — вторым. Места берутся из раскладки шаблона самолёта и
+группируются по тарифу calculate_seat_price; цена "от" — самый дешёвый
+тариф, в котором осталось свободное место. Затем рейсы раскладываются в
+колонки array (день, цена, свободные места) и сводятся по дням за один проход.
+"""
+from array import array
+from collections import defaultdict
+from datetime import date, datetime, time as dtime, timedelta
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from sqlalchemy import select, union_all
+from sqlalchemy.orm import Session
+
+from app.models.aircraft import Aircraft
+from app.models.booking import Booking, BookingStatus, SeatHold
+from app.models.flight import Flight, FlightStatus
+from app.services.booking_service import calculate_seat_price
+from app.services.seat_layout import CompiledSeatLayout, seat_layouts
+
+
+@lru_cache(maxsize=64)
+def fare_tiers(layout: CompiledSeatLayout) -> Tuple[Tuple[str, FrozenSet[str]], ...]:
+    """
+    Места раскладки, сгруппированные по тарифу calculate_seat_price:
+    (любое место тарифа, все места тарифа). Раскладки неизменяемы, поэтому
+    группировка запоминается по объекту раскладки.
+    """
+    tiers: Dict[float, Set[str]] = defaultdict(set)
+    for seat_number in layout.seat_numbers:
+        tiers[calculate_seat_price(1.0, seat_number)].add(seat_number)
+    return tuple((min(seats), frozenset(seats)) for _, seats in sorted(tiers.items()))
+
+
+def _taken_seats(db: Session, flight_ids: List[int]) -> Dict[int, Set[str]]:
+    """Занятые места рейсов: подтверждённые бронирования и действующие блокировки."""
+    taken: Dict[int, Set[str]] = defaultdict(set)
+    if not flight_ids:
+        return taken
+    rows = db.execute(union_all(
+        select(Booking.flight_id, Booking.seat_number).where(
+            Booking.flight_id.in_(flight_ids), Booking.status == BookingStatus.CONFIRMED
+        ),
+        select(SeatHold.flight_id, SeatHold.seat_number).where(
+            SeatHold.flight_id.in_(flight_ids), SeatHold.expires_at > datetime.utcnow()
+        )
+    ))
+    for flight_id, seat_number in rows:
+        taken[flight_id].add(seat_number)
+    return taken
+
+
+def _cheapest_fare(db: Session, template_id: Optional[int], base_price: float, taken: Set[str]) -> Tuple[float, int]:
+    """Минимальная цена среди тарифов со свободными местами и число свободных мест."""
+    layout = seat_layouts.get(db, template_id) if template_id else None
+    if layout is None:
+        return float("inf"), 0
+    price, available = float("inf"), 0
+    for seat_number, seats in fare_tiers(layout):
+        free = len(seats - taken)
+        if free:
+            available += free
+            price = min(price, calculate_seat_price(base_price, seat_number))
+    return price, available
+
+
+def build_fare_calendar(
+    db: Session,
+    origin_id: int,
+    destination_id: int,
+    start_date: date,
+    end_date: date,
+    not_before: Optional[datetime] = None
+) -> List[Dict]:
+    """
+    Для каждого дня [start_date, end_date]: минимальная цена среди рейсов со
+    свободными местами, самый дешёвый рейс, число рейсов и свободных мест.
+    """
+    start = datetime.combine(start_date, dtime.min)
+    end = datetime.combine(end_date, dtime.min) + timedelta(days=1)
+    query = db.query(
+        Flight.id, Flight.scheduled_departure, Flight.base_price, Aircraft.seat_template_id
+    ).outerjoin(Aircraft, Flight.aircraft_id == Aircraft.id).filter(
+        Flight.origin_airport_id == origin_id,
+        Flight.destination_airport_id == destination_id,
+        Flight.scheduled_departure >= start,
+        Flight.scheduled_departure < end,
+        Flight.status != FlightStatus.CANCELLED
+    )
+    if not_before is not None:
+        query = query.filter(Flight.scheduled_departure >= not_before)
+    rows = query.order_by(Flight.scheduled_departure).all()
+    taken = _taken_seats(db, [r[0] for r in rows])
+    fares = [_cheapest_fare(db, r[3], r[2], taken.get(r[0], set())) for r in rows]
+
+    # Колонки по рейсам
+    flight_ids = array("q", (r[0] for r in rows))
+    day_index = array("H", ((r[1].date() - start_date).days for r in rows))
+    prices = array("d", (price for price, _ in fares))
+    available = array("l", (seats for _, seats in fares))
+
+    # Свёртка по дням
+    days = (end_date - start_date).days + 1
+    min_price = array("d", [float("inf")]) * days
+    cheapest = array("q", [0]) * days
+    flights = array("l", [0]) * days
+    seats = array("l", [0]) * days
+    for i in range(len(flight_ids)):
+        day = day_index[i]
+        flights[day] += 1
+        seats[day] += available[i]
+        if available[i] and prices[i] < min_price[day]:
+            min_price[day] = prices[i]
+            cheapest[day] = flight_ids[i]
+
+    return [
+        {
+            "date": start_date + timedelta(days=day),
+            "min_price": min_price[day] if cheapest[day] else None,
+            "cheapest_flight_id": cheapest[day] or None,
+            "flights": flights[day],
+            "available_seats": seats[day],
+        }
+        for day in range(days)
+    ]
@@ -0,0 +1,179 @@
+"""
+Flight Search Index.
+Индекс поиска рейсов по маршруту и дню вылета.
+
+Ключи: (origin_airport_id, destination_airport_id, день) и (город, город, день).
+Рейсы одного дня загружаются одним запросом по диапазону scheduled_departure
+и раскладываются по маршрутам в отсортированные списки (вылет, flight_id);
+города сводятся к множествам аэропортов через справочник аэропортов в памяти
+(сравнение городов — str.lower() в Python, SQLite lower() не знает кириллицу).
+Дни сбрасываются при изменении рейсов, справочник — при изменении аэропортов;
+FLIGHT_SEARCH_INDEX_TTL_SECONDS ограничивает расхождение с изменениями в обход сервисов.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.config import settings
+from app.models.airport import Airport
+from app.models.flight import Flight, FlightStatus
+
+# Рейсы одного дня: маршрут -> [(вылет, flight_id)] по возрастанию вылета
+DayBucket = Dict[Tuple[int, int], List[Tuple[datetime, int]]]
+
+
+def city_key(city: Optional[str]) -> str:
+    return (city or "").lower().strip()
+
+
+class AirportDirectory:
+    """Справочник аэропортов: код -> id и город -> множество id."""
+
+    def __init__(self, rows: Iterable[Tuple[int, str, str]]):
+        self.by_code: Dict[str, int] = {}
+        self.by_city: Dict[str, FrozenSet[int]] = {}
+        cities: Dict[str, set] = {}
+        for airport_id, code, city in rows:
+            self.by_code[code] = airport_id
+            cities.setdefault(city_key(city), set()).add(airport_id)
+        self.by_city = {city: frozenset(ids) for city, ids in cities.items()}
+
+
+class FlightSearchIndex:
+    """In-process кэш маршрутных списков рейсов по дням (поверх составного индекса БД)."""
+
+    def __init__(self, ttl_seconds: int = settings.FLIGHT_SEARCH_INDEX_TTL_SECONDS, max_days: int = 64):
+        self.ttl_seconds = ttl_seconds
+        self.max_days = max_days
+        self._days: "OrderedDict[date, Tuple[float, DayBucket]]" = OrderedDict()
+        self._airports: Optional[Tuple[float, AirportDirectory]] = None
+        # Растёт при каждой инвалидации: загрузка, начатая раньше, не попадёт в кэш
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    # Справочник аэропортов
+
+    def airports(self, db: Session) -> AirportDirectory:
+        cached = self._airports
+        if cached is not None and time.monotonic() - cached[0] < self.ttl_seconds:
+            return cached[1]
+        directory = AirportDirectory(db.query(Airport.id, Airport.code, Airport.city).all())
+        self._airports = (time.monotonic(), directory)
+        return directory
+
+    def airport_id(self, db: Session, code: str) -> Optional[int]:
+        airport_id = self.airports(db).by_code.get(code)
+        if airport_id is None:
+            # Аэропорт мог появиться в обход кэша (другой процесс) — проверяем БД
+            airport_id = db.query(Airport.id).filter(Airport.code == code).scalar()
+            if airport_id is not None:
+                self.invalidate_airports()
+        return airport_id
+
+    def city_airport_ids(self, db: Session, city: Optional[str]) -> Optional[FrozenSet[int]]:
+        """Аэропорты города (None — город не задан, пустое множество — не найден)."""
+        if not city or not city.strip():
+            return None
+        return self.airports(db).by_city.get(city_key(city), frozenset())
+
+    # Рейсы по дням
+
+    def _day(self, db: Session, day: date) -> DayBucket:
+        with self._lock:
+            cached = self._days.get(day)
+            if cached is not None and time.monotonic() - cached[0] < self.ttl_seconds:
+                self._days.move_to_end(day)
+                return cached[1]
+            generation = self._generation
+
+        start = datetime.combine(day, dtime.min)
+        rows = db.query(
+            Flight.id, Flight.origin_airport_id, Flight.destination_airport_id, Flight.scheduled_departure
+        ).filter(
+            Flight.scheduled_departure >= start,
+            Flight.scheduled_departure < start + timedelta(days=1),
+            Flight.status != FlightStatus.CANCELLED
+        ).all()
+
+        bucket: DayBucket = {}
+        for flight_id, origin_id, destination_id, departure in rows:
+            bucket.setdefault((origin_id, destination_id), []).append((departure, flight_id))
+        for entries in bucket.values():
+            entries.sort()
+
+        with self._lock:
+            if generation == self._generation:
+                self._days[day] = (time.monotonic(), bucket)
+                self._days.move_to_end(day)
+                while len(self._days) > self.max_days:
+                    self._days.popitem(last=False)
+        return bucket
+
+    def find_ids(
+        self,
+        db: Session,
+        day: date,
+        origin_ids: Optional[FrozenSet[int]] = None,
+        destination_ids: Optional[FrozenSet[int]] = None,
+        not_before: Optional[datetime] = None
+    ) -> List[int]:
+        """
+        Id неотменённых рейсов дня между множествами аэропортов (None — любой аэропорт),
+        с вылетом не раньше not_before, по возрастанию времени вылета.
+        """
+        bucket = self._day(db, day)
+        if origin_ids is not None and destination_ids is not None:
+            routes = [(o, d) for o in origin_ids for d in destination_ids]
+        else:
+            routes = [
+                route for route in bucket
+                if (origin_ids is None or route[0] in origin_ids)
+                and (destination_ids is None or route[1] in destination_ids)
+            ]
+
+        found = []
+        for route in routes:
+            for departure, flight_id in bucket.get(route, ()):
+                if not_before is None or departure >= not_before:
+                    found.append((departure, flight_id))
+        found.sort()
+        return [flight_id for _, flight_id in found]
+
+    def load_flights(self, db: Session, flight_ids: List[int]) -> List[Flight]:
+        """Рейсы по id в порядке списка (с самолётом и аэропортами одним запросом)."""
+        if not flight_ids:
+            return []
+        flights = db.query(Flight).options(
+            joinedload(Flight.aircraft),
+            joinedload(Flight.origin_airport),
+            joinedload(Flight.destination_airport)
+        ).filter(Flight.id.in_(flight_ids)).all()
+        order = {flight_id: position for position, flight_id in enumerate(flight_ids)}
+        flights.sort(key=lambda f: order[f.id])
+        return flights
+
+    # Инвалидация (вызывается после commit)
+
+    def invalidate_days(self, *departures: Optional[datetime]) -> None:
+        """Сбрасывает дни вылета изменённых рейсов."""
+        with self._lock:
+            self._generation += 1
+            for departure in departures:
+                if departure is not None:
+                    self._days.pop(departure.date(), None)
+
+    def invalidate_airports(self) -> None:
+        self._airports = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._days.clear()
+            self._airports = None
+
+
+flight_search_index = FlightSearchIndex()
@@ -4,19 +4,27 @@ Flight Service.
 """
 import math
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, func
 from sqlalchemy.orm import Session, joinedload, selectinload
 from fastapi import HTTPException, status
 
+from app.core.http_cache import make_etag
 from app.models.flight import Flight, FlightStatus
 from app.models.airport import Airport
-from app.models.booking import Booking, BookingStatus, Ticket, SeatHold
+from app.models.booking import Booking, BookingStatus, Ticket
 from app.models.announcement import Announcement
 from app.schemas.flight import FlightCreate, FlightUpdate, FlightSearch
 from app.schemas.seat import SeatMap, Seat, StaffSeat, StaffSeatMap
 from app.schemas.airport import AirportCreate
+from app.services.announcement_fanout import enqueue_fanout, flight_recipients
+from app.services.connection_search import connection_search
+from app.services.flight_search_index import flight_search_index
+from app.services.seat_layout import json_value
+from app.services.seat_occupancy import seat_occupancy, CONFIRMED, STATUS_LABELS
+from app.workers.announcement_fanout import announcement_fanout_worker
+from app.workers.flight_status import apply_status_transitions, flight_status_scheduler
 
 
 
@@ -46,25 +54,18 @@ def delete_airport(db: Session, airport_id: int) -> bool:
             )
         ).all()
         
+        fanouts = []
         for flight in flights:
-            # 2. Find confirmed bookings
-            bookings = db.query(Booking).filter(
-                Booking.flight_id == flight.id,
-                Booking.status == BookingStatus.CONFIRMED
-            ).all()
-            
-            # 3. Notify passengers and decouple announcements
-            for booking in bookings:
-                msg = f"Рейс {flight.flight_number} ({flight.departure_city} - {flight.arrival_city}) был отменен из-за закрытия аэропорта. Возврат будет произведен автоматически."
-                
-                ann = Announcement(
-                    title="Рейс отменен (Закрытие аэропорта)",
-                    message=msg,
-                    flight_id=None, # Survives flight deletion
-                    created_by=booking.passenger_id, # Targeted to user
-                    created_at=datetime.utcnow()
-                )
-                db.add(ann)
+            # 2-3. Notify passengers with confirmed bookings (delivered by the fan-out worker)
+            msg = f"Рейс {flight.flight_number} ({flight.departure_city} - {flight.arrival_city}) был отменен из-за закрытия аэропорта. Возврат будет произведен автоматически."
+            fanouts.append(enqueue_fanout(
+                db,
+                title="Рейс отменен (Закрытие аэропорта)",
+                message=msg,
+                recipients=flight_recipients(db, flight.id, (BookingStatus.CONFIRMED,)),
+                flight_id=flight.id,
+                announcement_flight_id=None # Survives flight deletion
+            ))
             
             # Delete flight (and cascade delete bookings/tickets/seat_holds)
             db.delete(flight)
@@ -72,6 +73,11 @@ def delete_airport(db: Session, airport_id: int) -> bool:
         # 4. Final removal
         db.delete(airport)
         db.commit()
+        seat_occupancy.invalidate(*(f.id for f in flights))
+        flight_search_index.reset()
+        connection_search.reset()
+        if any(fanouts):
+            announcement_fanout_worker.wake()
         return True
     except Exception as e:
         db.rollback()
@@ -86,86 +92,39 @@ def search_flights(
 ) -> List[Flight]:
     """
     Searches for available flights between two airports on a specific date.
-    Validates airports, updates current flight statuses, and applies a 2-hour booking cutoff.
+    Validates airports and applies a 2-hour booking cutoff.
     """
-    origin = db.query(Airport).filter(Airport.code == origin_code).first()
-    destination = db.query(Airport).filter(Airport.code == destination_code).first()
+    origin_id = flight_search_index.airport_id(db, origin_code)
+    destination_id = flight_search_index.airport_id(db, destination_code)
     
-    if not origin:
+    if origin_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Аэропорт отправления {origin_code} не найден"
         )
-    if not destination:
+    if destination_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Аэропорт прибытия {destination_code} не найден"
         )
     
-    # 1. Ensure statuses are fresh
-    update_flight_statuses(db)
-    
-    # 2. Define search window
-    now = datetime.utcnow()
-    booking_cutoff = now + timedelta(hours=2)
-    start_of_day = departure_date.replace(hour=0, minute=0, second=0, microsecond=0)
-    end_of_day = start_of_day + timedelta(days=1)
-    
-    # Visibility: Must be after cutoff and within the requested day
-    actual_search_start = max(start_of_day, booking_cutoff)
-    
-    return db.query(Flight).options(joinedload(Flight.aircraft)).filter(
-        and_(
-            Flight.origin_airport_id == origin.id,
-            Flight.destination_airport_id == destination.id,
-            Flight.scheduled_departure >= actual_search_start,
-            Flight.scheduled_departure < end_of_day,
-            Flight.status != FlightStatus.CANCELLED
-        )
-    ).all()
+    # Visibility: Must be after the 2-hour cutoff and within the requested day
+    booking_cutoff = datetime.utcnow() + timedelta(hours=2)
+    flight_ids = flight_search_index.find_ids(
+        db, departure_date.date(), frozenset([origin_id]), frozenset([destination_id]), not_before=booking_cutoff
+    )
+    return flight_search_index.load_flights(db, flight_ids)
 
 
 def update_flight_statuses(db: Session) -> None:
     """
-    State machine for flight lifecycle.
+    One-off catch-up for the flight lifecycle state machine.
     SCHEDULED -> BOARDING (2h) -> DEPARTED (0h) -> ARRIVED (End).
-    Executed proactively by search and retrieval logic.
+    Regular transitions are applied by the background FlightStatusScheduler;
+    this sweep is only for scripts and maintenance.
     """
-    now = datetime.utcnow()
-    affected = False
-    
     try:
-        # 1. Scheduled -> Boarding (2 hours before departure)
-        boarding_limit = now + timedelta(hours=2)
-        to_boarding = db.query(Flight).filter(
-            Flight.status == FlightStatus.SCHEDULED,
-            Flight.scheduled_departure <= boarding_limit,
-            Flight.scheduled_departure > now
-        ).all()
-        for f in to_boarding:
-            f.status = FlightStatus.BOARDING
-            affected = True
-            
-        # 2. Boarding/Scheduled -> Departed (Departure time reached)
-        to_departed = db.query(Flight).filter(
-            Flight.status.in_([FlightStatus.SCHEDULED, FlightStatus.BOARDING]),
-            Flight.scheduled_departure <= now,
-            Flight.scheduled_arrival > now
-        ).all()
-        for f in to_departed:
-            f.status = FlightStatus.DEPARTED
-            affected = True
-            
-        # 3. Departed -> Arrived (Arrival time reached)
-        to_arrived = db.query(Flight).filter(
-            Flight.status == FlightStatus.DEPARTED,
-            Flight.scheduled_arrival <= now
-        ).all()
-        for f in to_arrived:
-            f.status = FlightStatus.ARRIVED
-            affected = True
-            
-        if affected:
+        if apply_status_transitions(db):
             db.commit()
     except Exception:
         db.rollback()
@@ -173,7 +132,6 @@ def update_flight_statuses(db: Session) -> None:
 
 def get_flights_by_status(db: Session, statuses: List[FlightStatus]) -> List[Flight]:
     """Retrieves all flights matching the provided operational statuses."""
-    update_flight_statuses(db)
     return db.query(Flight).options(
         joinedload(Flight.origin_airport),
         joinedload(Flight.destination_airport)
@@ -190,6 +148,7 @@ def create_airport(db: Session, airport_data: AirportCreate) -> Airport:
         db.add(airport)
         db.commit()
         db.refresh(airport)
+        flight_search_index.invalidate_airports()
         return airport
     except Exception as e:
         db.rollback()
@@ -209,8 +168,7 @@ def get_airport_detail(db: Session, airport_id: int) -> Airport:
 
 
 def get_flight_by_id(db: Session, flight_id: int) -> Flight:
-    """Retrieves a flight by its ID, ensuring statuses are synchronized first."""
-    update_flight_statuses(db)
+    """Retrieves a flight by its ID with aircraft and airports preloaded."""
     flight = db.query(Flight).options(
         joinedload(Flight.aircraft),
         joinedload(Flight.origin_airport),
@@ -286,103 +244,174 @@ def _build_seats(
 
 def get_flight_seat_map(db: Session, flight_id: int) -> SeatMap:
     """Generates a visual seat map for passengers with real-time occupancy."""
-    from app.services.booking_service import cleanup_expired_holds
-    cleanup_expired_holds(db)
-    
     flight = get_flight_by_id(db, flight_id)
-    if not flight.aircraft or not flight.aircraft.seat_template:
+    occupancy = seat_occupancy.get(db, flight)
+    if occupancy is None:
         return SeatMap(flight_id=flight_id, seats=[], total_seats=0, available_seats=0, occupied_seats=0)
-        
-    confirmed = db.query(Booking.seat_number).filter(
-        Booking.flight_id == flight_id, Booking.status == BookingStatus.CONFIRMED
-    ).all()
-    occupied_seats = {c[0] for c in confirmed}
-    
-    active_holds = db.query(SeatHold.seat_number).filter(
-        SeatHold.flight_id == flight_id, SeatHold.expires_at > datetime.utcnow()
-    ).all()
-    held_seats = {h[0] for h in active_holds}
     
-    template_map = flight.aircraft.seat_template.seat_map or {"seats": []}
-    seats_list = []
+    # Статус и цена накладываются на скомпилированный скелет раскладки
+    layout = occupancy.layout
+    states, counts = occupancy.snapshot()
+    seats_list = [
+        Seat.model_construct(
+            **layout.seat_fields[slot],
+            status=STATUS_LABELS[states[slot]],
+            price=layout.price(slot, flight.base_price)
+        )
+        for slot in range(layout.size)
+    ]
     
-    for s_data in template_map.get("seats", []):
-        seat_num = s_data["seat_number"]
-        
-        status = "available"
-        if seat_num in occupied_seats: status = "occupied"
-        elif seat_num in held_seats: status = "reserved"
-            
-        multiplier = 2.0 if s_data.get("class") == "BUSINESS" else 1.0
-        
-        seats_list.append(Seat(
-            seat_number=seat_num, row=s_data["row"], column=s_data["letter"],
-            seat_type=s_data["class"].lower(), status=status,
-            is_emergency_exit=s_data.get("is_emergency_exit", False),
-            price=flight.base_price * multiplier
-        ))
-        
     return SeatMap(
         flight_id=flight_id,
         seats=seats_list,
-        total_seats=len(seats_list),
-        available_seats=len([s for s in seats_list if s.status == "available"]),
-        occupied_seats=len([s for s in seats_list if s.status == "occupied"])
+        total_seats=counts["total"],
+        available_seats=counts["available"],
+        occupied_seats=counts["occupied"]
     )
 
 
-def get_staff_flight_seat_map(db: Session, flight_id: int) -> StaffSeatMap:
-    """Generates an administrative seat map with passenger details."""
-    flight = get_flight_by_id(db, flight_id)
-    if not flight.aircraft or not flight.aircraft.seat_template:
-        return StaffSeatMap(flight_id=flight_id, seats=[], total_seats=0, available_seats=0, occupied_seats=0)
-        
-    confirmed = db.query(Booking).filter(
+def _get_seat_passengers(db: Session, flight_id: int) -> dict:
+    """seat_number -> (имя пассажира, booking_id) для подтверждённых мест рейса."""
+    confirmed = db.query(
+        Booking.seat_number, Booking.first_name, Booking.last_name, Booking.id
+    ).filter(
         Booking.flight_id == flight_id, Booking.status == BookingStatus.CONFIRMED
     ).all()
     
-    occupied_info = {
-        b.seat_number: (f"{b.first_name or ''} {b.last_name or ''}".strip() or "BLOCK", b.id)
-        for b in confirmed
+    return {
+        seat_number: (f"{first_name or ''} {last_name or ''}".strip() or "BLOCK", booking_id)
+        for seat_number, first_name, last_name, booking_id in confirmed
     }
+
+
+def get_staff_flight_seat_map(db: Session, flight_id: int) -> StaffSeatMap:
+    """Generates an administrative seat map with passenger details."""
+    flight = get_flight_by_id(db, flight_id)
+    occupancy = seat_occupancy.get(db, flight)
+    if occupancy is None:
+        return StaffSeatMap(flight_id=flight_id, seats=[], total_seats=0, available_seats=0, occupied_seats=0)
     
-    active_holds = db.query(SeatHold.seat_number).filter(
-        SeatHold.flight_id == flight_id, SeatHold.expires_at > datetime.utcnow()
-    ).all()
-    held_seats = {h[0] for h in active_holds}
-    
-    template_map = flight.aircraft.seat_template.seat_map or {"seats": []}
+    # Статусы берутся из карты занятости; из БД читаются только данные пассажиров
+    occupied_info = _get_seat_passengers(db, flight_id)
+    layout = occupancy.layout
+    states, counts = occupancy.snapshot()
     seats_list = []
     
-    for s_data in template_map.get("seats", []):
-        seat_num = s_data["seat_number"]
-        status, p_name, b_id = "available", None, None
-        
-        if seat_num in occupied_info:
-            status = "occupied"
-            p_name, b_id = occupied_info[seat_num]
-        elif seat_num in held_seats:
-            status = "reserved"
-            
-        multiplier = 2.0 if s_data.get("class") == "BUSINESS" else 1.0
+    for slot in range(layout.size):
+        p_name, b_id = None, None
+        if states[slot] == CONFIRMED:
+            p_name, b_id = occupied_info.get(layout.seat_numbers[slot], (None, None))
         
-        seats_list.append(StaffSeat(
-            seat_number=seat_num, row=s_data["row"], column=s_data["letter"],
-            seat_type=s_data["class"].lower(), status=status,
+        seats_list.append(StaffSeat.model_construct(
+            **layout.seat_fields[slot],
+            status=STATUS_LABELS[states[slot]],
             passenger_name=p_name, booking_id=b_id,
-            is_emergency_exit=s_data.get("is_emergency_exit", False),
-            price=flight.base_price * multiplier
+            price=layout.price(slot, flight.base_price)
         ))
     
     return StaffSeatMap(
         flight_id=flight_id,
         seats=seats_list,
-        total_seats=len(seats_list),
-        available_seats=len([s for s in seats_list if s.status == "available"]),
-        occupied_seats=len([s for s in seats_list if s.status == "occupied"])
+        total_seats=counts["total"],
+        available_seats=counts["available"],
+        occupied_seats=counts["occupied"]
     )
 
 
+# Быстрые ответы карт мест (SEAT_MAP_FAST_RESPONSE): тот же JSON, что даёт
+# сериализация SeatMap/StaffSeatMap, но собранный из готовых фрагментов
+# раскладки без создания Pydantic-объектов.
+STAFF_SEAT_EMPTY_EXTRA = ',"passenger_name":null,"booking_id":null'
+
+
+EMPTY_SEAT_COUNTS = {"total": 0, "available": 0, "occupied": 0, "reserved": 0}
+
+
+def _encode_seat_map(flight_id: int, seat_fragments: List[str], counts: dict) -> Tuple[bytes, dict]:
+    content = (
+        '{"flight_id":%d,"seats":[%s],"total_seats":%d,"available_seats":%d,"occupied_seats":%d}' % (
+            flight_id, ",".join(seat_fragments),
+            counts["total"], counts["available"], counts["occupied"]
+        )
+    ).encode()
+    return content, counts
+
+
+def encode_flight_seat_map(db: Session, flight_id: int) -> Tuple[bytes, dict]:
+    """Карта мест пассажира (как get_flight_seat_map) в виде готового JSON + счётчики мест."""
+    flight = get_flight_by_id(db, flight_id)
+    occupancy = seat_occupancy.get(db, flight)
+    if occupancy is None:
+        return _encode_seat_map(flight_id, [], EMPTY_SEAT_COUNTS)
+    
+    rendered = occupancy.layout.rendered_seats(flight.base_price, STATUS_LABELS)
+    states, counts = occupancy.snapshot()
+    fragments = [rendered[state][slot] for slot, state in enumerate(states)]
+    return _encode_seat_map(flight_id, fragments, counts)
+
+
+def encode_staff_flight_seat_map(db: Session, flight_id: int) -> Tuple[bytes, dict]:
+    """Карта мест для персонала (как get_staff_flight_seat_map) в виде готового JSON + счётчики мест."""
+    flight = get_flight_by_id(db, flight_id)
+    occupancy = seat_occupancy.get(db, flight)
+    if occupancy is None:
+        return _encode_seat_map(flight_id, [], EMPTY_SEAT_COUNTS)
+    
+    occupied_info = _get_seat_passengers(db, flight_id)
+    layout = occupancy.layout
+    rendered = layout.rendered_seats(flight.base_price, STATUS_LABELS, STAFF_SEAT_EMPTY_EXTRA)
+    states, counts = occupancy.snapshot()
+    fragments = []
+    
+    for slot, state in enumerate(states):
+        info = occupied_info.get(layout.seat_numbers[slot]) if state == CONFIRMED else None
+        if info is None:
+            fragments.append(rendered[state][slot])
+        else:
+            extra = ',"passenger_name":%s,"booking_id":%d' % (json_value(info[0]), info[1])
+            fragments.append(layout.seat_json(slot, STATUS_LABELS[state], flight.base_price, extra))
+    
+    return _encode_seat_map(flight_id, fragments, counts)
+
+
+def bump_flight_version(db: Session, *flight_ids: int) -> None:
+    """
+    Увеличивает Flight.version (в текущей транзакции, без commit).
+    Вызывается при любом изменении рейса или занятости его мест — от версии зависят ETag.
+    """
+    if flight_ids:
+        db.query(Flight).filter(Flight.id.in_(flight_ids)).update(
+            {Flight.version: Flight.version + 1}, synchronize_session=False
+        )
+
+
+def get_flight_version(db: Session, flight_id: int) -> int:
+    """Текущая версия рейса (один запрос по первичному ключу)."""
+    version = db.query(Flight.version).filter(Flight.id == flight_id).scalar()
+    if version is None:
+        raise HTTPException(status_code=404, detail="Рейс не найден")
+    return version
+
+
+def get_flight_etag(db: Session, flight_id: int) -> str:
+    return make_etag("f", flight_id, get_flight_version(db, flight_id))
+
+
+def get_seat_map_etag(flight_id: int, version: int, reserved: Optional[int] = None) -> Optional[str]:
+    """
+    ETag карты мест: версия рейса + число активных блокировок. Блокировки истекают
+    без изменения версии, поэтому их число берётся из карты занятости в памяти.
+    reserved передаётся из уже построенного ответа; без него используется прогретая
+    карта занятости, а если её нет — None (нужен полный ответ).
+    """
+    if reserved is None:
+        occupancy = seat_occupancy.peek(flight_id)
+        if occupancy is None:
+            return None
+        reserved = occupancy.counts()["reserved"]
+    return make_etag("s", flight_id, version, reserved)
+
+
 def create_flight(db: Session, flight_data: FlightCreate) -> Flight:
     """Creates a new flight with extensive aircraft overlap protection."""
     if flight_data.scheduled_arrival <= flight_data.scheduled_departure:
@@ -427,6 +456,9 @@ def create_flight(db: Session, flight_data: FlightCreate) -> Flight:
         
         db.commit()
         db.refresh(flight)
+        flight_status_scheduler.schedule(flight)
+        flight_search_index.invalidate_days(flight.scheduled_departure)
+        connection_search.upsert(flight)
         return flight
     except HTTPException: raise
     except Exception as e:
@@ -473,15 +505,15 @@ def update_flight(db: Session, flight_id: int, flight_data: FlightUpdate) -> Fli
         if changes:
 
             msg = f"Рейс {flight.flight_number} обновлен: " + ", ".join(changes)
-            # Global
+            # One broadcast: shown in the inbox and trip history of every passenger of the flight
             db.add(Announcement(title="Обновление рейса", message=msg, flight_id=flight.id, created_by=1))
-            # Individual History
-            bookings = db.query(Booking).filter(Booking.flight_id == flight_id, Booking.status != BookingStatus.CANCELLED).all()
-            for b in bookings:
-                db.add(Announcement(title="Ваш рейс изменен", message=msg, flight_id=flight.id, created_by=b.passenger_id))
 
+        bump_flight_version(db, flight_id)
         db.commit()
         db.refresh(flight)
+        flight_status_scheduler.schedule(flight)
+        flight_search_index.invalidate_days(old_vals[3], flight.scheduled_departure)
+        connection_search.upsert(flight)
         return flight
     except HTTPException: raise
     except Exception as e:
@@ -493,34 +525,83 @@ def delete_flight(db: Session, flight_id: int) -> bool:
     """Permanently removes a flight record."""
     flight = get_flight_by_id(db, flight_id)
     try:
+        departure = flight.scheduled_departure
         db.delete(flight)
         db.commit()
+        seat_occupancy.invalidate(flight_id)
+        flight_search_index.invalidate_days(departure)
+        connection_search.remove(flight_id)
         return True
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def filter_flights(db: Session, from_city: Optional[str] = None, to_city: Optional[str] = None, date: Optional[str] = None) -> List[Flight]:
-    """Lightweight filtering for passenger UI (mobile list)."""
-    update_flight_statuses(db)
+def _parse_filter_date(date: Optional[str]) -> Optional[datetime]:
+    """Начало дня из параметра date ("YYYY-MM-DD" или ISO); неверная дата игнорируется."""
+    if not date:
+        return None
+    try:
+        target = datetime.fromisoformat(date.replace('Z', '+00:00')) if 'T' in date else datetime.strptime(date, "%Y-%m-%d")
+        return target.replace(hour=0, minute=0, second=0)
+    except: return None
+
+
+def _filter_flights_criteria(date: Optional[str] = None) -> list:
+    """SQL-условия filter_flights без фильтра городов."""
     now = datetime.utcnow()
     booking_cutoff = now + timedelta(hours=2)
     
-    query = db.query(Flight).options(joinedload(Flight.aircraft)).filter(
+    criteria = [
         Flight.scheduled_departure >= booking_cutoff,
         Flight.status != FlightStatus.CANCELLED
-    )
+    ]
+    
+    start = _parse_filter_date(date)
+    if start:
+        criteria += [Flight.scheduled_departure >= start, Flight.scheduled_departure < start + timedelta(days=1)]
+    return criteria
+
+
+def get_flights_list_etag(db: Session, date: Optional[str] = None) -> str:
+    """
+    ETag списка filter_flights: агрегат по тем же SQL-условиям (без фильтра городов —
+    если не изменилось надмножество, не изменился и результат). Любое изменение рейса
+    меняет его version, добавление/удаление/выход за окно продаж — count и суммы id.
+    """
+    count, id_sum, version_sum, weighted = db.query(
+        func.count(Flight.id),
+        func.coalesce(func.sum(Flight.id), 0),
+        func.coalesce(func.sum(Flight.version), 0),
+        func.coalesce(func.sum(Flight.id * Flight.version), 0)
+    ).filter(*_filter_flights_criteria(date)).one()
+    return make_etag("l", count, id_sum, version_sum, weighted)
+
+
+def filter_flights(db: Session, from_city: Optional[str] = None, to_city: Optional[str] = None, date: Optional[str] = None) -> List[Flight]:
+    """
+    Lightweight filtering for passenger UI (mobile list).
+    Cities are resolved to airport ids; a dated query is served from the route/day search index.
+    """
+    origin_ids = flight_search_index.city_airport_ids(db, from_city)
+    destination_ids = flight_search_index.city_airport_ids(db, to_city)
+    if origin_ids == frozenset() or destination_ids == frozenset():
+        return []
+    
+    booking_cutoff = datetime.utcnow() + timedelta(hours=2)
+    start = _parse_filter_date(date)
+    if start:
+        flight_ids = flight_search_index.find_ids(db, start.date(), origin_ids, destination_ids, not_before=booking_cutoff)
+        return flight_search_index.load_flights(db, flight_ids)
     
-    if date:
-        try:
-            target = datetime.fromisoformat(date.replace('Z', '+00:00')) if 'T' in date else datetime.strptime(date, "%Y-%m-%d")
-            start = target.replace(hour=0, minute=0, second=0)
-            query = query.filter(Flight.scheduled_departure >= start, Flight.scheduled_departure < start + timedelta(days=1))
-        except: pass
-
-    flights = query.all()
-    if from_city: flights = [f for f in flights if f.departure_city.lower() == from_city.lower().strip()]
-    if to_city: flights = [f for f in flights if f.arrival_city.lower() == to_city.lower().strip()]
-    return flights
+    query = db.query(Flight).options(
+        joinedload(Flight.aircraft),
+        joinedload(Flight.origin_airport),
+        joinedload(Flight.destination_airport)
+    ).filter(*_filter_flights_criteria())
+    if origin_ids is not None:
+        query = query.filter(Flight.origin_airport_id.in_(origin_ids))
+    if destination_ids is not None:
+        query = query.filter(Flight.destination_airport_id.in_(destination_ids))
+    return query.order_by(Flight.scheduled_departure).all()
 
@@ -5,11 +5,14 @@ Payment Service.
 import secrets
 import string
 import uuid
+from datetime import datetime
+from typing import List, Optional, Tuple
 
+from sqlalchemy import func, insert, select
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
-from app.models.payment import Payment, TransactionStatus
+from app.models.payment import Checkout, Payment, TransactionStatus
 from app.models.booking import Booking, BookingStatus, PaymentMethod
 
 
@@ -26,53 +29,74 @@ def validate_card_number(card_number: str) -> bool:
     r = [int(ch) for ch in n][::-1]
     return (sum(r[0::2]) + sum(sum(divmod(d*2, 10)) for d in r[1::2])) % 10 == 0
 
-def process_payment(
-    db: Session, 
-    booking_id: int, 
-    passenger_id: int, 
-    amount: float, 
+
+def _authorize(method: PaymentMethod, card_info: str = None) -> TransactionStatus:
+    """Mock authorization: a CARD payment fails if the card number does not pass Luhn."""
+    if method == PaymentMethod.CARD and card_info and not validate_card_number(card_info):
+        return TransactionStatus.FAILED
+    return TransactionStatus.SUCCESS
+
+
+def _transaction_id() -> str:
+    return f"TXN-{secrets.token_hex(4).upper()}"
+
+
+def process_checkout(
+    db: Session,
+    charges: List[Tuple[int, float]],
+    passenger_id: int,
     method: PaymentMethod,
-    card_info: str = None
-) -> Payment:
+    card_info: str = None,
+    flight_id: Optional[int] = None,
+    pnr: Optional[str] = None
+) -> Checkout:
     """
-    Simulates payment processing. 
-    Implements card number validation (Luhn) for CARD method.
-    Uses flush() to integrate into parent transactions.
+    Pays for a whole checkout: one authorization and one Checkout transaction,
+    plus one Payment line item per (booking_id, amount) charge (bulk INSERT).
+    A declined card raises 402 before anything is written; the caller commits.
     """
-    pay_status = TransactionStatus.SUCCESS
+    if _authorize(method, card_info) == TransactionStatus.FAILED:
+        raise HTTPException(
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail="Оплата отклонена банком. Пожалуйста, проверьте данные карты."
+        )
     
-    if method == PaymentMethod.CARD and card_info:
-        if not validate_card_number(card_info):
-             pay_status = TransactionStatus.FAILED
+    now = datetime.utcnow()
+    checkout = Checkout(
+        transaction_id=_transaction_id(),
+        passenger_id=passenger_id,
+        flight_id=flight_id,
+        pnr=pnr,
+        amount=sum(amount for _, amount in charges),
+        method=method,
+        status=TransactionStatus.SUCCESS,
+        created_at=now
+    )
+    db.add(checkout)
+    db.flush()
     
-    try:
-        transaction_id = f"TXN-{secrets.token_hex(4).upper()}"
-        payment = Payment(
-            transaction_id=transaction_id,
-            booking_id=booking_id,
-            passenger_id=passenger_id,
-            amount=amount,
-            method=method,
-            status=pay_status
-        )
-        db.add(payment)
-        db.flush() 
-        
-        if pay_status == TransactionStatus.FAILED:
-            raise HTTPException(
-                status_code=status.HTTP_402_PAYMENT_REQUIRED,
-                detail="Оплата отклонена банком. Пожалуйста, проверьте данные карты."
-            )
-            
-        return payment
-    except HTTPException: raise
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
+    if charges:
+        db.execute(insert(Payment), [
+            {
+                "transaction_id": checkout.transaction_id,
+                "checkout_id": checkout.id,
+                "booking_id": booking_id,
+                "passenger_id": passenger_id,
+                "amount": amount,
+                "method": method,
+                "status": TransactionStatus.SUCCESS,
+                "created_at": now
+            }
+            for booking_id, amount in charges
+        ])
+    return checkout
 
 
 def refund_payment(db: Session, booking_id: int) -> bool:
-    """Marks a payment record as REFUNDED. Does not perform actual banking reversal."""
+    """
+    Marks the booking's line item as REFUNDED (and its checkout, once every item is refunded).
+    Does not perform actual banking reversal.
+    """
     payment = db.query(Payment).filter(
         Payment.booking_id == booking_id,
         Payment.status == TransactionStatus.SUCCESS
@@ -84,6 +108,49 @@ def refund_payment(db: Session, booking_id: int) -> bool:
     try:
         payment.status = TransactionStatus.REFUNDED
         db.add(payment)
+        if payment.checkout_id is not None:
+            db.flush()
+            remaining = db.query(Payment.id).filter(
+                Payment.checkout_id == payment.checkout_id,
+                Payment.status == TransactionStatus.SUCCESS
+            ).first()
+            if remaining is None:
+                db.query(Checkout).filter(Checkout.id == payment.checkout_id).update(
+                    {Checkout.status: TransactionStatus.REFUNDED}, synchronize_session=False
+                )
         return True
     except Exception:
         return False
+
+
+def attach_legacy_payments(db: Session) -> int:
+    """
+    Creates Checkout rows for payments written before checkouts existed (one per
+    transaction_id) and links the line items to them. Two set-based statements; idempotent.
+    """
+    legacy = db.query(Payment).filter(Payment.checkout_id.is_(None))
+    if legacy.first() is None:
+        return 0
+    
+    try:
+        db.execute(insert(Checkout).from_select(
+            ["transaction_id", "passenger_id", "flight_id", "pnr", "amount", "currency", "method", "status", "created_at"],
+            select(
+                Payment.transaction_id, func.min(Payment.passenger_id), func.min(Booking.flight_id), func.min(Booking.pnr),
+                func.sum(Payment.amount), func.min(Payment.currency), func.min(Payment.method),
+                func.min(Payment.status), func.min(Payment.created_at)
+            ).outerjoin(Booking, Booking.id == Payment.booking_id).where(
+                Payment.checkout_id.is_(None),
+                Payment.transaction_id.not_in(select(Checkout.transaction_id))
+            ).group_by(Payment.transaction_id)
+        ))
+        attached = legacy.update({
+            Payment.checkout_id: select(Checkout.id).where(
+                Checkout.transaction_id == Payment.transaction_id
+            ).scalar_subquery()
+        }, synchronize_session=False)
+        db.commit()
+        return attached
+    except Exception:
+        db.rollback()
+        raise
@@ -0,0 +1,114 @@
+"""
+PNR Allocator.
+Выдача PNR без проверки в БД на каждую попытку.
+
+Коды строятся из последовательных номеров: номер (30 бит) проходит через
+ключевую перестановку Фейстеля и записывается 6 символами алфавита из 32
+знаков (32^6 = 2^30). Перестановка — биекция, поэтому разные номера дают
+разные коды, а подряд выданные коды не выглядят последовательными.
+Номера резервируются блоками (PNR_BLOCK_SIZE) одним UPDATE в отдельной
+транзакции, так что процессы не пересекаются; коды с запрещёнными
+сочетаниями пропускаются. Финальная защита — один запрос по индексу
+bookings.pnr на блок: коды, уже занятые старыми случайными PNR (или выданные
+до смены ключа), из блока исключаются.
+"""
+import hashlib
+import threading
+from collections import deque
+from typing import Deque, List
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.booking import Booking, PnrSequence
+
+CHARSET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"  # без 0, O, 1, I
+PROHIBITED_PATTERNS = ("FUCK", "SHIT", "HELL", "COCK", "BULL")
+PNR_LENGTH = 6
+SEQUENCE_ID = 1
+
+_HALF_BITS = 15
+_HALF_MASK = (1 << _HALF_BITS) - 1
+_ROUNDS = 4
+DOMAIN_SIZE = 1 << (2 * _HALF_BITS)  # == len(CHARSET) ** PNR_LENGTH
+
+
+def _round_keys(key: str) -> List[bytes]:
+    return [hashlib.blake2b(f"{key}:{i}".encode(), digest_size=16).digest() for i in range(_ROUNDS)]
+
+
+def permute(value: int, round_keys: List[bytes]) -> int:
+    """Биекция [0, 2^30) -> [0, 2^30): сбалансированная сеть Фейстеля."""
+    left, right = value >> _HALF_BITS, value & _HALF_MASK
+    for round_key in round_keys:
+        f = int.from_bytes(hashlib.blake2b(right.to_bytes(2, "big"), key=round_key, digest_size=4).digest(), "big")
+        left, right = right, left ^ (f & _HALF_MASK)
+    return (left << _HALF_BITS) | right
+
+
+def encode(value: int) -> str:
+    chars = []
+    for _ in range(PNR_LENGTH):
+        value, index = divmod(value, len(CHARSET))
+        chars.append(CHARSET[index])
+    return "".join(reversed(chars))
+
+
+def is_allowed(code: str) -> bool:
+    return not any(pattern in code for pattern in PROHIBITED_PATTERNS)
+
+
+class PnrAllocator:
+    """Процессный пул готовых PNR, пополняемый блоками номеров."""
+
+    def __init__(self, block_size: int = settings.PNR_BLOCK_SIZE, key: str = settings.PNR_PERMUTATION_KEY):
+        self.block_size = block_size
+        self._round_keys = _round_keys(key)
+        self._codes: Deque[str] = deque()
+        self._lock = threading.Lock()
+
+    def code_for(self, sequence_value: int) -> str:
+        return encode(permute(sequence_value, self._round_keys))
+
+    def allocate(self, db: Session) -> str:
+        """
+        Следующий свободный PNR. При пополнении блока резерв идёт через отдельное
+        соединение — вызывать до первых записей в транзакции сессии (SQLite).
+        """
+        with self._lock:
+            while not self._codes:
+                self._codes.extend(self._next_block(db))
+            return self._codes.popleft()
+
+    def _reserve(self, db: Session) -> int:
+        """Начало блока номеров; резерв фиксируется сразу, независимо от транзакции вызывающего."""
+        with db.get_bind().connect() as connection:
+            with connection.begin():
+                end = connection.execute(
+                    update(PnrSequence).where(PnrSequence.id == SEQUENCE_ID)
+                    .values(next_value=PnrSequence.next_value + self.block_size)
+                    .returning(PnrSequence.next_value)
+                ).scalar()
+            if end is None:
+                try:
+                    with connection.begin():
+                        connection.execute(insert(PnrSequence).values(id=SEQUENCE_ID, next_value=self.block_size))
+                    end = self.block_size
+                except IntegrityError:
+                    # Строку создал другой процесс — резервируем заново
+                    return self._reserve(db)
+        return end - self.block_size
+
+    def _next_block(self, db: Session) -> List[str]:
+        start = self._reserve(db)
+        if start + self.block_size > DOMAIN_SIZE:
+            raise RuntimeError("PNR sequence exhausted")
+        candidates = [self.code_for(value) for value in range(start, start + self.block_size)]
+        candidates = [code for code in candidates if is_allowed(code)]
+        taken = set(db.execute(select(Booking.pnr).where(Booking.pnr.in_(candidates))).scalars())
+        return [code for code in candidates if code not in taken]
+
+
+pnr_allocator = PnrAllocator()
@@ -0,0 +1,144 @@
+"""
+Seat Inventory.
+Счётчик занятых мест рейса (Flight.seats_taken).
+
+Занятыми считаются бронирования CONFIRMED и CREATED (ожидающие оплаты) —
+те же, что раньше пересчитывал Flight.available_seats по списку бронирований.
+Счётчик поддерживается в той же транзакции, что и изменение бронирований:
+обработчик before_flush сессии сводит новые, изменённые и удалённые Booking
+в дельты по рейсам и применяет их UPDATE-ом. Массовые DELETE по запросу
+flush не проходят — для них есть adjust_seats_taken. Расхождения (записи
+в обход ORM, старые данные) находит и исправляет reconcile_seats_taken.
+"""
+import time
+from typing import Dict, Iterable
+
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+
+from app.models.booking import Booking, BookingStatus
+from app.models.flight import Flight
+from app.schemas.seat import SeatInventoryReport
+
+TAKEN_STATUSES = (BookingStatus.CONFIRMED, BookingStatus.CREATED)
+
+
+def taken_count(flight_id_column=Flight.id):
+    """Коррелированный подсчёт занятых мест рейса."""
+    return select(func.count(Booking.id)).where(
+        Booking.flight_id == flight_id_column,
+        Booking.status.in_(TAKEN_STATUSES)
+    ).scalar_subquery()
+
+
+def adjust_seats_taken(db: Session, flight_id: int, delta: int) -> None:
+    """Сдвигает счётчик рейса (для массовых операций в обход flush)."""
+    if delta:
+        _apply_deltas(db, {flight_id: delta})
+
+
+def _apply_deltas(session: Session, deltas: Dict[int, int]) -> None:
+    connection = session.connection()
+    for flight_id, delta in deltas.items():
+        if not delta:
+            continue
+        connection.execute(
+            update(Flight).where(Flight.id == flight_id).values(seats_taken=Flight.seats_taken + delta)
+        )
+        # Загруженный в сессию рейс видит новое значение без перечитывания
+        flight = session.identity_map.get(identity_key(Flight, flight_id))
+        if flight is not None and "seats_taken" in flight.__dict__:
+            set_committed_value(flight, "seats_taken", flight.seats_taken + delta)
+
+
+def _history_value(history, default):
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return default
+
+
+def _stored_values(session: Session, booking_ids: Iterable[int]) -> Dict[int, tuple]:
+    """(flight_id, status) бронирований в БД — для атрибутов, не загруженных до изменения."""
+    booking_ids = [i for i in booking_ids if i is not None]
+    if not booking_ids:
+        return {}
+    rows = session.connection().execute(
+        select(Booking.id, Booking.flight_id, Booking.status).where(Booking.id.in_(booking_ids))
+    ).all()
+    return {booking_id: (flight_id, status) for booking_id, flight_id, status in rows}
+
+
+@event.listens_for(Session, "before_flush")
+def _track_seats_taken(session: Session, flush_context, instances) -> None:
+    deltas: Dict[int, int] = {}
+
+    def add(flight_id, status, delta):
+        if flight_id is not None and status in TAKEN_STATUSES:
+            deltas[flight_id] = deltas.get(flight_id, 0) + delta
+
+    for obj in session.new:
+        if isinstance(obj, Booking):
+            add(obj.flight_id, obj.status or BookingStatus.CREATED, 1)
+
+    changed = []
+    for obj in session.dirty:
+        if isinstance(obj, Booking) and session.is_modified(obj):
+            state = inspect(obj)
+            flight_history = state.attrs.flight_id.history
+            status_history = state.attrs.status.history
+            if flight_history.added or status_history.added:
+                changed.append((obj, flight_history, status_history))
+    deleted = [obj for obj in session.deleted if isinstance(obj, Booking)]
+    if not changed and not deleted and not deltas:
+        return
+
+    # Старые значения, если атрибут был expired к моменту изменения
+    unknown = [obj.id for obj, fh, sh in changed if not (fh.deleted or fh.unchanged) or not (sh.deleted or sh.unchanged)]
+    unknown += [obj.id for obj in deleted]
+    stored = _stored_values(session, unknown)
+
+    for obj, flight_history, status_history in changed:
+        old_flight_id, old_status = stored.get(obj.id, (None, None))
+        add(_history_value(flight_history, old_flight_id), _history_value(status_history, old_status), -1)
+        add(obj.flight_id, obj.status, 1)
+    for obj in deleted:
+        add(*stored.get(obj.id, (None, None)), -1)
+
+    _apply_deltas(session, deltas)
+
+
+def reconcile_seats_taken(db: Session) -> SeatInventoryReport:
+    """
+    Сверяет счётчики всех рейсов с бронированиями одним запросом и исправляет
+    расхождения (пересчёт и version + 1 в одном UPDATE по рейсам с расхождением).
+    """
+    started = time.perf_counter()
+    actual = select(Booking.flight_id, func.count(Booking.id).label("taken")).where(
+        Booking.status.in_(TAKEN_STATUSES)
+    ).group_by(Booking.flight_id).subquery()
+    rows = db.query(Flight.id, Flight.seats_taken, func.coalesce(actual.c.taken, 0)).outerjoin(
+        actual, actual.c.flight_id == Flight.id
+    ).all()
+    drifted = {flight_id: taken - counter for flight_id, counter, taken in rows if counter != taken}
+
+    if drifted:
+        try:
+            db.query(Flight).filter(Flight.id.in_(drifted)).update(
+                {Flight.seats_taken: taken_count(), Flight.version: Flight.version + 1},
+                synchronize_session=False
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    return SeatInventoryReport(
+        flights_checked=len(rows),
+        flights_repaired=len(drifted),
+        drift=sum(abs(delta) for delta in drifted.values()),
+        duration_ms=round((time.perf_counter() - started) * 1000, 2)
+    )
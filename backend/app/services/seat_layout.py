@@ -0,0 +1,156 @@
+"""
+Seat Layout.
+Скомпилированные раскладки мест из SeatTemplate.
+
+SeatTemplate.seat_map — JSON-список словарей, который при каждом запросе
+карты мест разбирался заново. Компилятор превращает шаблон в неизменяемую
+структуру по слотам (слот = позиция места в seat_map["seats"]) с колонками
+row/letter/class/exit, множителями цены и заранее сериализованным
+JSON-скелетом мест. Раскладки кэшируются по id шаблона; шаблоны не
+редактируются, поэтому кэш сбрасывается только при создании/удалении.
+"""
+import threading
+from array import array
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Mapping, Optional, Sequence, Tuple
+
+from pydantic_core import to_json
+from sqlalchemy.orm import Session
+
+from app.models.aircraft import SeatTemplate
+
+# Множитель цены по классу места на карте мест
+CLASS_PRICE_MULTIPLIERS = {"BUSINESS": 2.0}
+
+
+@lru_cache(maxsize=256)
+def parse_rows(row_str: Optional[str]) -> FrozenSet[int]:
+    """Разбирает диапазоны рядов вида "1-3,7" в множество номеров рядов."""
+    if not row_str: return frozenset()
+    rows = set()
+    for part in row_str.split(','):
+        part = part.strip()
+        if '-' in part:
+            start, end = map(int, part.split('-'))
+            rows.update(range(start, end + 1))
+        else:
+            rows.add(int(part))
+    return frozenset(rows)
+
+
+def json_value(value) -> str:
+    """JSON-литерал в том же формате, что и сериализация ответов Pydantic."""
+    return to_json(value).decode()
+
+
+class CompiledSeatLayout:
+    """Неизменяемая раскладка мест шаблона, индексированная по слотам."""
+
+    __slots__ = (
+        "template_id", "size", "seat_numbers", "rows", "letters", "classes",
+        "seat_types", "exits", "multipliers", "seat_index", "seat_fields", "json_prefixes",
+        "_rendered",
+    )
+
+    def __init__(self, template_id: int, seats: list):
+        self.template_id = template_id
+        self.size = len(seats)
+        self.seat_numbers: Tuple[str, ...] = tuple(s["seat_number"] for s in seats)
+        self.rows = array("H", (s["row"] for s in seats))
+        self.letters: Tuple[str, ...] = tuple(s["letter"] for s in seats)
+        self.classes: Tuple[str, ...] = tuple(s["class"] for s in seats)
+        self.seat_types: Tuple[str, ...] = tuple(c.lower() for c in self.classes)
+        self.exits = bytes(bool(s.get("is_emergency_exit", False)) for s in seats)
+        self.multipliers = array("d", (CLASS_PRICE_MULTIPLIERS.get(c, 1.0) for c in self.classes))
+        self.seat_index: Mapping[str, int] = MappingProxyType(
+            {seat: slot for slot, seat in enumerate(self.seat_numbers)}
+        )
+
+        # Скелет места: статические поля Seat; статус и цена накладываются на запрос
+        self.seat_fields: Tuple[Mapping[str, object], ...] = tuple(
+            MappingProxyType({
+                "seat_number": self.seat_numbers[slot],
+                "row": self.rows[slot],
+                "column": self.letters[slot],
+                "seat_type": self.seat_types[slot],
+                "is_emergency_exit": bool(self.exits[slot]),
+            })
+            for slot in range(self.size)
+        )
+        # Тот же скелет в JSON — всё до поля status (порядок полей как в схеме Seat)
+        self.json_prefixes: Tuple[str, ...] = tuple(
+            '{"seat_number":%s,"row":%d,"column":%s,"seat_type":%s,"status":' % (
+                json_value(self.seat_numbers[slot]), self.rows[slot],
+                json_value(self.letters[slot]), json_value(self.seat_types[slot]),
+            )
+            for slot in range(self.size)
+        )
+        # Производный кэш готовых JSON-фрагментов мест (см. rendered_seats)
+        self._rendered: Dict[tuple, Tuple[Tuple[str, ...], ...]] = {}
+
+    def price(self, slot: int, base_price: float) -> float:
+        return base_price * self.multipliers[slot]
+
+    def seat_json(self, slot: int, status: str, base_price: float, extra: str = "") -> str:
+        """
+        JSON одного места: скелет + статус, признак аварийного выхода и цена.
+        extra — дополнительные поля наследника схемы (',"name":value...').
+        """
+        return '%s"%s","is_emergency_exit":%s,"price":%s%s}' % (
+            self.json_prefixes[slot], status,
+            "true" if self.exits[slot] else "false",
+            json_value(self.price(slot, base_price)), extra,
+        )
+
+    def rendered_seats(self, base_price: float, statuses: Sequence[str], extra: str = "") -> Tuple[Tuple[str, ...], ...]:
+        """
+        Готовые JSON-фрагменты всех мест для каждого статуса: result[i][slot]
+        соответствует statuses[i]. Зависят только от раскладки и базовой цены,
+        поэтому запоминаются (несколько последних вариантов).
+        """
+        key = (base_price, tuple(statuses), extra)
+        rendered = self._rendered.get(key)
+        if rendered is None:
+            rendered = tuple(
+                tuple(self.seat_json(slot, status, base_price, extra) for slot in range(self.size))
+                for status in statuses
+            )
+            if len(self._rendered) >= 16:
+                self._rendered.clear()
+            self._rendered[key] = rendered
+        return rendered
+
+
+class SeatLayoutCache:
+    """Кэш CompiledSeatLayout по id шаблона."""
+
+    def __init__(self):
+        self._layouts: Dict[int, CompiledSeatLayout] = {}
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, template_id: int) -> Optional[CompiledSeatLayout]:
+        """
+        Раскладка шаблона по id (Aircraft.seat_template_id). Шаблон с JSON seat_map
+        читается из БД только при промахе кэша; None — шаблона нет.
+        """
+        layout = self._layouts.get(template_id)
+        if layout is None:
+            template = db.get(SeatTemplate, template_id)
+            if template is None:
+                return None
+            layout = CompiledSeatLayout(template.id, (template.seat_map or {}).get("seats", []))
+            with self._lock:
+                layout = self._layouts.setdefault(template.id, layout)
+        return layout
+
+    def invalidate(self, template_id: Optional[int] = None) -> None:
+        """Сбрасывает раскладку шаблона (без аргумента — все раскладки)."""
+        with self._lock:
+            if template_id is None:
+                self._layouts.clear()
+            else:
+                self._layouts.pop(template_id, None)
+
+
+seat_layouts = SeatLayoutCache()
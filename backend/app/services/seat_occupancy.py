@@ -0,0 +1,225 @@
+"""
+Seat Occupancy.
+Компактная in-memory карта занятости мест рейса на битовых масках.
+
+Слот места = его позиция в раскладке шаблона (см. seat_layout). Для каждого рейса
+хранятся две маски (CONFIRMED и HELD) и массив времени истечения блокировок,
+поэтому подсчёт свободных мест — несколько побитовых операций вместо SQL.
+БД остаётся источником истины: структура прогревается из неё при первом
+обращении, после TTL и при смене шаблона, а сервисы бронирования обновляют её
+на месте после commit.
+"""
+import threading
+import time
+from array import array
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.booking import Booking, BookingStatus, SeatHold
+from app.models.flight import Flight
+from app.services.seat_layout import CompiledSeatLayout, seat_layouts
+
+# Состояния слота
+AVAILABLE = 0
+HELD = 1
+CONFIRMED = 2
+
+# Статус места в API по состоянию слота
+STATUS_LABELS = ("available", "reserved", "occupied")
+
+
+class FlightOccupancy:
+    """Занятость мест одного рейса: битовые маски по слотам шаблона."""
+
+    __slots__ = (
+        "flight_id", "layout", "size", "seat_index",
+        "confirmed", "held", "hold_expiry", "loaded_at", "_lock",
+    )
+
+    def __init__(self, flight_id: int, layout: CompiledSeatLayout):
+        self.flight_id = flight_id
+        self.layout = layout
+        self.size = layout.size
+        self.seat_index = layout.seat_index
+        self.confirmed = 0
+        self.held = 0
+        self.hold_expiry = array("d", bytes(8 * self.size))  # unix-время истечения блокировки
+        self.loaded_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _slots(self, seat_numbers: Iterable[str]) -> List[int]:
+        # Места вне шаблона не индексируются (их нет на карте мест)
+        return [self.seat_index[s] for s in seat_numbers if s in self.seat_index]
+
+    def mark_confirmed(self, seat_numbers: Iterable[str]) -> None:
+        with self._lock:
+            for slot in self._slots(seat_numbers):
+                self.confirmed |= 1 << slot
+                self.held &= ~(1 << slot)
+
+    def mark_held(self, seat_numbers: Iterable[str], expires_at: datetime) -> None:
+        expiry = _to_timestamp(expires_at)
+        with self._lock:
+            for slot in self._slots(seat_numbers):
+                self.held |= 1 << slot
+                self.hold_expiry[slot] = expiry
+
+    def release(self, seat_numbers: Iterable[str]) -> None:
+        with self._lock:
+            for slot in self._slots(seat_numbers):
+                mask = ~(1 << slot)
+                self.confirmed &= mask
+                self.held &= mask
+
+    def release_holds(self, seat_numbers: Iterable[str]) -> None:
+        with self._lock:
+            for slot in self._slots(seat_numbers):
+                self.held &= ~(1 << slot)
+
+    def _expire_holds(self) -> None:
+        """Снимает биты просроченных блокировок (O(число блокировок))."""
+        now = time.time()
+        held = self.held
+        while held:
+            low = held & -held
+            slot = low.bit_length() - 1
+            if self.hold_expiry[slot] <= now:
+                self.held &= ~low
+            held ^= low
+
+    def masks(self):
+        """(confirmed, held) на текущий момент; held не пересекается с confirmed."""
+        with self._lock:
+            self._expire_holds()
+            return self.confirmed, self.held & ~self.confirmed
+
+    def states(self) -> bytearray:
+        """Состояние каждого слота: AVAILABLE / HELD / CONFIRMED."""
+        return self._states(*self.masks())
+
+    def _states(self, confirmed: int, held: int) -> bytearray:
+        states = bytearray(self.size)
+        for mask, state in ((held, HELD), (confirmed, CONFIRMED)):
+            while mask:
+                low = mask & -mask
+                states[low.bit_length() - 1] = state
+                mask ^= low
+        return states
+
+    def counts(self) -> Dict[str, int]:
+        return self._counts(*self.masks())
+
+    def snapshot(self):
+        """(states, counts) по одному и тому же срезу масок."""
+        confirmed, held = self.masks()
+        return self._states(confirmed, held), self._counts(confirmed, held)
+
+    def _counts(self, confirmed: int, held: int) -> Dict[str, int]:
+        occupied = confirmed.bit_count()
+        reserved = held.bit_count()
+        return {
+            "total": self.size,
+            "occupied": occupied,
+            "reserved": reserved,
+            "available": self.size - occupied - reserved,
+        }
+
+
+class SeatOccupancyRegistry:
+    """
+    Кэш FlightOccupancy по flight_id.
+
+    Обновления (mark_*/release) применяются только к уже прогретым рейсам.
+    Каждое обновление увеличивает поколение рейса: прогрев, начатый до
+    обновления, не попадёт в кэш, и следующий запрос прогреет рейс заново.
+    """
+
+    def __init__(self, ttl_seconds: int = settings.SEAT_OCCUPANCY_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._flights: Dict[int, FlightOccupancy] = {}
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, flight: Flight) -> Optional[FlightOccupancy]:
+        """Занятость рейса (None, если у самолёта нет шаблона мест)."""
+        # Ключ — id шаблона из уже загруженного самолёта: тёплый кэш не читает seat_templates
+        template_id = flight.aircraft.seat_template_id if flight.aircraft else None
+        layout = seat_layouts.get(db, template_id) if template_id else None
+        if layout is None:
+            return None
+
+        with self._lock:
+            occupancy = self._flights.get(flight.id)
+            generation = self._generations.get(flight.id, 0)
+        if (
+            occupancy is not None
+            and occupancy.layout is layout
+            and time.monotonic() - occupancy.loaded_at < self.ttl_seconds
+        ):
+            return occupancy
+
+        occupancy = self._warm_up(db, flight.id, layout)
+        with self._lock:
+            if self._generations.get(flight.id, 0) == generation:
+                self._flights[flight.id] = occupancy
+        return occupancy
+
+    def peek(self, flight_id: int) -> Optional[FlightOccupancy]:
+        """Прогретая занятость рейса без обращения к БД (None, если её нет или истёк TTL)."""
+        occupancy = self._flights.get(flight_id)
+        if occupancy is not None and time.monotonic() - occupancy.loaded_at < self.ttl_seconds:
+            return occupancy
+        return None
+
+    def _warm_up(self, db: Session, flight_id: int, layout: CompiledSeatLayout) -> FlightOccupancy:
+        occupancy = FlightOccupancy(flight_id, layout)
+        confirmed = db.query(Booking.seat_number).filter(
+            Booking.flight_id == flight_id, Booking.status == BookingStatus.CONFIRMED
+        ).all()
+        holds = db.query(SeatHold.seat_number, SeatHold.expires_at).filter(
+            SeatHold.flight_id == flight_id, SeatHold.expires_at > datetime.utcnow()
+        ).all()
+        for seat_number, expires_at in holds:
+            occupancy.mark_held([seat_number], expires_at)
+        occupancy.mark_confirmed(c[0] for c in confirmed)
+        return occupancy
+
+    def _apply(self, flight_id: int, method: str, *args) -> None:
+        with self._lock:
+            self._generations[flight_id] = self._generations.get(flight_id, 0) + 1
+            occupancy = self._flights.get(flight_id)
+        if occupancy is not None:
+            getattr(occupancy, method)(*args)
+
+    # Хуки для сервисов бронирования (вызываются после commit)
+
+    def mark_confirmed(self, flight_id: int, seat_numbers: Iterable[str]) -> None:
+        self._apply(flight_id, "mark_confirmed", list(seat_numbers))
+
+    def mark_held(self, flight_id: int, seat_numbers: Iterable[str], expires_at: datetime) -> None:
+        self._apply(flight_id, "mark_held", list(seat_numbers), expires_at)
+
+    def release(self, flight_id: int, seat_numbers: Iterable[str]) -> None:
+        self._apply(flight_id, "release", list(seat_numbers))
+
+    def release_holds(self, flight_id: int, seat_numbers: Iterable[str]) -> None:
+        self._apply(flight_id, "release_holds", list(seat_numbers))
+
+    def invalidate(self, *flight_ids: int) -> None:
+        """Сбрасывает рейсы (без аргументов — весь кэш); следующий запрос прогреет их из БД."""
+        with self._lock:
+            targets = flight_ids or tuple(self._flights)
+            for flight_id in targets:
+                self._generations[flight_id] = self._generations.get(flight_id, 0) + 1
+                self._flights.pop(flight_id, None)
+
+
+def _to_timestamp(value: datetime) -> float:
+    # В БД время хранится как naive UTC
+    return (value - datetime(1970, 1, 1)).total_seconds() if value.tzinfo is None else value.timestamp()
+
+
+seat_occupancy = SeatOccupancyRegistry()
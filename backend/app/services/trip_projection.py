@@ -0,0 +1,237 @@
+"""
+Trip Projection.
+Готовые к отдаче "Мои поездки": по строке на (пользователь, бронирование).
+
+get_user_trips собирает поездки связыванием по PNR, паспорту и оплатам и
+валидирует вложенные схемы — проекция делает это только после изменений.
+Строка хранит JSON поездки без частей, зависящих от рейса (flight, gate,
+terminal) и без истории: фрагмент рейса кэшируется в процессе по
+(flight_id, Flight.version), поэтому изменение рейса не трогает проекции
+его пассажиров. Видимость черновика ограничена visible_until (срок блокировки).
+
+Актуальность — по поколениям: TripProjectionState.generation растёт в той же
+транзакции, что и изменение бронирования, билета, оплаты или паспорта
+пользователя (обработчик before_flush; массовые вставки вызывают
+mark_users_stale сами). Чтение при built_generation != generation
+перестраивает проекцию пользователя, иначе — один запрос по (user_id, booking_id).
+"""
+import json
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import delete, event, inspect, insert, or_, select, update
+from sqlalchemy.orm import Session, joinedload
+
+from app.models.booking import Booking, Ticket
+from app.models.flight import Flight
+from app.models.payment import Payment
+from app.models.trip_projection import TripProjection, TripProjectionState
+from app.models.user import User, UserRole
+from app.schemas.announcement import Announcement as AnnouncementSchema
+from app.schemas.flight import Flight as FlightSchema
+
+# Поля поездки, которые берутся из рейса при чтении
+FLIGHT_FIELDS = {"flight", "gate", "terminal"}
+
+
+class FlightFragmentCache:
+    """JSON-фрагменты рейсов поездок по (flight_id, version)."""
+
+    def __init__(self):
+        self._fragments: Dict[int, Tuple[int, str]] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, db: Session, versions: Dict[int, int]) -> Dict[int, str]:
+        with self._lock:
+            found = {
+                flight_id: cached[1] for flight_id, cached in
+                ((flight_id, self._fragments.get(flight_id)) for flight_id in versions)
+                if cached is not None and cached[0] == versions[flight_id]
+            }
+        missing = [flight_id for flight_id in versions if flight_id not in found]
+        if missing:
+            flights = db.query(Flight).options(
+                joinedload(Flight.aircraft), joinedload(Flight.origin_airport), joinedload(Flight.destination_airport)
+            ).filter(Flight.id.in_(missing)).all()
+            built = {flight.id: (flight.version, self._encode(flight)) for flight in flights}
+            with self._lock:
+                self._fragments.update(built)
+            found.update((flight_id, fragment) for flight_id, (_, fragment) in built.items())
+        return found
+
+    @staticmethod
+    def _encode(flight: Flight) -> str:
+        return '"flight":%s,"gate":%s,"terminal":%s' % (
+            FlightSchema.model_validate(flight).model_dump_json(),
+            json.dumps(flight.gate, ensure_ascii=False),
+            json.dumps(flight.terminal, ensure_ascii=False)
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._fragments.clear()
+
+
+flight_fragments = FlightFragmentCache()
+
+
+# ─────────────────────────────────────────
+# Отметка устаревших проекций
+# ─────────────────────────────────────────
+
+def mark_users_stale(
+    db: Session,
+    user_ids: Iterable[int] = (),
+    pnrs: Iterable[str] = (),
+    passports: Iterable[str] = ()
+) -> None:
+    """
+    Поколение +1 у пользователей, чьи поездки могли измениться: сами
+    пользователи, пассажиры бронирований с этими PNR и владельцы паспортов.
+    Не коммитит.
+    """
+    user_ids, pnrs, passports = set(user_ids) - {None}, set(pnrs) - {None}, set(passports) - {None}
+    if not (user_ids or pnrs or passports):
+        return
+    conditions = []
+    if user_ids:
+        conditions.append(TripProjectionState.user_id.in_(user_ids))
+    if pnrs:
+        conditions.append(TripProjectionState.user_id.in_(select(Booking.passenger_id).where(Booking.pnr.in_(pnrs))))
+        passports_by_pnr = select(Booking.passport_number).where(Booking.pnr.in_(pnrs), Booking.passport_number != None)
+        conditions.append(TripProjectionState.user_id.in_(select(User.id).where(User.passport_number.in_(passports_by_pnr))))
+    if passports:
+        conditions.append(TripProjectionState.user_id.in_(select(User.id).where(User.passport_number.in_(passports))))
+    # Через connection: вызывается и из before_flush
+    db.connection().execute(
+        update(TripProjectionState).where(or_(*conditions))
+        .values(generation=TripProjectionState.generation + 1)
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def _track_trip_changes(session: Session, flush_context, instances) -> None:
+    user_ids: Set[int] = set()
+    pnrs: Set[str] = set()
+    passports: Set[str] = set()
+    booking_ids: Set[int] = set()
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Booking):
+            if obj in session.dirty and not session.is_modified(obj):
+                continue
+            state = inspect(obj)
+            for attr, target in (("passenger_id", user_ids), ("pnr", pnrs), ("passport_number", passports)):
+                history = state.attrs[attr].history
+                target.update(v for v in (*history.added, *history.unchanged, *history.deleted) if v is not None)
+        elif isinstance(obj, (Ticket, Payment)):
+            user_ids.add(obj.passenger_id)
+            booking_ids.add(obj.booking_id)
+        elif isinstance(obj, User) and obj in session.dirty:
+            if inspect(obj).attrs.passport_number.history.has_changes():
+                user_ids.add(obj.id)
+
+    booking_ids.discard(None)
+    if booking_ids:
+        pnrs.update(p for (p,) in session.connection().execute(
+            select(Booking.pnr).where(Booking.id.in_(booking_ids), Booking.pnr != None)
+        ))
+    if user_ids or pnrs or passports:
+        mark_users_stale(session, user_ids, pnrs, passports)
+
+
+# ─────────────────────────────────────────
+# Построение и чтение
+# ─────────────────────────────────────────
+
+def rebuild_user(db: Session, user: User) -> int:
+    """Перестраивает проекцию пользователя из get_user_trips; коммитит. Возвращает число поездок."""
+    from app.services.booking_service import get_user_trips
+
+    try:
+        state = db.get(TripProjectionState, user.id)
+        if state is None:
+            state = TripProjectionState(user_id=user.id, generation=0)
+            db.add(state)
+            db.flush()
+        generation = state.generation
+
+        trips = get_user_trips(db, user, include_history=False)
+        db.execute(delete(TripProjection).where(TripProjection.user_id == user.id))
+        if trips:
+            db.execute(insert(TripProjection), [
+                {
+                    "user_id": user.id,
+                    "booking_id": trip.id,
+                    "flight_id": trip.flight_id,
+                    "visible_until": trip.expires_at.replace(tzinfo=None) if trip.expires_at else None,
+                    "payload": trip.model_dump_json(exclude=FLIGHT_FIELDS | {"history"}),
+                }
+                for trip in trips
+            ])
+        state.built_generation = generation
+        state.built_at = datetime.utcnow()
+        db.commit()
+        return len(trips)
+    except Exception:
+        db.rollback()
+        raise
+
+
+def rebuild_all(db: Session, user_ids: Optional[Iterable[int]] = None) -> int:
+    """Перестройка проекций (всех пассажиров или заданных); для бэкфилла."""
+    query = db.query(User.id).filter(User.role == UserRole.PASSENGER)
+    if user_ids is not None:
+        query = query.filter(User.id.in_(list(user_ids)))
+    ids = [user_id for (user_id,) in query.order_by(User.id)]
+    for user_id in ids:
+        rebuild_user(db, db.get(User, user_id))
+    return len(ids)
+
+
+def is_fresh(db: Session, user_id: int) -> bool:
+    """Проекция пользователя построена и не устарела (можно читать без перестройки)."""
+    state = db.get(TripProjectionState, user_id)
+    return state is not None and state.built_generation == state.generation
+
+
+def _history_fragments(db: Session, user_id: int, flight_ids: Set[int]) -> Dict[int, str]:
+    from app.services.booking_service import flight_history
+
+    return {
+        flight_id: "[" + ",".join(AnnouncementSchema.model_validate(h).model_dump_json() for h in items) + "]"
+        for flight_id, items in flight_history(db, user_id, flight_ids).items()
+    }
+
+
+def get_trips_json(db: Session, user: User, include_history: bool = True, read_db: Optional[Session] = None) -> str:
+    """
+    JSON-массив поездок пользователя (та же форма, что List[Trip]); история — одним запросом.
+    Актуальная проекция читается через read_db (если передана), перестройка — через db.
+    """
+    reader = read_db or db
+    if not is_fresh(reader, user.id):
+        rebuild_user(db, user)
+        reader = db  # только что записанное читаем той же сессией
+    return read_trips_json(reader, user.id, include_history)
+
+
+def read_trips_json(db: Session, user_id: int, include_history: bool = True) -> str:
+    """JSON-массив поездок из актуальной проекции (без проверки и перестройки; только чтение)."""
+    now = datetime.utcnow()
+    rows = db.execute(
+        select(TripProjection.flight_id, TripProjection.payload, Flight.version)
+        .join(Flight, Flight.id == TripProjection.flight_id)
+        .where(
+            TripProjection.user_id == user_id,
+            or_(TripProjection.visible_until.is_(None), TripProjection.visible_until > now)
+        ).order_by(TripProjection.booking_id)
+    ).all()
+    fragments = flight_fragments.get_many(db, {flight_id: version for flight_id, _, version in rows})
+    histories = _history_fragments(db, user_id, {flight_id for flight_id, _, _ in rows}) if include_history and rows else {}
+
+    parts = []
+    for flight_id, payload, _ in rows:
+        parts.append("{%s,%s,\"history\":%s}" % (fragments[flight_id], payload[1:-1], histories.get(flight_id, "[]")))
+    return "[" + ",".join(parts) + "]"
@@ -3,10 +3,14 @@ User Service.
 Операции с профилями пользователей и административное управление.
 """
 from typing import List, Optional
+from sqlalchemy import delete, or_, select
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 
+from app.models.announcement import Announcement, AnnouncementCursor
+from app.models.booking import SeatHold
 from app.models.user import User, UserRole
+from app.services.seat_occupancy import seat_occupancy
 from app.schemas.user import UserUpdate
 
 
@@ -59,8 +63,17 @@ def delete_user_staff(db: Session, user_id: int, current_staff_id: int) -> None:
         )
         
     try:
+        # Rows without an ORM cascade: personal messages, inbox cursor, seat holds (foreign keys are enforced)
+        db.execute(delete(Announcement).where(
+            or_(Announcement.recipient_id == user.id, Announcement.created_by == user.id)
+        ))
+        db.execute(delete(AnnouncementCursor).where(AnnouncementCursor.user_id == user.id))
+        held_flights = set(db.execute(select(SeatHold.flight_id).where(SeatHold.passenger_id == user.id)).scalars())
+        db.execute(delete(SeatHold).where(SeatHold.passenger_id == user.id))
         db.delete(user)
         db.commit()
+        if held_flights:
+            seat_occupancy.invalidate(*held_flights)
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Deletion failed: {str(e)}")
@@ -0,0 +1,27 @@
+"""
+Workers модуль.
+Фоновые задачи, которые запускаются и останавливаются в lifespan приложения.
+"""
+from app.workers.announcement_fanout import AnnouncementFanoutWorker, announcement_fanout_worker
+from app.workers.base import BackgroundWorker
+from app.workers.booking_alerts import BookingAlertWorker, booking_alert_worker
+from app.workers.flight_status import FlightStatusScheduler, flight_status_scheduler
+from app.workers.hold_expiry import HoldExpiryWorker, hold_expiry_worker
+from app.workers.seat_inventory import SeatInventoryReconciler, seat_inventory_reconciler
+from app.workers.sqlite_maintenance import SqliteMaintenanceWorker, sqlite_maintenance_worker
+
+__all__ = [
+    "AnnouncementFanoutWorker",
+    "announcement_fanout_worker",
+    "BackgroundWorker",
+    "BookingAlertWorker",
+    "booking_alert_worker",
+    "FlightStatusScheduler",
+    "flight_status_scheduler",
+    "HoldExpiryWorker",
+    "hold_expiry_worker",
+    "SeatInventoryReconciler",
+    "seat_inventory_reconciler",
+    "SqliteMaintenanceWorker",
+    "sqlite_maintenance_worker",
+]
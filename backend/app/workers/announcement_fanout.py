@@ -0,0 +1,56 @@
+"""
+Announcement Fan-out Worker.
+Разворачивает события рассылки в персональные объявления пассажирам.
+"""
+from typing import Optional
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.workers.base import BackgroundWorker, logger
+
+
+class AnnouncementFanoutWorker(BackgroundWorker):
+    """
+    Доставка событий AnnouncementFanout пачками.
+
+    Пока очередь не пуста, пачки идут подряд; сервисы будят воркер
+    после commit события, интервал — страховка для пропущенных wake().
+    """
+
+    name = "announcement-fanout"
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        interval_seconds: int = settings.ANNOUNCEMENT_FANOUT_INTERVAL_SECONDS,
+        batch_size: int = settings.ANNOUNCEMENT_FANOUT_BATCH_SIZE
+    ):
+        super().__init__()
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.batches_delivered = 0
+        self.last_completed_id: Optional[int] = None
+
+    def run_once(self) -> float:
+        from app.models.announcement import FanoutStatus
+        from app.services.announcement_fanout import deliver_next_batch
+
+        db = self.session_factory()
+        try:
+            event = deliver_next_batch(db, self.batch_size)
+            if event is None:
+                return self.interval_seconds
+            self.batches_delivered += 1
+            if event.status == FanoutStatus.COMPLETED:
+                self.last_completed_id = event.id
+                logger.info(
+                    f"[{self.name}] fan-out #{event.id} delivered {event.total} announcement(s) "
+                    f"in {event.duration_ms:.2f}ms"
+                )
+        finally:
+            db.close()
+        return 0.0
+
+
+announcement_fanout_worker = AnnouncementFanoutWorker()
@@ -0,0 +1,70 @@
+"""
+Background Worker.
+Базовый класс фоновых задач, работающих в отдельном потоке.
+"""
+import logging
+import threading
+from typing import Optional
+
+logger = logging.getLogger("airline.workers")
+
+
+class BackgroundWorker:
+    """
+    Фоновый воркер на потоке-демоне.
+
+    Наследники реализуют run_once(): одна итерация работы,
+    возвращает число секунд до следующего запуска.
+    wake() запускает следующую итерацию досрочно.
+    """
+
+    name: str = "worker"
+    error_backoff_seconds: float = 30.0
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Запускает поток воркера (повторный вызов игнорируется)."""
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._wake_event.clear()
+        self._thread = threading.Thread(target=self._loop, name=f"airline-{self.name}", daemon=True)
+        self._thread.start()
+        logger.info(f"[{self.name}] started")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Останавливает поток и дожидается завершения текущей итерации."""
+        if not self._thread:
+            return
+        self._stop_event.set()
+        self._wake_event.set()
+        self._thread.join(timeout)
+        self._thread = None
+        logger.info(f"[{self.name}] stopped")
+
+    def wake(self) -> None:
+        """Досрочно запускает следующую итерацию."""
+        self._wake_event.set()
+
+    def run_once(self) -> float:
+        """Одна итерация работы. Возвращает паузу до следующей (в секундах)."""
+        raise NotImplementedError
+
+    def _loop(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                delay = self.run_once()
+            except Exception:
+                logger.exception(f"[{self.name}] iteration failed")
+                delay = self.error_backoff_seconds
+
+            self._wake_event.wait(timeout=max(0.0, delay))
+            self._wake_event.clear()
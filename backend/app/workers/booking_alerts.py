@@ -0,0 +1,48 @@
+"""
+Booking Alert Worker.
+Оповещения "вылет скоро" пассажирам рейсов, входящих в окно перед вылетом.
+"""
+from datetime import datetime
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.workers.base import BackgroundWorker, logger
+
+
+class BookingAlertWorker(BackgroundWorker):
+    """
+    Таймер для emit_departure_alerts.
+
+    Спит до момента, когда ближайший рейс с подтверждёнными бронированиями
+    войдёт в окно оповещения, но не дольше BOOKING_ALERTS_INTERVAL_SECONDS —
+    так подхватываются перенесённые рейсы и новые бронирования.
+    """
+
+    name = "booking-alerts"
+
+    def __init__(self, session_factory=SessionLocal, interval_seconds: int = settings.BOOKING_ALERTS_INTERVAL_SECONDS):
+        super().__init__()
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self.total_emitted = 0
+
+    def run_once(self) -> float:
+        from app.services.booking_alerts import emit_departure_alerts, next_departure_alert_at
+
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            emitted = emit_departure_alerts(db, now)
+            next_at = next_departure_alert_at(db, now)
+        finally:
+            db.close()
+
+        self.total_emitted += emitted
+        if emitted:
+            logger.info(f"[{self.name}] emitted {emitted} departure alert(s)")
+        if next_at is None:
+            return self.interval_seconds
+        return min(self.interval_seconds, max(0.0, (next_at - datetime.utcnow()).total_seconds()))
+
+
+booking_alert_worker = BookingAlertWorker()
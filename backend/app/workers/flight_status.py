@@ -0,0 +1,195 @@
+"""
+Flight Status Scheduler.
+Жизненный цикл рейса: ПО РАСПИСАНИЮ -> ПОСАДКА -> ВЫЛЕТЕЛ -> ПРИБЫЛ.
+
+Вместо проверки всех рейсов на каждом запросе планировщик держит очередь
+ближайших переходов (по времени) и применяет их пакетными UPDATE,
+когда наступает срок. Read-пути при этом ничего не пишут в БД.
+"""
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.flight import Flight, FlightStatus
+from app.workers.base import BackgroundWorker, logger
+
+
+# Посадка открывается за 2 часа до вылета
+BOARDING_WINDOW = timedelta(hours=2)
+
+# Статусы, из которых возможен автоматический переход
+ACTIVE_STATUSES = [FlightStatus.SCHEDULED, FlightStatus.BOARDING, FlightStatus.DEPARTED]
+
+
+def next_transition_at(status: FlightStatus, departure: datetime, arrival: datetime) -> Optional[datetime]:
+    """Момент следующего автоматического перехода статуса (None для конечных статусов)."""
+    if status == FlightStatus.SCHEDULED:
+        return departure - BOARDING_WINDOW
+    if status == FlightStatus.BOARDING:
+        return departure
+    if status == FlightStatus.DEPARTED:
+        return arrival
+    return None
+
+
+def apply_status_transitions(
+    db: Session,
+    now: Optional[datetime] = None,
+    flight_ids: Optional[Iterable[int]] = None
+) -> int:
+    """
+    Применяет все наступившие переходы статусов.
+    Каждый целевой статус — один пакетный UPDATE (опционально только по flight_ids).
+    Не коммитит — транзакцией управляет вызывающий код.
+    """
+    now = now or datetime.utcnow()
+    ids = list(flight_ids) if flight_ids is not None else None
+    if ids is not None and not ids:
+        return 0
+
+    transitions = [
+        # Прибыл: время прибытия наступило
+        (FlightStatus.ARRIVED, [
+            Flight.status.in_(ACTIVE_STATUSES),
+            Flight.scheduled_arrival <= now,
+        ]),
+        # Вылетел: время вылета наступило, прибытие ещё нет
+        (FlightStatus.DEPARTED, [
+            Flight.status.in_([FlightStatus.SCHEDULED, FlightStatus.BOARDING]),
+            Flight.scheduled_departure <= now,
+            Flight.scheduled_arrival > now,
+        ]),
+        # Посадка: до вылета меньше 2 часов
+        (FlightStatus.BOARDING, [
+            Flight.status == FlightStatus.SCHEDULED,
+            Flight.scheduled_departure <= now + BOARDING_WINDOW,
+            Flight.scheduled_departure > now,
+        ]),
+    ]
+
+    affected = 0
+    for new_status, conditions in transitions:
+        query = db.query(Flight).filter(*conditions)
+        if ids is not None:
+            query = query.filter(Flight.id.in_(ids))
+        affected += query.update(
+            {Flight.status: new_status, Flight.version: Flight.version + 1}, synchronize_session=False
+        )
+    return affected
+
+
+class FlightStatusScheduler(BackgroundWorker):
+    """
+    Планировщик переходов статусов рейсов.
+
+    Очередь — heap из (время перехода, flight_id). Устаревшие записи
+    (рейс перенесли или отменили) безопасны: UPDATE защищён условиями
+    по статусу и времени, а после применения рейс заново ставится в очередь
+    по данным из БД. Раз в FLIGHT_STATUS_RESYNC_SECONDS очередь
+    полностью пересобирается, чтобы подхватить изменения в обход сервисов.
+    """
+
+    name = "flight-status"
+
+    def __init__(self, session_factory=SessionLocal, resync_seconds: int = settings.FLIGHT_STATUS_RESYNC_SECONDS):
+        super().__init__()
+        self.session_factory = session_factory
+        self.resync_seconds = resync_seconds
+        self._queue: List[Tuple[datetime, int]] = []
+        self._lock = threading.Lock()
+        self._next_resync = 0.0
+
+    def schedule(self, flight: Flight) -> None:
+        """Ставит в очередь следующий переход рейса (вызывается после commit)."""
+        due = next_transition_at(flight.status, flight.scheduled_departure, flight.scheduled_arrival)
+        if due is None:
+            return
+        with self._lock:
+            heapq.heappush(self._queue, (due, flight.id))
+            is_head = self._queue[0] == (due, flight.id)
+        if is_head:
+            self.wake()
+
+    def run_once(self) -> float:
+        if time.monotonic() >= self._next_resync:
+            self._resync()
+
+        now = datetime.utcnow()
+        due_ids = set()
+        with self._lock:
+            while self._queue and self._queue[0][0] <= now:
+                due_ids.add(heapq.heappop(self._queue)[1])
+
+        if due_ids:
+            self._apply(due_ids, now)
+
+        with self._lock:
+            head = self._queue[0][0] if self._queue else None
+
+        until_resync = max(0.0, self._next_resync - time.monotonic())
+        if head is None:
+            return until_resync
+        return min(until_resync, max(0.0, (head - datetime.utcnow()).total_seconds()))
+
+    def _apply(self, flight_ids: set, now: datetime) -> None:
+        db = self.session_factory()
+        try:
+            changed = apply_status_transitions(db, now, flight_ids)
+            db.commit()
+            rows = db.query(
+                Flight.id, Flight.status, Flight.scheduled_departure, Flight.scheduled_arrival
+            ).filter(Flight.id.in_(flight_ids)).all()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        self._enqueue(rows, reset=False)
+        if changed:
+            logger.info(f"[{self.name}] applied {changed} status transition(s)")
+
+    def _resync(self) -> None:
+        """Догоняющий пакетный проход + полная пересборка очереди из БД."""
+        db = self.session_factory()
+        try:
+            changed = apply_status_transitions(db)
+            db.commit()
+            rows = db.query(
+                Flight.id, Flight.status, Flight.scheduled_departure, Flight.scheduled_arrival
+            ).filter(Flight.status.in_(ACTIVE_STATUSES)).all()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        self._enqueue(rows, reset=True)
+        self._next_resync = time.monotonic() + self.resync_seconds
+        if changed:
+            logger.info(f"[{self.name}] resync applied {changed} status transition(s)")
+
+    def _enqueue(self, rows, reset: bool) -> None:
+        entries = []
+        for flight_id, status, departure, arrival in rows:
+            due = next_transition_at(status, departure, arrival)
+            if due is not None:
+                entries.append((due, flight_id))
+
+        with self._lock:
+            if reset:
+                self._queue = entries
+                heapq.heapify(self._queue)
+            else:
+                for entry in entries:
+                    heapq.heappush(self._queue, entry)
+
+
+# Единственный экземпляр планировщика на процесс (запускается в lifespan)
+flight_status_scheduler = FlightStatusScheduler()
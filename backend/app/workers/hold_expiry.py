@@ -0,0 +1,49 @@
+"""
+Hold Expiry Worker.
+Периодически освобождает просроченные блокировки мест и их черновики бронирований.
+"""
+from typing import Optional
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.schemas.seat import HoldReclaimReport
+from app.workers.base import BackgroundWorker, logger
+
+
+class HoldExpiryWorker(BackgroundWorker):
+    """
+    Таймер для cleanup_expired_holds.
+
+    Запуск для конкретного рейса выполняется синхронно в hold_seats
+    и через staff-эндпоинт; воркер отвечает за все рейсы сразу.
+    """
+
+    name = "hold-expiry"
+
+    def __init__(self, session_factory=SessionLocal, interval_seconds: int = settings.HOLD_EXPIRY_INTERVAL_SECONDS):
+        super().__init__()
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self.last_report: Optional[HoldReclaimReport] = None
+        self.total_holds_reclaimed = 0
+
+    def run_once(self) -> float:
+        from app.services.booking_service import cleanup_expired_holds
+
+        db = self.session_factory()
+        try:
+            report = cleanup_expired_holds(db)
+        finally:
+            db.close()
+
+        self.last_report = report
+        self.total_holds_reclaimed += report.holds_reclaimed
+        if report.holds_reclaimed or report.drafts_reclaimed:
+            logger.info(
+                f"[{self.name}] reclaimed {report.holds_reclaimed} hold(s), "
+                f"{report.drafts_reclaimed} draft(s) in {report.duration_ms:.2f}ms"
+            )
+        return self.interval_seconds
+
+
+hold_expiry_worker = HoldExpiryWorker()
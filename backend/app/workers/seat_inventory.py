@@ -0,0 +1,46 @@
+"""
+Seat Inventory Reconciler.
+Периодически сверяет счётчики занятых мест рейсов с бронированиями и исправляет расхождения.
+"""
+from typing import Optional
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.schemas.seat import SeatInventoryReport
+from app.services.seat_inventory import reconcile_seats_taken
+from app.workers.base import BackgroundWorker, logger
+
+
+class SeatInventoryReconciler(BackgroundWorker):
+    """
+    Таймер для reconcile_seats_taken.
+
+    Счётчики поддерживаются при каждом изменении бронирований; сверка ловит
+    записи в обход сервисов и заполняет счётчики после миграции.
+    """
+
+    name = "seat-inventory"
+
+    def __init__(self, session_factory=SessionLocal, interval_seconds: int = settings.SEAT_INVENTORY_RECONCILE_SECONDS):
+        super().__init__()
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self.last_report: Optional[SeatInventoryReport] = None
+
+    def run_once(self) -> float:
+        db = self.session_factory()
+        try:
+            report = reconcile_seats_taken(db)
+        finally:
+            db.close()
+
+        self.last_report = report
+        if report.flights_repaired:
+            logger.warning(
+                f"[{self.name}] repaired seat counters of {report.flights_repaired} flight(s), "
+                f"drift {report.drift}, in {report.duration_ms:.2f}ms"
+            )
+        return self.interval_seconds
+
+
+seat_inventory_reconciler = SeatInventoryReconciler()
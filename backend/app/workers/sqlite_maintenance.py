@@ -0,0 +1,52 @@
+"""
+SQLite Maintenance Worker.
+Периодический wal_checkpoint и PRAGMA optimize для базы в режиме WAL.
+"""
+import time
+from typing import Dict, Optional
+
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.sqlite import optimize, wal_checkpoint
+from app.workers.base import BackgroundWorker, logger
+
+
+class SqliteMaintenanceWorker(BackgroundWorker):
+    """
+    Автоматический checkpoint SQLite срабатывает только при коммите и не
+    доходит до конца, пока есть читатели, поэтому под постоянной нагрузкой
+    WAL растёт и чтение замедляется. Воркер делает checkpoint по таймеру,
+    а optimize — реже: статистика меняется медленно.
+    """
+
+    name = "sqlite-maintenance"
+
+    def __init__(
+        self,
+        db_engine: Engine = engine,
+        checkpoint_seconds: int = settings.SQLITE_CHECKPOINT_INTERVAL_SECONDS,
+        optimize_seconds: int = settings.SQLITE_OPTIMIZE_INTERVAL_SECONDS
+    ):
+        super().__init__()
+        self.engine = db_engine
+        self.checkpoint_seconds = checkpoint_seconds
+        self.optimize_seconds = optimize_seconds
+        self.last_checkpoint: Optional[Dict[str, int]] = None
+        self._next_optimize_at = time.monotonic() + optimize_seconds
+
+    def run_once(self) -> float:
+        self.last_checkpoint = wal_checkpoint(self.engine, settings.SQLITE_CHECKPOINT_MODE)
+        if self.last_checkpoint and self.last_checkpoint["busy"]:
+            logger.warning(f"[{self.name}] checkpoint incomplete: {self.last_checkpoint}")
+
+        if time.monotonic() >= self._next_optimize_at:
+            started = time.perf_counter()
+            optimize(self.engine)
+            self._next_optimize_at = time.monotonic() + self.optimize_seconds
+            logger.info(f"[{self.name}] PRAGMA optimize in {(time.perf_counter() - started) * 1000:.2f}ms")
+        return self.checkpoint_seconds
+
+
+sqlite_maintenance_worker = SqliteMaintenanceWorker()
@@ -0,0 +1,131 @@
+"""
+Конкурентность горячих чтений: синхронный обработчик (пул потоков anyio)
+против async-обработчика (app.db.async_session).
+
+Оба варианта отдают карту мест и список аэропортов из одной временной базы
+(init_db.py). Клиент держит CONCURRENCY запросов одновременно; пул потоков
+anyio ограничен --threads (по умолчанию как в anyio — 40). Печатаются
+запросы в секунду, задержки и максимум одновременно выполняемых обработчиков:
+у синхронного варианта он упирается в размер пула потоков.
+
+Запуск из каталога backend (нужны greenlet и aiosqlite):
+    python -m benchmarks.async_reads [--concurrency 200] [--requests 4000] [--threads 40]
+"""
+import argparse
+import asyncio
+import os
+import runpy
+import statistics
+import tempfile
+import time
+
+_directory = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_directory.name, 'bench.db')}"
+os.environ["DB_ECHO"] = "false"
+
+import anyio.to_thread  # noqa: E402
+import httpx  # noqa: E402
+from fastapi import Depends, FastAPI  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.core.database import SessionLocal, get_read_db  # noqa: E402
+from app.db.async_session import async_engine, get_async_db  # noqa: E402
+from app.models.flight import Flight as FlightModel  # noqa: E402
+from app.repositories.async_flight_repository import AsyncFlightRepository  # noqa: E402
+from app.schemas.airport import Airport  # noqa: E402
+from app.services import flight_service  # noqa: E402
+
+
+class InFlight:
+    """Сколько обработчиков выполняется одновременно (максимум за прогон)."""
+
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+
+    def __enter__(self):
+        self.current += 1
+        self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc):
+        self.current -= 1
+
+
+def build_app(in_flight: InFlight) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/sync/flights/{flight_id}/seats")
+    def sync_seats(flight_id: int, db: Session = Depends(get_read_db)):
+        with in_flight:
+            return flight_service.get_flight_seat_map(db, flight_id)
+
+    @app.get("/sync/airports")
+    def sync_airports(db: Session = Depends(get_read_db)):
+        with in_flight:
+            return [Airport.model_validate(a) for a in flight_service.get_airports(db)]
+
+    @app.get("/async/flights/{flight_id}/seats")
+    async def async_seats(flight_id: int, db: AsyncSession = Depends(get_async_db)):
+        with in_flight:
+            return await AsyncFlightRepository(db).get_seat_map(flight_id)
+
+    @app.get("/async/airports")
+    async def async_airports(db: AsyncSession = Depends(get_async_db)):
+        with in_flight:
+            return await AsyncFlightRepository(db).get_airports()
+
+    return app
+
+
+async def run(app: FastAPI, paths, concurrency: int, total: int):
+    latencies = []
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(paths[i % len(paths)])
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def worker():
+            while not queue.empty():
+                path = queue.get_nowait()
+                started = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return elapsed, latencies
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--threads", type=int, default=40)
+    args = parser.parse_args()
+
+    runpy.run_path(os.path.join(os.path.dirname(__file__), "..", "init_db.py"))
+    anyio.to_thread.current_default_thread_limiter().total_tokens = args.threads
+    with SessionLocal() as db:
+        flight_ids = [flight_id for (flight_id,) in db.query(FlightModel.id).all()]
+
+    print(f"\n{'handler':>8} | {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} | {'peak in-flight':>14} (threads {args.threads}, concurrency {args.concurrency})")
+    for kind in ("sync", "async"):
+        in_flight = InFlight()
+        app = build_app(in_flight)
+        paths = [f"/{kind}/flights/{flight_id}/seats" for flight_id in flight_ids] + [f"/{kind}/airports"]
+        await run(app, paths, args.concurrency, len(paths) * 10)  # прогрев кэшей
+        in_flight.peak = 0
+        elapsed, latencies = await run(app, paths, args.concurrency, args.requests)
+        quantiles = statistics.quantiles(latencies, n=20)
+        print(
+            f"{kind:>8} | {args.requests / elapsed:>8.0f} {statistics.median(latencies) * 1000:>8.1f} "
+            f"{quantiles[18] * 1000:>8.1f} | {in_flight.peak:>14}"
+        )
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+"""
+Замер стоимости выдачи PNR при росте таблицы bookings.
+
+Сравнивает прежнюю схему (случайный код + SELECT по bookings.pnr на каждую
+попытку) с pnr_allocator (блок номеров + один запрос на блок). Для каждого
+размера таблицы выдаётся COUNT кодов; печатаются микросекунды и число
+запросов к БД на один код.
+
+Запуск из каталога backend:
+    python -m benchmarks.pnr_allocation [--sizes 10000,100000,1000000] [--count 5000]
+"""
+import argparse
+import os
+import secrets
+import sqlite3
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.models import aircraft, airport, announcement, flight, payment, user  # noqa: F401 (таблицы для FK)
+from app.models.booking import Booking
+from app.services.pnr_allocator import CHARSET, PnrAllocator, is_allowed
+
+SEATS_PER_FLIGHT = 300
+
+
+def fill_bookings(path: str, total: int, start: int) -> None:
+    """Дописывает в bookings строки [start, total) со случайными PNR."""
+    connection = sqlite3.connect(path)
+    rows = (
+        ("".join(secrets.choice(CHARSET) for _ in range(6)), 1, i // SEATS_PER_FLIGHT, str(i), 100.0, "CONFIRMED")
+        for i in range(start, total)
+    )
+    connection.executemany(
+        "INSERT INTO bookings (pnr, passenger_id, flight_id, seat_number, price, status) VALUES (?, ?, ?, ?, ?, ?)",
+        rows
+    )
+    connection.commit()
+    connection.close()
+
+
+def legacy_generate(db: Session) -> str:
+    """Прежний generate_pnr: проверка в БД на каждую попытку."""
+    while True:
+        pnr = "".join(secrets.choice(CHARSET) for _ in range(6))
+        if not is_allowed(pnr):
+            continue
+        if not db.query(Booking.id).filter(Booking.pnr == pnr).first():
+            return pnr
+
+
+def measure(engine, generate, count: int):
+    statements = 0
+
+    def count_statement(*args):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        with Session(engine) as db:
+            started = time.perf_counter()
+            for _ in range(count):
+                generate(db)
+            elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+    return elapsed / count * 1e6, statements / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--count", type=int, default=5000)
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=engine)
+
+        print(f"{'bookings':>10} | {'legacy us/code':>14} {'queries':>7} | {'allocator us/code':>17} {'queries':>7}")
+        filled = 0
+        for size in sizes:
+            fill_bookings(path, size, filled)
+            filled = size
+            legacy_us, legacy_queries = measure(engine, legacy_generate, args.count)
+            allocator = PnrAllocator()
+            allocator_us, allocator_queries = measure(engine, allocator.allocate, args.count)
+            print(f"{size:>10} | {legacy_us:>14.1f} {legacy_queries:>7.2f} | {allocator_us:>17.1f} {allocator_queries:>7.3f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Конкурентное чтение и запись SQLite без профиля и с профилем PRAGMA (app.core.sqlite).
+
+Писатели повторяют нагрузку воркеров: UPDATE статуса и версии рейса и
+DELETE/INSERT блокировок мест в одной транзакции. Читатели — запрос карты
+мест: бронирования и блокировки рейса. Для каждого режима печатаются
+операции в секунду, средняя задержка чтения и число ошибок блокировки.
+
+Запуск из каталога backend:
+    python -m benchmarks.sqlite_profile [--readers 8] [--writers 2] [--seconds 5] [--flights 200]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import QueuePool
+
+from app.core.database import Base
+from app.core.sqlite import install_sqlite_profile
+from app.models import aircraft, airport, announcement, booking, flight, payment, user  # noqa: F401 (все таблицы)
+
+SEATS_PER_FLIGHT = 180
+
+READ_SQL = text(
+    "SELECT b.seat_number, b.status FROM bookings b WHERE b.flight_id = :flight_id "
+    "UNION ALL SELECT h.seat_number, 'HELD' FROM seat_holds h WHERE h.flight_id = :flight_id AND h.expires_at > :now"
+)
+
+
+def fill(path: str, flights: int) -> None:
+    """Рейсы с заполненными бронированиями (внешние ключи — на одного пассажира и аэропорт)."""
+    connection = sqlite3.connect(path)
+    now = datetime.utcnow()
+    connection.execute("INSERT INTO users (id, email, hashed_password, role, is_active) VALUES (1, 'bench@test', '-', 'PASSENGER', 1)")
+    connection.execute("INSERT INTO airports (id, code, name, city, country) VALUES (1, 'AAA', 'A', 'A', 'A')")
+    connection.executemany(
+        "INSERT INTO flights (id, flight_number, origin_airport_id, destination_airport_id, scheduled_departure, "
+        "scheduled_arrival, status, base_price, terminal, version, seats_taken) VALUES (?, ?, 1, 1, ?, ?, 'SCHEDULED', 100, 'A', 0, 0)",
+        ((i, f"BN{i}", now + timedelta(hours=i), now + timedelta(hours=i + 3)) for i in range(1, flights + 1))
+    )
+    connection.executemany(
+        "INSERT INTO bookings (pnr, passenger_id, flight_id, seat_number, price, status) VALUES (?, 1, ?, ?, 100, 'CONFIRMED')",
+        ((f"P{i:05d}", i // SEATS_PER_FLIGHT + 1, str(i % SEATS_PER_FLIGHT)) for i in range(flights * SEATS_PER_FLIGHT // 2))
+    )
+    connection.commit()
+    connection.close()
+
+
+def run(engine, readers: int, writers: int, seconds: float, flights: int) -> dict:
+    stop = threading.Event()
+    lock = threading.Lock()
+    totals = {"reads": 0, "writes": 0, "read_seconds": 0.0, "locked": 0}
+
+    def add(**values):
+        with lock:
+            for key, value in values.items():
+                totals[key] += value
+
+    def reader():
+        rng = random.Random()
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                with engine.connect() as connection:
+                    connection.execute(READ_SQL, {"flight_id": rng.randint(1, flights), "now": datetime.utcnow()}).all()
+                add(reads=1, read_seconds=time.perf_counter() - started)
+            except OperationalError:
+                add(locked=1)
+
+    def writer():
+        rng = random.Random()
+        while not stop.is_set():
+            flight_id = rng.randint(1, flights)
+            seat = f"H{rng.randint(0, 50)}"
+            try:
+                with engine.begin() as connection:
+                    connection.execute(text("UPDATE flights SET version = version + 1, status = 'BOARDING' WHERE id = :id"), {"id": flight_id})
+                    connection.execute(text("DELETE FROM seat_holds WHERE flight_id = :id AND seat_number = :seat"), {"id": flight_id, "seat": seat})
+                    connection.execute(
+                        text("INSERT INTO seat_holds (flight_id, seat_number, passenger_id, expires_at) VALUES (:id, :seat, 1, :expires)"),
+                        {"id": flight_id, "seat": seat, "expires": datetime.utcnow() + timedelta(minutes=10)}
+                    )
+                add(writes=1)
+            except OperationalError:
+                add(locked=1)
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)] + [threading.Thread(target=writer) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--flights", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'profile':>8} | {'reads/s':>9} {'read ms':>8} | {'writes/s':>9} | {'locked':>6}")
+    for tuned in (False, True):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "bench.db")
+            engine = create_engine(
+                f"sqlite:///{path}", connect_args={"check_same_thread": False},
+                poolclass=QueuePool, pool_size=args.readers + args.writers, max_overflow=0
+            )
+            if tuned:
+                install_sqlite_profile(engine)
+            Base.metadata.create_all(bind=engine)
+            fill(path, args.flights)
+            totals = run(engine, args.readers, args.writers, args.seconds, args.flights)
+            engine.dispose()
+        read_ms = totals["read_seconds"] / totals["reads"] * 1000 if totals["reads"] else 0.0
+        print(
+            f"{'on' if tuned else 'off':>8} | {totals['reads'] / args.seconds:>9.0f} {read_ms:>8.2f} | "
+            f"{totals['writes'] / args.seconds:>9.0f} | {totals['locked']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,24 +5,62 @@ Zhan Airline - Backend API
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
-from app.core.database import Base, engine
+from app.core.database import Base, engine, SessionLocal, create_missing_columns, create_missing_indexes, pool_stats, read_engine
+from app.core.concurrency import concurrency_stats, configure_threadpool
 from app.core.config import settings
+from app.core.sqlite import is_file_sqlite
 from app.routes import auth, passenger, staff
+from app.services.announcement_service import attach_legacy_recipients
+from app.services.payment_service import attach_legacy_payments
 
 # Middleware imports
 from app.middleware.cors import setup_cors
 from app.middleware.request_id import RequestIdMiddleware
 from app.middleware.logging import RequestLoggingMiddleware, setup_logging
 
+# Background workers
+from app.workers import (
+    announcement_fanout_worker, booking_alert_worker, flight_status_scheduler, hold_expiry_worker,
+    seat_inventory_reconciler, sqlite_maintenance_worker
+)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifecycle events: startup and shutdown."""
     # Startup
     setup_logging()
+    configure_threadpool()
     Base.metadata.create_all(bind=engine)
+    create_missing_columns()
+    create_missing_indexes()
+    # Платежи, записанные до появления checkouts, группируются в транзакции
+    with SessionLocal() as db:
+        attach_legacy_payments(db)
+        # Личные сообщения, записанные до появления recipient_id
+        attach_legacy_recipients(db)
+    # Первая сверка счётчиков мест — до приёма запросов (заполняет их после миграции)
+    seat_inventory_reconciler.run_once()
+    if settings.FLIGHT_STATUS_SCHEDULER_ENABLED:
+        flight_status_scheduler.start()
+    if settings.HOLD_EXPIRY_WORKER_ENABLED:
+        hold_expiry_worker.start()
+    if settings.SEAT_INVENTORY_RECONCILE_ENABLED:
+        seat_inventory_reconciler.start()
+    if settings.ANNOUNCEMENT_FANOUT_ENABLED:
+        announcement_fanout_worker.start()
+    if settings.BOOKING_ALERTS_ENABLED:
+        booking_alert_worker.start()
+    if settings.SQLITE_MAINTENANCE_ENABLED and settings.SQLITE_PROFILE_ENABLED and is_file_sqlite(settings.DATABASE_URL):
+        sqlite_maintenance_worker.start()
     yield
-    # Shutdown (cleanup if needed)
+    # Shutdown
+    sqlite_maintenance_worker.stop()
+    booking_alert_worker.stop()
+    announcement_fanout_worker.stop()
+    seat_inventory_reconciler.stop()
+    hold_expiry_worker.stop()
+    flight_status_scheduler.stop()
 
 
 # ─────────────────────────────────────────
@@ -61,6 +99,10 @@ app.include_router(api_v1_router)
 
 # 2. Legacy Routes (for backward compatibility)
 app.include_router(auth.router)
+if settings.ASYNC_DB_ENABLED:
+    # Async-варианты горячих чтений перекрывают синхронные (подключаются раньше)
+    from app.routes import passenger_async
+    app.include_router(passenger_async.router)
 app.include_router(passenger.router)
 app.include_router(staff.router)
 
@@ -89,6 +131,19 @@ def health_check():
     }
 
 
+@app.get("/health/db", tags=["System"])
+def database_health():
+    """Статистика пулов соединений БД (запись и чтение)."""
+    return {"pool": pool_stats(), "read_pool": pool_stats(read_engine) if read_engine is not engine else None}
+
+
+@app.get("/health/concurrency", tags=["System"])
+async def concurrency_health():
+    """Загрузка пула потоков и очереди пулов конкурентности (browse, checkout, staff_reports)."""
+    # async: отвечает, даже когда все потоки пула заняты
+    return concurrency_stats()
+
+
 # ─────────────────────────────────────────
 # Запуск (для разработки)
 # ─────────────────────────────────────────
@@ -0,0 +1,27 @@
+"""
+Перестройка проекции "Мои поездки" (trip_projections).
+
+Проекция строится лениво при первом чтении; скрипт заполняет её заранее —
+после развёртывания или ручных правок бронирований в БД.
+
+    python rebuild_trips.py [--user-id 1 --user-id 2]
+"""
+import argparse
+
+from app.core.database import Base, engine, SessionLocal
+from app.services.trip_projection import rebuild_all
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", type=int, action="append", dest="user_ids", help="Только этот пассажир (можно повторять)")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        rebuilt = rebuild_all(db, args.user_ids)
+    print(f"✓ Перестроено проекций: {rebuilt}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+Общие фикстуры тестов: временная база SQLite в файле.
+DATABASE_URL задаётся до импорта app — настройки и движок создаются при импорте.
+"""
+import os
+import tempfile
+
+import pytest
+
+_directory = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_directory.name, 'test.db')}"
+os.environ["DB_ECHO"] = "false"
+
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import aircraft, airport, announcement, booking, flight, payment, user  # noqa: E402,F401 (все таблицы)
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
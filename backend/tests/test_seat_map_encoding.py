@@ -0,0 +1,123 @@
+"""
+Контракт быстрого пути карты мест (SEAT_MAP_FAST_RESPONSE): готовый JSON из
+encode_*_seat_map совпадает с сериализацией SeatMap / StaffSeatMap, а ответы
+эндпоинтов карты мест не меняются при включении флага.
+"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from app.core.config import settings
+from app.core.dependencies import get_current_passenger_read, get_current_staff_read
+from app.models.aircraft import Aircraft, SeatTemplate
+from app.models.airport import Airport
+from app.models.booking import Booking, BookingStatus, SeatHold
+from app.models.flight import Flight
+from app.models.user import User
+from app.services import flight_service
+from app.services.aircraft_service import _generate_seat_map
+from app.services.seat_occupancy import seat_occupancy
+
+
+@pytest.fixture
+def flight_id(db):
+    """Рейс со свободными, заблокированными, забронированными и отменёнными местами."""
+    template = SeatTemplate(
+        name="Test", row_count=6, seat_letters="AB CD", business_rows="1-2", economy_rows="3-6",
+        seat_map=_generate_seat_map(6, "AB CD", "1-2", "3-6")
+    )
+    origin = Airport(code="AAA", name="A", city="Алматы", country="KZ")
+    destination = Airport(code="BBB", name="B", city="Астана", country="KZ")
+    passenger = User(email="p@test", hashed_password="-")
+    db.add_all([template, origin, destination, passenger])
+    db.flush()
+    plane = Aircraft(model="A320", registration_number="UP-TEST", capacity=24, seat_template_id=template.id)
+    db.add(plane)
+    db.flush()
+    departure = datetime.utcnow() + timedelta(days=3)
+    flight = Flight(
+        flight_number="TS100", aircraft_id=plane.id, origin_airport_id=origin.id, destination_airport_id=destination.id,
+        scheduled_departure=departure, scheduled_arrival=departure + timedelta(hours=2), base_price=123.45
+    )
+    db.add(flight)
+    db.flush()
+    db.add_all([
+        Booking(flight_id=flight.id, passenger_id=passenger.id, seat_number="1A", price=1, status=BookingStatus.CONFIRMED,
+                first_name='Иван "Ваня"', last_name="O'Brien\\"),
+        Booking(flight_id=flight.id, passenger_id=passenger.id, seat_number="3C", price=1, status=BookingStatus.CONFIRMED),
+        # CREATED без блокировки место не занимает (как в карте занятости)
+        Booking(flight_id=flight.id, passenger_id=passenger.id, seat_number="4D", price=1, status=BookingStatus.CREATED),
+        Booking(flight_id=flight.id, passenger_id=passenger.id, seat_number="5B", price=1, status=BookingStatus.CANCELLED),
+        SeatHold(flight_id=flight.id, seat_number="2B", passenger_id=passenger.id, expires_at=datetime.utcnow() + timedelta(minutes=10)),
+    ])
+    db.commit()
+    seat_occupancy.invalidate(flight.id)
+    return flight.id
+
+
+def test_passenger_seat_map_matches_schema(db, flight_id):
+    content, counts = flight_service.encode_flight_seat_map(db, flight_id)
+    seat_map = flight_service.get_flight_seat_map(db, flight_id)
+
+    assert content == seat_map.model_dump_json().encode()
+    statuses = {seat.seat_number: seat.status for seat in seat_map.seats}
+    assert (statuses["1A"], statuses["4D"], statuses["2B"], statuses["5B"]) == ("occupied", "available", "reserved", "available")
+    assert counts["reserved"] == seat_map.total_seats - seat_map.available_seats - seat_map.occupied_seats
+
+
+def test_staff_seat_map_matches_schema(db, flight_id):
+    content, _ = flight_service.encode_staff_flight_seat_map(db, flight_id)
+    seat_map = flight_service.get_staff_flight_seat_map(db, flight_id)
+
+    assert content == seat_map.model_dump_json().encode()
+    seats = {seat["seat_number"]: seat for seat in json.loads(content)["seats"]}
+    assert seats["1A"]["passenger_name"] == 'Иван "Ваня" O\'Brien\\'
+    assert seats["3C"]["passenger_name"] == "BLOCK"
+    assert seats["5B"]["passenger_name"] is None
+
+
+def test_missing_seat_template_encodes_empty_map(db, flight_id):
+    db.query(Flight).filter(Flight.id == flight_id).update({Flight.aircraft_id: None})
+    db.commit()
+    seat_occupancy.invalidate(flight_id)
+
+    content, _ = flight_service.encode_flight_seat_map(db, flight_id)
+    assert content == flight_service.get_flight_seat_map(db, flight_id).model_dump_json().encode()
+    content, _ = flight_service.encode_staff_flight_seat_map(db, flight_id)
+    assert content == flight_service.get_staff_flight_seat_map(db, flight_id).model_dump_json().encode()
+
+
+@pytest.fixture
+def client(db):
+    """Клиент API без lifespan (фоновые задачи не запускаются) и с подменённой аутентификацией."""
+    user = db.query(User).first()
+    main.app.dependency_overrides[get_current_passenger_read] = lambda: user
+    main.app.dependency_overrides[get_current_staff_read] = lambda: user
+    try:
+        yield TestClient(main.app)
+    finally:
+        main.app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize("path", [
+    "/passenger/flights/{id}/seats",
+    "/staff/flights/{id}/seats",
+    "/api/v1/bookings/{id}/seats",
+])
+def test_fast_response_is_byte_identical(client, flight_id, monkeypatch, path):
+    url = path.format(id=flight_id)
+    responses = []
+    for fast in (False, True):
+        monkeypatch.setattr(settings, "SEAT_MAP_FAST_RESPONSE", fast)
+        seat_occupancy.invalidate(flight_id)
+        response = client.get(url)
+        assert response.status_code == 200, response.text
+        responses.append(response)
+
+    regular, fast = responses
+    assert fast.content == regular.content
+    assert fast.headers["content-type"] == regular.headers["content-type"]
+    assert fast.headers.get("etag") == regular.headers.get("etag")